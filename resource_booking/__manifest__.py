@@ -23,6 +23,7 @@
         ],
     },
     "depends": [
+        "bus",
         "calendar",
         "mail",
         "portal",
@@ -30,6 +31,7 @@
         "web_calendar_slot_duration",
     ],
     "data": [
+        "data/ir_cron.xml",
         "data/mail.xml",
         "data/mail_data.xml",
         "security/resource_booking_security.xml",
@@ -40,7 +42,10 @@
         "views/res_partner_views.xml",
         "views/resource_booking_combination_views.xml",
         "views/resource_booking_type_views.xml",
+        "views/resource_booking_occupancy_views.xml",
+        "views/resource_booking_utilization_views.xml",
         "views/resource_booking_views.xml",
+        "views/resource_booking_series_views.xml",
         "views/menus.xml",
         "report/resource_booking_report.xml",
         "report/resource_booking_report_template.xml",
@@ -51,9 +56,6 @@
             "resource_booking/static/src/scss/portal.scss",
         ],
         "web.assets_tests": ["resource_booking/static/src/js/tours/**/*"],
-        'web.report_assets_common': [
-            'models/resource_booking_report.py',
-        ],
     },
     "demo": ["demo/res_users_demo.xml"],
 }
@@ -0,0 +1,41 @@
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+import hmac
+
+from odoo.http import Controller, request, route
+
+from ..tools import metrics
+
+
+class MetricsController(Controller):
+    def _metrics_allowed(self):
+        """Managers and bearers of the configured token can read metrics."""
+        if request.env.user.has_group("resource_booking.group_manager"):
+            return True
+        token = (
+            request.env["ir.config_parameter"]
+            .sudo()
+            .get_param("resource_booking.metrics_token")
+        )
+        authorization = request.httprequest.headers.get("Authorization", "")
+        return bool(token) and hmac.compare_digest(
+            authorization.encode(), f"Bearer {token}".encode()
+        )
+
+    @route(
+        ["/resource_booking/metrics"],
+        auth="public",
+        type="http",
+        methods=["GET"],
+        save_session=False,
+    )
+    def metrics(self, **kwargs):
+        """Expose counters of this worker in Prometheus text format."""
+        if not self._metrics_allowed():
+            return request.make_response(
+                "Forbidden", [("Content-Type", "text/plain")], status=403
+            )
+        return request.make_response(
+            metrics.render(),
+            [("Content-Type", "text/plain; version=0.0.4; charset=utf-8")],
+        )
@@ -2,18 +2,25 @@
 # Copyright 2022 Tecnativa - Pedro M. Baeza
 # License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
 
-from datetime import datetime
+import time
+from datetime import date, datetime
 
 from dateutil.parser import isoparse
 
+from odoo import _, fields
 from odoo.exceptions import AccessError, MissingError, ValidationError
 from odoo.http import request, route
 from odoo.tests.common import Form
 
 from odoo.addons.portal.controllers import portal
 
+from ..tools import metrics
+
 
 class CustomerPortal(portal.CustomerPortal):
+    # Seconds during which the cached bookings count is trusted for paging
+    _bookings_count_ttl = 60
+
     def _get_booking_sudo(self, booking_id, access_token):
         """Get sudoed booking record from its ID."""
         booking_sudo = self._document_check_access(
@@ -52,20 +59,64 @@ class CustomerPortal(portal.CustomerPortal):
         """List bookings that I can access."""
         Booking = request.env["resource.booking"].with_context(using_portal=True)
         values = self._prepare_portal_layout_values()
-        booking_count = Booking.search_count([])
         pager = portal.pager(
             url="/my/bookings",
-            total=booking_count,
+            total=self._get_my_bookings_count(Booking),
             page=page,
             step=self._items_per_page,
         )
-        bookings = Booking.search(
-            [], limit=self._items_per_page, offset=pager["offset"]
+        # Seek from the last record of the previous page when we know it, and
+        # fall back to the offset when jumping to a page we never visited
+        page = pager["page"]["num"]
+        cursors = request.session.get("my_bookings_cursors") or {}
+        cursor = cursors.get(str(page)) if page > 1 else None
+        bookings = Booking.search_fetch(
+            Booking._get_keyset_domain(*cursor) if cursor else [],
+            [
+                "name",
+                "type_id",
+                "combination_id",
+                "meeting_id",
+                "partner_ids",
+                "state",
+                "start",
+            ],
+            offset=0 if cursor else pager["offset"],
+            limit=self._items_per_page,
+            order="start DESC, id DESC",
         )
+        # Batch-read and compute what the template renders for all rows
+        bookings.type_id.fetch(["name"])
+        bookings.combination_id.fetch(["name"])
+        bookings.mapped("display_name")
+        bookings.mapped("access_url")
+        if bookings:
+            last = bookings[-1]
+            cursors[str(page + 1)] = [
+                last.start and fields.Datetime.to_string(last.start),
+                last.id,
+            ]
+            request.session["my_bookings_cursors"] = cursors
         request.session["my_bookings_history"] = bookings.ids
         values.update({"bookings": bookings, "pager": pager, "page_name": "bookings"})
         return request.render("resource_booking.portal_my_bookings", values)
 
+    def _get_my_bookings_count(self, Booking):
+        """Count accessible bookings, reusing a recent count from the session.
+
+        The count only feeds the pager, so it can be a bit outdated.
+        """
+        count, counted_at = request.session.get("my_bookings_count") or (0, 0)
+        if time.time() - counted_at <= self._bookings_count_ttl:
+            metrics.CACHE_REQUESTS.inc(cache="my_bookings_count", result="hit")
+        else:
+            metrics.CACHE_REQUESTS.inc(cache="my_bookings_count", result="miss")
+            count = Booking.search_count([])
+            request.session["my_bookings_count"] = [count, time.time()]
+            # Page boundaries move when bookings appear or disappear
+            request.session["my_bookings_cursors"] = {}
+        return count
+
     @route(["/my/bookings/<int:booking_id>"], type="http", auth="public", website=True)
     def portal_booking_page(self, booking_id, access_token=None, **kwargs):
         """Portal booking form."""
@@ -107,6 +158,39 @@ class CustomerPortal(portal.CustomerPortal):
             "resource_booking.resource_booking_portal_schedule", values
         )
 
+    @route(
+        ["/my/bookings/<int:booking_id>/schedule/days"],
+        auth="public",
+        type="json",
+        website=True,
+    )
+    def portal_booking_schedule_days(
+        self, booking_id, access_token=None, days=(), **kwargs
+    ):
+        """Render again some days of the portal booking scheduling calendar."""
+        try:
+            booking_sudo = self._get_booking_sudo(booking_id, access_token)
+        except (AccessError, MissingError):
+            return {}
+        days = [date.fromisoformat(day) for day in days]
+        if not days:
+            return {}
+        values = booking_sudo._get_calendar_days_context(days)
+        values["access_token"] = access_token
+        IrQweb = request.env["ir.qweb"]
+        result = {}
+        for day in days:
+            values["day"] = day
+            result[day.isoformat()] = {
+                "cell": IrQweb._render(
+                    "resource_booking.scheduling_calendar_day", values
+                ),
+                "modals": IrQweb._render(
+                    "resource_booking.scheduling_calendar_day_modals", values
+                ),
+            }
+        return result
+
     @route(
         ["/my/bookings/<int:booking_id>/cancel"],
         auth="public",
@@ -134,10 +218,31 @@ class CustomerPortal(portal.CustomerPortal):
             with Form(booking_sudo) as booking_form:
                 booking_form.start = when_naive
         except ValidationError as error:
+            metrics.CONFIRM_CONFLICTS.inc()
             url = booking_sudo.get_portal_url(
                 suffix=f"/schedule/{when_tz_aware:%Y/%m}",
                 query_string=f"&error={error.args[0]}",
             )
             return request.redirect(url)
         booking_sudo.action_confirm()
+        booking_sudo._release_slot_holds()
         return request.redirect(booking_sudo.get_portal_url())
+
+    @route(
+        ["/my/bookings/<int:booking_id>/hold"],
+        auth="public",
+        type="json",
+        website=True,
+    )
+    def portal_booking_hold(self, booking_id, access_token, when, **kwargs):
+        """Hold a slot while the requester confirms it."""
+        try:
+            booking_sudo = self._get_booking_sudo(booking_id, access_token)
+        except (AccessError, MissingError):
+            return {"error": _("This booking is not accessible.")}
+        when_naive = datetime.utcfromtimestamp(isoparse(when).timestamp())
+        try:
+            hold = booking_sudo._hold_slot(when_naive)
+        except ValidationError as error:
+            return {"error": error.args[0]}
+        return {"expiration": fields.Datetime.to_string(hold.expiration)}
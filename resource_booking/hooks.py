@@ -11,3 +11,10 @@ def uninstall_hook(env, registry):
         booking_activiy_ids = env["mail.activity"].search([("booking_id", "!=", False)])
         booking_activiy_ids.unlink()
         activiy_resource_booking.unlink()
+    # Created by resource.calendar to track cached work intervals
+    env.cr.execute(
+        """
+            DROP TABLE IF EXISTS resource_booking_work_intervals_generation;
+            DROP SEQUENCE IF EXISTS resource_booking_work_intervals_generation_seq;
+        """
+    )
@@ -1,9 +1,21 @@
 from . import calendar_event
+from . import ir_actions_report
+from . import ir_http
 from . import res_partner
 from . import resource_booking
+from . import resource_booking_availability
 from . import resource_booking_combination
+from . import resource_booking_combination_load
+from . import resource_booking_hold
+from . import resource_booking_materialized_view
+from . import resource_booking_occupancy
+from . import resource_booking_report
+from . import resource_booking_series
 from . import resource_booking_type
 from . import resource_booking_type_combination_rel
+from . import resource_booking_utilization
 from . import resource_calendar
+from . import resource_calendar_attendance
+from . import resource_calendar_leaves
 from . import resource_resource
 from . import mail_activity
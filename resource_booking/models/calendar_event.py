@@ -36,34 +36,86 @@ class CalendarEvent(models.Model):
                 % "\n- ".join(frozen.mapped("display_name"))
             )
 
+    def _refresh_booking_availability(self):
+        """Refresh precomputed availability of user resources attending."""
+        events = self.sudo()
+        if not events:
+            return
+        resources = (
+            self.env["resource.resource"]
+            .sudo()
+            .search(
+                [
+                    ("resource_type", "=", "user"),
+                    ("user_id.partner_id", "in", events.partner_ids.ids),
+                ]
+            )
+        )
+        self.env["resource.booking.availability"]._mark_dirty(
+            resources,
+            min(events.mapped("start")).date(),
+            max(events.mapped("stop")).date(),
+        )
+
     def unlink(self):
         """Check you're allowed to unschedule it."""
         self._validate_booking_modifications()
+        self._refresh_booking_availability()
         return super().unlink()
 
     def write(self, vals):
         """Check you're allowed to reschedule it."""
+        busy_changes = {
+            "active",
+            "attendee_ids",
+            "partner_ids",
+            "show_as",
+            "start",
+            "stop",
+            "user_id",
+        }.intersection(vals)
+        if busy_changes:
+            self._refresh_booking_availability()
+        # Skip computing the footprint when slots cannot change
+        slot_changes = {
+            "active",
+            "attendee_ids",
+            "partner_ids",
+            "start",
+            "stop",
+        }.intersection(vals)
         before = [(one.start, one.stop) for one in self]
+        bookings = self.sudo().resource_booking_ids
+        footprint = bookings._get_slots_footprint() if slot_changes else set()
         result = super().write(vals)
         rescheduled = self
         for (old_start, old_stop), new in zip(before, self, strict=True):
             if old_start == new.start and old_stop == new.stop:
                 rescheduled -= new
         rescheduled._validate_booking_modifications()
+        if rescheduled:
+            bookings._notify_slots_changed(
+                footprint | bookings._get_slots_footprint()
+            )
+        if busy_changes:
+            self._refresh_booking_availability()
         return result
 
     @api.model_create_multi
     def create(self, vals_list):
         """Transfer resource booking to _attendees_values by context.
 
-        We need to serialize the creation in that case.
+        We need to serialize the creation in that case, but only for bookings
+        with hand-picked combinations, whose resources are autoconfirmed.
         mail_notify_author key from context is necessary to force the notification
         to be sent to author.
         """
-        vals_list2 = []
+        vals_list2, auto_assigned = [], []
         records = self.env["calendar.event"]
         for vals in vals_list:
-            if "resource_booking_ids" in vals:
+            if "resource_booking_ids" not in vals:
+                vals_list2.append(vals)
+            elif self._has_handpicked_bookings(vals["resource_booking_ids"]):
                 records += super(
                     CalendarEvent,
                     self.with_context(
@@ -72,10 +124,29 @@ class CalendarEvent(models.Model):
                     ),
                 ).create(vals)
             else:
-                vals_list2.append(vals)
+                auto_assigned.append(vals)
+        if auto_assigned:
+            records += super(
+                CalendarEvent, self.with_context(mail_notify_author=True)
+            ).create(auto_assigned)
         records += super().create(vals_list2)
+        records._refresh_booking_availability()
         return records
 
+    @api.model
+    def _has_handpicked_bookings(self, commands):
+        """Tell if booking commands involve hand-picked combinations."""
+        for cmd in commands:
+            if cmd[0] == 0 and not cmd[2].get("combination_auto_assign", True):
+                return True
+            if cmd[0] == 6 and not all(
+                self.env["resource.booking"]
+                .browse(cmd[2])
+                .mapped("combination_auto_assign")
+            ):
+                return True
+        return False
+
     def get_interval(self, interval, tz=None):
         """Autofix tz from related resource booking.
 
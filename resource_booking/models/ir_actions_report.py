@@ -0,0 +1,55 @@
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+import io
+
+from odoo import api, models, tools
+from odoo.tools.pdf import PdfFileReader, PdfFileWriter
+
+
+class IrActionsReport(models.Model):
+    _inherit = "ir.actions.report"
+
+    @api.model
+    def _get_resource_booking_chunk_size(self):
+        """How many bookings are rendered in each wkhtmltopdf call."""
+        return int(
+            self.env["ir.config_parameter"]
+            .sudo()
+            .get_param("resource_booking.report_chunk_size", 50)
+        )
+
+    def _render_qweb_pdf(self, report_ref, res_ids=None, data=None):
+        """Render many bookings in chunks, merging PDFs as they come.
+
+        Rendering hundreds of bookings at once takes too long and too much
+        memory. Each chunk is rendered and appended to the output, and then
+        records loaded for it are dropped from cache.
+        """
+        report = self._get_report(report_ref)
+        if isinstance(res_ids, int):
+            res_ids = [res_ids]
+        chunk_size = self._get_resource_booking_chunk_size()
+        # Test mode renders HTML instead of PDF
+        test_mode = (
+            tools.config["test_enable"] or tools.config["test_file"]
+        ) and not self.env.context.get("force_report_rendering")
+        if (
+            report.report_name != "resource_booking.report_resource_booking"
+            or test_mode
+            or chunk_size <= 0
+            or not res_ids
+            or len(res_ids) <= chunk_size
+        ):
+            return super()._render_qweb_pdf(report_ref, res_ids, data)
+        writer = PdfFileWriter()
+        for start in range(0, len(res_ids), chunk_size):
+            content, _content_type = super()._render_qweb_pdf(
+                report_ref, res_ids[start : start + chunk_size], data
+            )
+            reader = PdfFileReader(io.BytesIO(content), strict=False)
+            for page in range(reader.getNumPages()):
+                writer.addPage(reader.getPage(page))
+            self.env.invalidate_all()
+        with io.BytesIO() as buffer:
+            writer.write(buffer)
+            return buffer.getvalue(), "pdf"
@@ -0,0 +1,26 @@
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+from odoo import models
+from odoo.http import request
+
+from ..tools import instrumentation
+
+
+class IrHttp(models.AbstractModel):
+    _inherit = "ir.http"
+
+    @classmethod
+    def _pre_dispatch(cls, rule, args):
+        super()._pre_dispatch(rule, args)
+        # Discard leftovers from requests that failed before finishing
+        instrumentation.stop()
+        if instrumentation.is_enabled(request.env):
+            instrumentation.start(request.env.cr)
+
+    @classmethod
+    def _post_dispatch(cls, response):
+        super()._post_dispatch(response)
+        stats = instrumentation.stop()
+        if stats and stats.entries:
+            instrumentation.log(stats, request.httprequest.path)
+            response.headers["Server-Timing"] = instrumentation.server_timing(stats)
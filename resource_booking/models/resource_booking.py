@@ -4,46 +4,64 @@
 # License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
 
 import calendar
+import logging
+import time
+from collections import defaultdict
 from datetime import datetime, timedelta
 
 from dateutil.relativedelta import relativedelta
+from pytz import UTC, timezone
 
 from odoo import _, api, fields, models
 from odoo.exceptions import ValidationError
+from odoo.osv import expression
 
 from odoo.addons.resource.models.utils import Intervals
 
+from ..tools import metrics
+from ..tools.assignment import Request, best_fit
+from ..tools.availability import AvailabilityEngine
+from ..tools.instrumentation import instrumented
 
+_logger = logging.getLogger(__name__)
+
+
+class _DryRun(Exception):
+    """Roll back a change that was only applied to see its effects."""
+
+
+@instrumented("_merge_intervals")
 def _merge_intervals(intervals):
-    # Merge intervals where start of current interval == stop of previous interval,
-    # assuming that the intervals are ordererd.
-    intervals = [list(tup) for tup in intervals._items]
-    # Handle 23:59:59:99999
-    for i in range(len(intervals)):
-        stop = intervals[i][1]
-        if (
-            stop.hour == 23
-            and stop.minute == 59
-            and stop.second == 59
-            and stop.microsecond == 999999
-        ):
-            intervals[i][1] += timedelta(microseconds=1)
-    # Begin with the last interval, to safely delete it if needed.
-    for i in range(len(intervals) - 1, 0, -1):
-        current_start = intervals[i][0]
-        current_stop = intervals[i][1]
-        previous_stop = intervals[i - 1][1]
-        if current_start == previous_stop:
-            intervals[i - 1][1] = current_stop
-            del intervals[i]
-    return Intervals([tuple(interval) for interval in intervals])
+    """Normalize work intervals for booking purposes.
+
+    Work intervals end each day at 23:59:59.999999. Those stops are moved to
+    the next midnight, so that `Intervals` merges them with the next day and
+    multi-day stretches become a single interval.
+    """
+    return Intervals(
+        [
+            (
+                start,
+                stop + timedelta(microseconds=1)
+                if (stop.hour, stop.minute, stop.second, stop.microsecond)
+                == (23, 59, 59, 999999)
+                else stop,
+                records,
+            )
+            for start, stop, records in intervals
+        ]
+    )
 
 
 def _availability_is_fitting(available_intervals, start_dt, stop_dt):
-    available_intervals = _merge_intervals(available_intervals)
+    """Tell if the stretch between both datetimes is fully available.
+
+    :param Intervals available_intervals: Normalized with `_merge_intervals`.
+    """
     for item in available_intervals._items:
-        available_start, available_stop = item[0], item[1]
-        if start_dt >= available_start and stop_dt <= available_stop:
+        if item[0] > start_dt:
+            break
+        if stop_dt <= item[1]:
             return True
     return False
 
@@ -107,6 +125,12 @@ def _availability_is_fitting_legacy(available_intervals, start_dt, end_dt):
     return False
 
 
+# Fields that alter which slots are busy for other bookings
+_SCHEDULING_FIELDS = frozenset(
+    {"active", "combination_id", "duration", "meeting_id", "start", "type_id"}
+)
+
+
 class ResourceBooking(models.Model):
     _name = "resource.booking"
     _inherit = ["mail.thread", "mail.activity.mixin", "portal.mixin"]
@@ -267,6 +291,15 @@ class ResourceBooking(models.Model):
     booking_activity_ids = fields.One2many(
         "mail.activity", "booking_id", string="Booking Activities"
     )
+    series_id = fields.Many2one(
+        comodel_name="resource.booking.series",
+        string="Series",
+        copy=False,
+        index=True,
+        ondelete="set null",
+        readonly=True,
+        help="Recurring series that generated this booking.",
+    )
 
     def _get_kanban_view(self):
         # Este es un ejemplo si necesitas lógica adicional para la vista Kanban
@@ -303,6 +336,32 @@ class ResourceBooking(models.Model):
         """
         return [("partner_ids", operator, value)]
 
+    @api.model
+    def _get_keyset_domain(self, start, booking_id):
+        """Domain of bookings listed after the given one.
+
+        Follows the ``start DESC, id DESC`` order, where PostgreSQL puts
+        unscheduled bookings first.
+
+        :param str start: Start of the last listed booking, or ``False``.
+        :param int booking_id: ID of the last listed booking.
+        """
+        if not start:
+            return [
+                "|",
+                "&",
+                ("start", "=", False),
+                ("id", "<", booking_id),
+                ("start", "!=", False),
+            ]
+        return [
+            "|",
+            ("start", "<", start),
+            "&",
+            ("start", "=", start),
+            ("id", "<", booking_id),
+        ]
+
     @api.model
     def _default_user_id(self):
         return self.env.user
@@ -323,8 +382,60 @@ class ResourceBooking(models.Model):
     def _compute_combination_id(self):
         """Select best combination candidate when changing booking dates."""
         # Useless without the interval
-        for one in self.filtered(lambda x: x.start and x.combination_auto_assign):
-            one.combination_id = one._get_best_combination()
+        to_assign = self.filtered(lambda x: x.start and x.combination_auto_assign)
+        # Portal users get the combination they held instead
+        best_fits = {}
+        if not self.env.context.get("using_portal"):
+            best_fits = to_assign.filtered(
+                lambda x: x.stop and x.type_id.combination_assignment == "best_fit"
+            )._get_best_fit_combinations()
+        for one in to_assign:
+            one.combination_id = best_fits.get(one) or one._get_best_combination()
+
+    def _get_best_fit_combinations(self):
+        """Assign combinations to these bookings together, as a best fit.
+
+        :return: Dict with ``{booking: combination}`` for those that fit.
+        """
+        if not self:
+            return {}
+        snapshot = self.type_id.sudo()._get_availability_snapshot(
+            UTC.localize(min(self.mapped("start")) - timedelta(days=1)),
+            UTC.localize(max(self.mapped("stop")) + timedelta(days=2)),
+        )
+        by_key, requests = {}, []
+        for one in self:
+            # New records have no busy ranges yet
+            key = one._origin.id or one.id
+            by_key[key] = one
+            tz = timezone(one.type_id.resource_calendar_id.tz)
+            requests.append(
+                Request(
+                    key,
+                    one.type_id.id,
+                    UTC.localize(one.start).astimezone(tz),
+                    UTC.localize(one.stop).astimezone(tz),
+                    one.type_id._get_combinations_priorized().ids,
+                )
+            )
+        assignment = best_fit(
+            AvailabilityEngine(snapshot), requests, self._get_assignment_budget()
+        )
+        Combination = self.env["resource.booking.combination"]
+        return {
+            by_key[key]: Combination.browse(combination_id)
+            for key, combination_id in assignment.items()
+            if combination_id
+        }
+
+    @api.model
+    def _get_assignment_budget(self):
+        """Seconds to optimize best fit assignments."""
+        return float(
+            self.env["ir.config_parameter"]
+            .sudo()
+            .get_param("resource_booking.assignment_time_budget", 0.5)
+        )
 
     @api.depends("start")
     def _compute_is_overdue(self):
@@ -511,18 +622,27 @@ class ResourceBooking(models.Model):
             _self.env["calendar.event"].create(to_create)
 
     @api.constrains("combination_id", "meeting_id", "type_id")
+    @instrumented("resource.booking._check_scheduling")
     def _check_scheduling(self):
-        """Scheduled bookings must have no conflicts."""
+        """Scheduled bookings must have no conflicts.
+
+        With ``defer_scheduling_check`` in context, nothing is checked. Use it
+        to check many bookings at once after scheduling them.
+        """
+        if self.env.context.get("defer_scheduling_check"):
+            return
         # Nothing to do if no bookings are scheduled
         has_meeting = self.filtered("meeting_id")
         if not has_meeting:
             return
+        metrics.CHECK_SCHEDULING.inc()
         # Ensure all scheduled bookings have booked some resources
         has_rbc = self.with_context(active_test=False).filtered(
             "combination_id.resource_ids"
         )
         missing_rbc = has_meeting - has_rbc
         if missing_rbc:
+            metrics.CHECK_SCHEDULING_FAILURES.inc()
             raise ValidationError(
                 _(
                     "Cannot schedule these bookings because no resources "
@@ -531,21 +651,10 @@ class ResourceBooking(models.Model):
                 % ("\n- ".join(missing_rbc.mapped("display_name")))
             )
         # Ensure all bookings fit in their type and resources calendars
-        unfitting_bookings = has_meeting
-        now = fields.Datetime.now()
-        for booking in has_meeting:
-            # Ignore if the event already happened
-            already_happened = booking.stop and booking.stop < now
-            if already_happened:
-                unfitting_bookings -= booking
-                continue
-            start_dt = fields.Datetime.context_timestamp(self, booking["start"])
-            end_dt = fields.Datetime.context_timestamp(self, booking["stop"])
-            available_intervals = booking._get_intervals(start_dt, end_dt)
-            if _availability_is_fitting(available_intervals, start_dt, end_dt):
-                unfitting_bookings -= booking
+        unfitting_bookings = has_meeting._get_unfitting_bookings()
         # Explain which bookings failed validation
         if unfitting_bookings:
+            metrics.CHECK_SCHEDULING_FAILURES.inc()
             raise ValidationError(
                 _(
                     "Cannot schedule these bookings because they do not fit "
@@ -555,6 +664,172 @@ class ResourceBooking(models.Model):
                 % "\n- ".join(unfitting_bookings.mapped("display_name"))
             )
 
+    def _get_unfitting_bookings(self):
+        """Get scheduled bookings that do not fit in their calendars anymore.
+
+        Bookings that already happened are ignored.
+        """
+        unfitting_bookings = self.browse()
+        now = fields.Datetime.now()
+        for booking in self.filtered("meeting_id"):
+            # Ignore if the event already happened
+            if booking.stop and booking.stop < now:
+                continue
+            start_dt = fields.Datetime.context_timestamp(self, booking["start"])
+            end_dt = fields.Datetime.context_timestamp(self, booking["stop"])
+            available_intervals = booking._get_intervals(start_dt, end_dt)
+            if not _availability_is_fitting(available_intervals, start_dt, end_dt):
+                unfitting_bookings |= booking
+        return unfitting_bookings
+
+    @api.model
+    def _get_impact(self, domain, records, method, *args):
+        """Dry-run a change, and tell which future bookings it would break.
+
+        Only scheduled future bookings within ``domain`` are checked, so use
+        it to narrow them by resources and dates. The change is rolled back.
+
+        :param records: Records to change, calling ``method`` with ``args``.
+        :return: List of dicts with ``id`` and ``display_name`` of bookings
+            that would not fit anymore, and ``combination_id`` where they
+            would, or ``False``.
+        """
+        candidates = self.search(
+            expression.AND([self._get_future_bookings_domain(), domain])
+        )
+        result = []
+        try:
+            with self.env.cr.savepoint():
+                getattr(records.with_context(defer_scheduling_check=True), method)(
+                    *args
+                )
+                unfitting = candidates._get_unfitting_bookings()
+                alternatives = unfitting._get_alternative_combinations()
+                result = [
+                    {
+                        "id": booking.id,
+                        "display_name": booking.display_name,
+                        "combination_id": alternatives[booking].id,
+                    }
+                    for booking in unfitting
+                ]
+                raise _DryRun()
+        except _DryRun:
+            pass
+        return result
+
+    def _get_alternative_combinations(self):
+        """Find other combinations where these bookings fit, all at once.
+
+        Bookings are placed by start date, and each one that gets a new
+        combination occupies it for the next ones. Those that cannot keep
+        their hand-picked combination get no alternative.
+
+        :return: Dict with ``{booking: combination}``; the combination is
+            empty if the booking fits nowhere.
+        """
+        bookings = self.filtered("start").sorted("start")
+        if not bookings:
+            return {}
+        snapshot = bookings.type_id.sudo()._get_availability_snapshot(
+            UTC.localize(bookings[0].start - timedelta(days=1)),
+            UTC.localize(max(bookings.mapped("stop")) + timedelta(days=1)),
+        )
+        # These bookings are all being moved
+        for items in snapshot.busy.values():
+            items[:] = [item for item in items if item.booking_id not in bookings.ids]
+        engine = AvailabilityEngine(snapshot)
+        Combination = self.env["resource.booking.combination"]
+        result = {}
+        for booking in bookings:
+            combination_ids = booking.combination_id.ids
+            if booking.combination_auto_assign:
+                combination_ids += (
+                    booking.type_id._get_combinations_priorized()
+                    - booking.combination_id
+                ).ids
+            start_dt = UTC.localize(booking.start)
+            end_dt = UTC.localize(booking.stop)
+            combination_id = engine.best_combination(
+                booking.type_id.id,
+                start_dt,
+                end_dt,
+                [cid for cid in combination_ids if cid in snapshot.combinations],
+            )
+            if combination_id:
+                engine.reserve(combination_id, start_dt, end_dt, booking.id)
+            result[booking] = Combination.browse(combination_id)
+        return result
+
+    def _reassign_combinations(self):
+        """Move these bookings to alternative combinations, in batch.
+
+        Bookings are written once per target combination, and scheduling is
+        checked once for all of them.
+
+        :return: Bookings that fit in no combination, left untouched.
+        """
+        targets = defaultdict(lambda: self.browse())
+        unmovable = self.browse()
+        for booking, combination in self._get_alternative_combinations().items():
+            if not combination:
+                unmovable |= booking
+            elif combination != booking.combination_id:
+                targets[combination] |= booking
+        moved = self.browse()
+        for combination, bookings in targets.items():
+            bookings.with_context(defer_scheduling_check=True).write(
+                {"combination_id": combination.id}
+            )
+            moved |= bookings
+        moved._check_scheduling()
+        return unmovable
+
+    def action_reassign_combinations(self):
+        """Move bookings that do not fit anymore to other combinations."""
+        unmovable = self._reassign_unfitting()
+        if not unmovable:
+            return
+        return {
+            "type": "ir.actions.client",
+            "tag": "display_notification",
+            "params": {
+                "type": "warning",
+                "message": _(
+                    "These bookings do not fit in any of their combinations: %s"
+                )
+                % ", ".join(unmovable.mapped("display_name")),
+                "next": {"type": "ir.actions.act_window_close"},
+            },
+        }
+
+    @api.model
+    def _get_future_bookings_domain(self):
+        """Domain of bookings whose scheduling can still break."""
+        return [("meeting_id", "!=", False), ("stop", ">=", fields.Datetime.now())]
+
+    def _reassign_unfitting(self):
+        """Move those of these bookings that do not fit to other combinations.
+
+        Bookings that fit in no combination are left untouched, and their
+        organizers get an activity to reschedule them.
+
+        :return: Bookings that fit in no combination.
+        """
+        unmovable = self._get_unfitting_bookings()._reassign_combinations()
+        if unmovable:
+            _logger.warning(
+                "Bookings %s do not fit in any of their combinations", unmovable.ids
+            )
+        for booking in unmovable:
+            booking.activity_schedule(
+                "mail.mail_activity_data_todo",
+                summary=_("Reschedule this booking"),
+                note=_("It does not fit in any of its combinations anymore."),
+                user_id=booking.user_id.id or self.env.uid,
+            )
+        return unmovable
+
     def _get_calendar_context(self, year=None, month=None, now=None):
         """Get the required context for the calendar view in the portal.
 
@@ -591,6 +866,136 @@ class ResourceBooking(models.Model):
             "weekday_names": weekday_names,
         }
 
+    def _get_calendar_days_context(self, days):
+        """Get the required context to render again some days of the portal
+        calendar.
+
+        See the `resource_booking.scheduling_calendar_day` and
+        `resource_booking.scheduling_calendar_day_modals` views.
+
+        :param list days: Dates to render, all in the same month.
+        """
+        now = fields.Datetime.context_timestamp(self, fields.Datetime.now())
+        first_day = min(days)
+        start = now.replace(
+            year=first_day.year,
+            month=first_day.month,
+            day=first_day.day,
+            hour=0,
+            minute=0,
+            second=0,
+            microsecond=0,
+        )
+        end = start + timedelta(days=(max(days) - first_day).days + 1)
+        lang = self.env["res.lang"]._lang_get(self.env.lang or self.env.user.lang)
+        booking_duration = timedelta(hours=self.duration)
+        return {
+            "booking": self,
+            "confirm_url": self.get_portal_url(suffix="/confirm"),
+            "date_format": lang.date_format,
+            "now": now,
+            "res_lang": lang,
+            "slots": self._get_available_slots(start, end + booking_duration),
+            "start": start.replace(day=1),
+            "time_format": lang.time_format.replace(":%S", ""),
+        }
+
+    def _get_slots_bus_channels(self):
+        """Bus channels that announce slot changes for this booking."""
+        combinations = self.combination_id or self.mapped(
+            "type_id.combination_rel_ids.combination_id"
+        )
+        return [
+            "resource_booking.slots.%d" % combination.id
+            for combination in combinations
+        ]
+
+    def _get_slots_footprint(self):
+        """Get the (type, combination, day) cells occupied by these bookings.
+
+        Days are expressed in the timezone of each booking type, and widened
+        by one day on each side. Resources of a combination may be shared
+        with types in other timezones, where the same moments can fall on
+        the previous or the next day.
+        """
+        footprint = set()
+        for booking in self:
+            if not (booking.active and booking.combination_id and booking.stop):
+                continue
+            tz = timezone(booking.type_id.resource_calendar_id.tz or "UTC")
+            day, last_day = (
+                UTC.localize(dt).astimezone(tz).date()
+                for dt in (booking.start, booking.stop - timedelta(microseconds=1))
+            )
+            day -= timedelta(days=1)
+            last_day += timedelta(days=1)
+            while day <= last_day:
+                footprint.add((booking.type_id.id, booking.combination_id.id, day))
+                day += timedelta(days=1)
+        return footprint
+
+    @api.model
+    def _notify_slots_changed(self, footprint):
+        """Tell open portal calendars which days they should refresh.
+
+        Changes are gathered and sent once, right before committing.
+        """
+        if not footprint:
+            return
+        pending = self.env.cr.precommit.data.setdefault(
+            "resource_booking.slots_changed", set()
+        )
+        if not pending:
+            self.env.cr.precommit.add(self._send_slots_changed)
+        pending |= footprint
+
+    @api.model
+    def _send_slots_changed(self):
+        """Send the gathered slot changes through the bus.
+
+        They reach the channels of all combinations that share resources
+        with the changed ones. Precomputed availability and load counters
+        of those days are refreshed too.
+        """
+        footprint = self.env.cr.precommit.data.pop(
+            "resource_booking.slots_changed", set()
+        )
+        days = defaultdict(set)
+        for type_id, combination_id, day in footprint:
+            days[type_id, combination_id].add(day)
+        if not days:
+            return
+        self.env["resource.booking.combination.load"]._update(
+            {(combination_id, day) for _type_id, combination_id, day in footprint}
+        )
+        Combination = self.env["resource.booking.combination"].sudo()
+        for (_type_id, combination_id), changed_days in days.items():
+            self.env["resource.booking.availability"]._mark_dirty(
+                Combination.browse(combination_id).resource_ids,
+                min(changed_days),
+                max(changed_days),
+            )
+        # Pages of any combination that shares resources show those slots too
+        booked = Combination.browse({combination_id for _type, combination_id in days})
+        sharing = Combination.search([("resource_ids", "in", booked.resource_ids.ids)])
+        self.env["bus.bus"]._sendmany(
+            [
+                (
+                    "resource_booking.slots.%d" % channel_combination.id,
+                    "resource_booking/slots_changed",
+                    {
+                        "type_id": type_id,
+                        "combination_id": combination_id,
+                        "days": [day.isoformat() for day in sorted(changed_days)],
+                    },
+                )
+                for (type_id, combination_id), changed_days in days.items()
+                for channel_combination in sharing
+                if channel_combination.resource_ids
+                & Combination.browse(combination_id).resource_ids
+            ]
+        )
+
     @api.model
     def _get_name_formatted(self, partner, type_, meeting=None):
         """Produce a beautifully formatted name."""
@@ -609,12 +1014,27 @@ class ResourceBooking(models.Model):
         sorted_combinations = self.combination_id + (
             self.type_id._get_combinations_priorized() - self.combination_id
         )
+        # Portal users get the combination they held for this slot, if any
+        if self.env.context.get("using_portal"):
+            held = self._get_slot_hold(self.start).combination_id
+            sorted_combinations = held + (sorted_combinations - held)
         start_dt = fields.Datetime.context_timestamp(self, self.start)
         end_dt = fields.Datetime.context_timestamp(self, self.stop)
+        # Precomputed bitmaps answer for most combinations without computing
+        precomputed = self.env[
+            "resource.booking.availability"
+        ]._get_fitting_combinations(self, sorted_combinations, start_dt, end_dt)
         # Get 1st combination available in the desired interval
         for combination in sorted_combinations:
-            available_intervals = self._get_intervals(start_dt, end_dt, combination)
-            if _availability_is_fitting(available_intervals, start_dt, end_dt):
+            fitting = precomputed.get(combination)
+            if fitting is None:
+                available_intervals = self._get_intervals(
+                    start_dt, end_dt, combination
+                )
+                fitting = _availability_is_fitting(
+                    available_intervals, start_dt, end_dt
+                )
+            if fitting:
                 return combination
         # Tell portal user there's no combination available
         if self.env.context.get("using_portal"):
@@ -626,8 +1046,98 @@ class ResourceBooking(models.Model):
                 )
             )
 
+    def _get_slot_hold(self, start):
+        """Get the current hold of this booking for a slot, if any."""
+        return (
+            self.env["resource.booking.hold"]
+            .sudo()
+            .search(
+                [
+                    ("booking_id", "=", self._origin.id),
+                    ("start", "=", start),
+                    ("expiration", ">", fields.Datetime.now()),
+                ],
+                limit=1,
+            )
+        )
+
+    def _hold_slot(self, start):
+        """Keep a slot busy for others while the requester confirms it.
+
+        :param datetime start: Naive UTC datetime where the slot starts.
+        :return: The new hold.
+        """
+        self.ensure_one()
+        self._release_slot_holds()
+        # Serialize holds on the same resources, whatever combination holds
+        # them, before checking availability. The row versions this writes
+        # make a concurrent hold fail to serialize, so the loser is retried
+        # and then sees the winner's hold.
+        if self.combination_auto_assign:
+            candidates = self.type_id.combination_rel_ids.combination_id
+        else:
+            candidates = self.combination_id
+        self.env.cr.execute(
+            """
+                UPDATE resource_resource SET write_date = write_date
+                WHERE id IN (
+                    SELECT id FROM resource_resource
+                    WHERE id = ANY(%s)
+                    ORDER BY id
+                    FOR NO KEY UPDATE
+                )
+            """,
+            (candidates.resource_ids.ids,),
+        )
+        candidate = self.new({"start": start}, origin=self)
+        if self.combination_auto_assign:
+            combination = candidate._get_best_combination()
+        else:
+            combination = self.combination_id
+            start_dt = fields.Datetime.context_timestamp(self, candidate.start)
+            end_dt = fields.Datetime.context_timestamp(self, candidate.stop)
+            if not _availability_is_fitting(
+                candidate._get_intervals(start_dt, end_dt, combination),
+                start_dt,
+                end_dt,
+            ):
+                combination = None
+        if not combination:
+            raise ValidationError(_("This slot is not available anymore."))
+        Hold = self.env["resource.booking.hold"].sudo()
+        return Hold.create(
+            {
+                "booking_id": self.id,
+                "combination_id": combination.id,
+                "start": candidate.start,
+                "stop": candidate.stop,
+                "expiration": fields.Datetime.now() + Hold._get_hold_duration(),
+            }
+        )
+
+    def _release_slot_holds(self):
+        """Free slots held by these bookings."""
+        self.env["resource.booking.hold"].sudo().search(
+            [("booking_id", "in", self.ids)]
+        ).unlink()
+
+    @instrumented("resource.booking._get_available_slots")
     def _get_available_slots(self, start_dt, end_dt):
         """Return available slots for scheduling current booking."""
+        started = time.perf_counter()
+        # Pending bookings of default duration can use precomputed slots
+        if (
+            not self.combination_id
+            and not self.meeting_id
+            and self.duration == self.type_id.duration
+        ):
+            result = self.env["resource.booking.availability"]._get_slots(
+                self, start_dt, end_dt
+            )
+            if result is not None:
+                metrics.CACHE_REQUESTS.inc(cache="availability", result="hit")
+                return result
+            metrics.CACHE_REQUESTS.inc(cache="availability", result="miss")
         result = {}
         slot_duration = timedelta(hours=self.type_id.slot_duration)
         booking_duration = timedelta(hours=self.duration)
@@ -639,7 +1149,6 @@ class ResourceBooking(models.Model):
         # to compute each slot based on the beginning of the work day.
         workday_min = start_dt.replace(hour=0, minute=0, second=0, microsecond=0)
         available_intervals = self._get_intervals(workday_min, end_dt)
-        available_intervals = _merge_intervals(available_intervals)
         # Loop through available times and append tested start/stop to the result.
         test_start = False
         for item in available_intervals._items:
@@ -656,12 +1165,41 @@ class ResourceBooking(models.Model):
                         result.setdefault(test_start.date(), [])
                     result[test_start.date()].append(test_start)
                 test_start += slot_duration
+        metrics.SLOT_GENERATION_SECONDS.observe(time.perf_counter() - started)
         return result
 
+    def get_calendar_availability(self, start, end):
+        """Get free intervals where these bookings can be scheduled.
+
+        Used by the calendar view to shade unavailable time.
+
+        :param str start: UTC datetime where the displayed range starts.
+        :param str end: UTC datetime where the displayed range ends.
+        :return: List of ``[start, stop]`` UTC datetime strings.
+        """
+        start_dt, end_dt = (
+            UTC.localize(fields.Datetime.to_datetime(dt)) for dt in (start, end)
+        )
+        available_intervals = Intervals([])
+        for booking in self:
+            available_intervals |= booking._get_intervals(start_dt, end_dt)
+        return [
+            [
+                fields.Datetime.to_string(item[0].astimezone(UTC)),
+                fields.Datetime.to_string(item[1].astimezone(UTC)),
+            ]
+            for item in available_intervals._items
+        ]
+
+    @instrumented("resource.booking._get_intervals")
     def _get_intervals(self, start_dt, end_dt, combination=None):
         """Get available intervals for this booking,
         based on the calendar of the booking type
-        and the calendar(s) of the relevant resource combination(s)."""
+        and the calendar(s) of the relevant resource combination(s).
+
+        They are normalized, so each uninterrupted stretch is one interval,
+        even if it spans several days."""
+        metrics.AVAILABILITY_COMPUTATIONS.inc()
         # Get all intervals except those from current booking
         try:
             booking_id = self.id or self._origin.id or -1
@@ -686,7 +1224,7 @@ class ResourceBooking(models.Model):
             or booking.mapped("type_id.combination_rel_ids.combination_id")
         ).with_context(analyzing_booking=booking_id)
         result &= combinations._get_intervals(start_dt, end_dt)
-        return result
+        return _merge_intervals(result)
 
     def _sync_booking_activities_date(self):
         for rec in self.filtered("booking_activity_ids"):
@@ -701,21 +1239,29 @@ class ResourceBooking(models.Model):
         result = super().create(vals_list)
         result._sync_meeting()
         result._sync_booking_activities_date()
+        result._notify_slots_changed(result._get_slots_footprint())
         return result
 
     def write(self, vals):
         """Sync booking with meeting if needed."""
+        reschedules = _SCHEDULING_FIELDS.intersection(vals)
+        footprint = self._get_slots_footprint() if reschedules else set()
         result = super().write(vals)
         self._sync_meeting()
         if vals.get("start") or "meeting_id" in vals:
             self._sync_booking_activities_date()
+        if reschedules:
+            self._notify_slots_changed(footprint | self._get_slots_footprint())
         return result
 
     def unlink(self):
         """Unlink meeting if needed."""
+        footprint = self._get_slots_footprint()
         self.meeting_id.unlink()
         self.booking_activity_ids.unlink()
-        return super().unlink()
+        result = super().unlink()
+        self._notify_slots_changed(footprint)
+        return result
 
     def _message_auto_subscribe_followers(self, updated_values, default_subtype_ids):
         """Auto-subscribe and notify resource partners."""
@@ -756,7 +1302,6 @@ class ResourceBooking(models.Model):
 
     def action_schedule(self):
         """Redirect user to a simpler way to schedule this booking."""
-        DurationParser = self.env["ir.qweb.field.duration"]
         return {
             "context": dict(
                 self.env.context,
@@ -764,13 +1309,10 @@ class ResourceBooking(models.Model):
                 default_res_model_id=False,
                 default_res_id=False,
                 # Context used by web_calendar_slot_duration module
-                calendar_slot_duration=DurationParser.value_to_html(
-                    self.duration,
-                    {
-                        "unit": "hour",
-                        "digital": True,
-                    },
-                ),
+                calendar_slot_duration=self.duration * 60,
+                # Shade unavailable time in the calendar view
+                calendar_availability_model=self._name,
+                calendar_availability_ids=self.ids,
                 default_resource_booking_ids=[(6, 0, self.ids)],
                 default_name=self.name or "",
             ),
@@ -781,6 +1323,200 @@ class ResourceBooking(models.Model):
             "view_mode": "calendar,tree,form",
         }
 
+    def action_auto_schedule(self):
+        """Schedule pending bookings at their earliest available slots.
+
+        Priority bookings are placed first, then the oldest ones. All of them
+        share one availability snapshot, where each placed booking occupies
+        its resources for the next ones. Bookings without any available slot
+        within the precomputed availability horizon are left pending.
+        """
+        started = time.perf_counter()
+        pending = self.filtered(lambda one: one.active and one.state == "pending")
+        pending = pending.sorted(lambda one: (not one.prioritari, one.id))
+        now = fields.Datetime.now()
+        days = self.env["resource.booking.availability"]._get_horizon_days()
+        snapshot = pending.type_id.sudo()._get_availability_snapshot(
+            UTC.localize(now - timedelta(days=1)),
+            UTC.localize(now + timedelta(days=days + 1)),
+        )
+        engine = AvailabilityEngine(snapshot)
+        combinations = {
+            type_: type_._get_combinations_priorized().ids
+            for type_ in pending.type_id
+        }
+        # Balanced types spread this batch too
+        loads = {
+            combination.id: combination.load_hours
+            for combination in pending.type_id.combination_rel_ids.combination_id
+        }
+        placed = {}
+        for booking in pending:
+            if booking.combination_auto_assign:
+                combination_ids = combinations[booking.type_id]
+                if booking.type_id.combination_assignment == "balanced":
+                    combination_ids = sorted(combination_ids, key=loads.get)
+            elif booking.combination_id.id in snapshot.combinations:
+                combination_ids = booking.combination_id.ids
+            else:
+                continue
+            tz = timezone(booking.type_id.resource_calendar_id.tz)
+            start_dt = UTC.localize(now).astimezone(tz)
+            found = engine.earliest_slot(
+                booking.type_id.id,
+                start_dt,
+                start_dt + timedelta(days=days),
+                now,
+                booking.duration,
+                combination_ids,
+            )
+            if not found:
+                continue
+            slot, combination_id = found
+            stop = slot + timedelta(hours=booking.duration)
+            if (
+                booking.combination_auto_assign
+                and booking.type_id.combination_assignment == "best_fit"
+            ):
+                request = Request(
+                    booking.id, booking.type_id.id, slot, stop, combination_ids
+                )
+                combination_id = best_fit(engine, [request], 0)[booking.id]
+            else:
+                engine.reserve(combination_id, slot, stop)
+            loads[combination_id] = loads.get(combination_id, 0) + booking.duration
+            start = slot.astimezone(UTC).replace(tzinfo=None)
+            placed[booking] = (start, combination_id)
+        # Write dates without meetings, then create all meetings at once
+        scheduled = self.browse([booking.id for booking in placed])
+        for booking, (start, combination_id) in placed.items():
+            booking.with_context(syncing_booking_ids=scheduled.ids).write(
+                {"start": start, "combination_id": combination_id}
+            )
+        scheduled.with_context(defer_scheduling_check=True)._sync_meeting()
+        scheduled._check_scheduling()
+        _logger.info(
+            "Auto-scheduled %d of %d pending bookings in %.2fs",
+            len(scheduled),
+            len(pending),
+            time.perf_counter() - started,
+        )
+        return {
+            "type": "ir.actions.client",
+            "tag": "display_notification",
+            "params": {
+                "type": "success" if scheduled == pending else "warning",
+                "message": _(
+                    "%(scheduled)d of %(pending)d pending bookings were "
+                    "scheduled. The rest have no available slots."
+                )
+                % {"scheduled": len(scheduled), "pending": len(pending)},
+                "next": {"type": "ir.actions.act_window_close"},
+            },
+        }
+
+    def reschedule_bulk(self, starts=None, offset=None):
+        """Move many scheduled bookings at once, or none of them.
+
+        Feasibility is evaluated against one availability snapshot, where
+        moved bookings leave their old slots free for each other. If all of
+        them fit, they are written without checking each one, their meetings
+        are synced afterwards and scheduling is checked once.
+
+        :param starts: ``(booking, start)`` pairs, where bookings are records
+            or ids, and starts are naive UTC datetimes or their strings.
+        :param float offset: Hours to move all bookings in ``self`` instead.
+        :return: Dict with ``rescheduled`` and ``failures`` lists. If there is
+            any failure, nothing is written and ``rescheduled`` is empty.
+        """
+        if starts is None:
+            offset = timedelta(hours=offset or 0)
+            starts = [(one, one.start and one.start + offset) for one in self]
+        new_starts = {}
+        for booking, start in starts:
+            booking = self.browse(getattr(booking, "id", booking))
+            new_starts[booking] = fields.Datetime.to_datetime(start)
+        bookings = self.browse([booking.id for booking in new_starts])
+        failures = []
+        is_manager = self.env.user.has_group("resource_booking.group_manager")
+        now = fields.Datetime.now()
+        for booking, start in new_starts.items():
+            reason = None
+            if not (booking.active and booking.meeting_id and start):
+                reason = _("It is not scheduled.")
+            elif not booking.is_modifiable or not (
+                is_manager
+                or start - timedelta(hours=booking.type_id.modifications_deadline)
+                >= now
+            ):
+                reason = _("It exceeds its modifications deadline.")
+            if reason:
+                failures.append({"id": booking.id, "reason": reason})
+        if failures:
+            return {"rescheduled": [], "failures": failures}
+        snapshot = bookings.type_id.sudo()._get_availability_snapshot(
+            UTC.localize(min(new_starts.values()) - timedelta(days=1)),
+            UTC.localize(max(new_starts.values()) + timedelta(days=2)),
+        )
+        # Old slots of moved bookings are free for the others
+        for items in snapshot.busy.values():
+            items[:] = [item for item in items if item.booking_id not in bookings.ids]
+        engine = AvailabilityEngine(snapshot)
+        rescheduled = []
+        for booking, start in sorted(new_starts.items(), key=lambda item: item[1]):
+            tz = timezone(booking.type_id.resource_calendar_id.tz)
+            start_dt = UTC.localize(start).astimezone(tz)
+            end_dt = start_dt + timedelta(hours=booking.duration)
+            # Keep the current combination, if possible
+            combination_ids = booking.combination_id.ids
+            if booking.combination_auto_assign:
+                combination_ids += (
+                    booking.type_id._get_combinations_priorized()
+                    - booking.combination_id
+                ).ids
+            combination_id = engine.best_combination(
+                booking.type_id.id,
+                start_dt,
+                end_dt,
+                [cid for cid in combination_ids if cid in snapshot.combinations],
+            )
+            if not combination_id:
+                failures.append(
+                    {"id": booking.id, "reason": _("No combination is available.")}
+                )
+                continue
+            engine.reserve(combination_id, start_dt, end_dt, booking.id)
+            rescheduled.append(
+                {"id": booking.id, "start": start, "combination_id": combination_id}
+            )
+        if failures:
+            return {"rescheduled": [], "failures": failures}
+        # Write dates without syncing meetings, then sync each meeting and
+        # check scheduling once for all bookings
+        try:
+            with self.env.cr.savepoint():
+                for result in rescheduled:
+                    self.browse(result["id"]).with_context(
+                        syncing_booking_ids=bookings.ids, defer_scheduling_check=True
+                    ).write(
+                        {
+                            "start": result["start"],
+                            "combination_id": result["combination_id"],
+                        }
+                    )
+                bookings.with_context(defer_scheduling_check=True)._sync_meeting()
+                bookings._check_scheduling()
+        except ValidationError as error:
+            # Something changed since the snapshot; nothing was written
+            return {
+                "rescheduled": [],
+                "failures": [
+                    {"id": result["id"], "reason": error.args[0]}
+                    for result in rescheduled
+                ],
+            }
+        return {"rescheduled": rescheduled, "failures": []}
+
     def action_confirm(self):
         """Confirm own and requesting partner's attendance."""
         attendees_to_confirm = self.env["calendar.attendee"]
@@ -792,9 +1528,12 @@ class ResourceBooking(models.Model):
             if not booking.meeting_id:
                 continue
             # Make sure requesters and user resources are meeting attendees
-            booking.meeting_id.partner_ids |= booking.partner_ids | booking.mapped(
-                "combination_id.resource_ids.user_id.partner_id"
-            )
+            missing = (
+                booking.partner_ids
+                | booking.mapped("combination_id.resource_ids.user_id.partner_id")
+            ) - booking.meeting_id.partner_ids
+            if missing:
+                booking.meeting_id.partner_ids |= missing
             # Find meeting attendees that should be confirmed
             partners_to_confirm = confirm_always | booking.partner_ids
             for attendee in booking.meeting_id.attendee_ids:
@@ -805,15 +1544,18 @@ class ResourceBooking(models.Model):
 
     def action_unschedule(self):
         """Remove associated meetings."""
+        footprint = self._get_slots_footprint()
         self.booking_activity_ids.calendar_event_id = False
         self.mapped("meeting_id").unlink()
         # Force recomputing, in case meeting_id is not visible in the form
         self.write({"meeting_id": False})
+        self._notify_slots_changed(footprint)
 
     def action_cancel(self):
         """Cancel this booking."""
         # Remove related meeting
         self.action_unschedule()
+        self._release_slot_holds()
         # Archive and reset access token
         self.write({"active": False, "access_token": False})
 
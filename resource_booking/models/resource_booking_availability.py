@@ -0,0 +1,448 @@
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+import logging
+import time
+from datetime import datetime, timedelta
+
+from pytz import UTC, timezone
+
+from odoo import api, fields, models
+
+from ..tools.availability import (
+    AvailabilityEngine,
+    DayBitmap,
+    compute_bitmaps,
+    decode_day,
+)
+
+_logger = logging.getLogger(__name__)
+
+
+class ResourceBookingAvailability(models.Model):
+    _name = "resource.booking.availability"
+    _description = "Precomputed resource booking availability"
+    _order = "type_id, combination_id, day"
+    _sql_constraints = [
+        (
+            "type_combination_day_unique",
+            "UNIQUE(type_id, combination_id, day)",
+            "Days must be unique per type and combination.",
+        ),
+    ]
+
+    type_id = fields.Many2one(
+        comodel_name="resource.booking.type",
+        string="Type",
+        index=True,
+        required=True,
+        ondelete="cascade",
+    )
+    combination_id = fields.Many2one(
+        comodel_name="resource.booking.combination",
+        string="Resource combination",
+        index=True,
+        required=True,
+        ondelete="cascade",
+    )
+    day = fields.Date(
+        required=True,
+        index=True,
+        help="Day in the timezone of the type calendar.",
+    )
+    anchor = fields.Integer(help="Minutes since midnight where the 1st bit starts.")
+    step = fields.Integer(help="Minutes between bits.")
+    bitmap = fields.Char(
+        help=(
+            "Hexadecimal bitmap where bit i means that a booking can start "
+            "at anchor + i * step minutes. Empty if slots are not aligned to "
+            "that grid, so they must be computed live."
+        ),
+    )
+    slot_count = fields.Integer(help="Amount of slots in the bitmap.")
+
+    @api.model
+    def _get_horizon_days(self):
+        """How many days, starting today, are precomputed."""
+        return int(
+            self.env["ir.config_parameter"]
+            .sudo()
+            .get_param("resource_booking.availability_horizon_days", 90)
+        )
+
+    @api.model
+    def _get_workers(self):
+        """How many processes precompute availability in parallel.
+
+        Forking may deadlock in a threaded server, so availability is
+        computed in the current process unless this is explicitly raised.
+        """
+        return int(
+            self.env["ir.config_parameter"]
+            .sudo()
+            .get_param("resource_booking.availability_workers", 1)
+        )
+
+    @api.model
+    def _prepare_vals(self, type_id, combination_id, day, day_bitmap):
+        """Values to store a :class:`~..tools.availability.DayBitmap`."""
+        bitmap = day_bitmap.bitmap
+        return {
+            "type_id": type_id,
+            "combination_id": combination_id,
+            "day": day,
+            "anchor": day_bitmap.anchor,
+            "step": day_bitmap.step,
+            "bitmap": bitmap is not None and format(bitmap, "x"),
+            "slot_count": bitmap and bitmap.bit_count(),
+        }
+
+    @api.model
+    def _precompute(self, types=None):
+        """Precompute availability of active booking types over the horizon.
+
+        Modification deadlines are applied when reading.
+        """
+        self = self.sudo()
+        types = (types or self.env["resource.booking.type"].search([])).sudo()
+        if not types:
+            return
+        days = self._get_horizon_days()
+        now = UTC.localize(fields.Datetime.now())
+        started = time.perf_counter()
+        # Widen by 1 day to cover any calendar timezone
+        snapshot = types._get_availability_snapshot(
+            now - timedelta(days=1), now + timedelta(days=days + 1), holds=False
+        )
+        bitmaps = compute_bitmaps(snapshot, types.ids, now, days, self._get_workers())
+        self.search([("type_id", "in", types.ids)]).unlink()
+        self.create(
+            [
+                self._prepare_vals(type_id, combination_id, day, day_bitmap)
+                for type_id, type_bitmaps in bitmaps.items()
+                for (combination_id, day), day_bitmap in type_bitmaps.items()
+            ]
+        )
+        _logger.info(
+            "Precomputed %d days of availability for %d booking types in %.2fs",
+            days,
+            len(types),
+            time.perf_counter() - started,
+        )
+
+    @api.model
+    def _get_stale_days(self):
+        """Days touched by booking changes not yet committed.
+
+        Their precomputed availability will be dropped before committing, so
+        it must not be trusted meanwhile.
+        """
+        footprint = self.env.cr.precommit.data.get(
+            "resource_booking.slots_changed", ()
+        )
+        dirty = self.env.cr.precommit.data.get(
+            "resource_booking.availability_dirty", {}
+        )
+        return {day for _type_id, _combination_id, day in footprint}.union(
+            *dirty.values()
+        )
+
+    @api.model
+    def _get_fresh_rows(self, booking_type, combinations, first_day, last_day):
+        """Get precomputed rows of a type, or ``None`` if any is missing.
+
+        Rows are missing if they were never computed or were invalidated, and
+        they are not usable if their slots are not aligned to a grid.
+        """
+        stale_days = self._get_stale_days()
+        # Widen by 1 day to cover any calendar timezone
+        if any(
+            first_day - timedelta(days=1) <= day <= last_day + timedelta(days=1)
+            for day in stale_days
+        ):
+            return None
+        rows = self.sudo().search_fetch(
+            [
+                ("type_id", "=", booking_type.id),
+                ("combination_id", "in", combinations.ids),
+                ("day", ">=", first_day),
+                ("day", "<=", last_day),
+            ],
+            ["anchor", "bitmap", "combination_id", "day", "slot_count", "step"],
+        )
+        expected = ((last_day - first_day).days + 1) * len(combinations)
+        if len(rows) != expected or not all(rows.mapped("bitmap")):
+            return None
+        return rows
+
+    @api.model
+    def _is_held(self, booking, resources, start_dt, end_dt):
+        """Tell if other bookings hold slots of these resources in a range."""
+        return bool(
+            self.env["resource.booking.hold"]
+            .sudo()
+            .search_count(
+                [
+                    ("expiration", ">", fields.Datetime.now()),
+                    ("booking_id", "!=", booking._origin.id),
+                    ("combination_id.resource_ids", "in", resources.ids),
+                    ("start", "<", fields.Datetime.to_string(end_dt.astimezone(UTC))),
+                    ("stop", ">", fields.Datetime.to_string(start_dt.astimezone(UTC))),
+                ],
+                limit=1,
+            )
+        )
+
+    @api.model
+    def _get_slots(self, booking, start_dt, end_dt):
+        """Get precomputed slots for a pending booking.
+
+        Same result as ``resource.booking._get_available_slots``, or ``None``
+        if the range is not fully precomputed or other bookings hold slots in
+        it, which means that live computation is needed. Bitmaps of all
+        combinations of each day are joined with a bitwise OR.
+        """
+        booking_type = booking.type_id
+        tz = booking_type.resource_calendar_id.tz
+        if getattr(start_dt.tzinfo, "zone", None) != tz:
+            return None
+        now = fields.Datetime.context_timestamp(booking, fields.Datetime.now())
+        start_dt = max(
+            start_dt, now + timedelta(hours=booking_type.modifications_deadline)
+        )
+        first_day = start_dt.date()
+        last_day = (end_dt - timedelta(microseconds=1)).astimezone(start_dt.tzinfo)
+        last_day = last_day.date()
+        if first_day > last_day:
+            return {}
+        combinations = booking_type.combination_rel_ids.combination_id
+        rows = self._get_fresh_rows(booking_type, combinations, first_day, last_day)
+        if rows is None or self._is_held(
+            booking, combinations.resource_ids, start_dt, end_dt
+        ):
+            return None
+        days = {}
+        for row in rows:
+            day_bitmap = days.setdefault(row.day, DayBitmap(row.anchor, row.step, 0))
+            if (row.anchor, row.step) != day_bitmap[:2]:
+                return None
+            # Popcount tells which days are full without decoding them
+            if row.slot_count:
+                days[row.day] = day_bitmap._replace(
+                    bitmap=day_bitmap.bitmap | int(row.bitmap, 16)
+                )
+        duration = timedelta(hours=booking.duration)
+        result = {}
+        for day, day_bitmap in sorted(days.items()):
+            for slot_dt in decode_day(day, timezone(tz), day_bitmap):
+                if slot_dt >= start_dt and slot_dt + duration <= end_dt:
+                    result.setdefault(day, []).append(slot_dt)
+        return result
+
+    @api.model
+    def _get_fitting_combinations(self, booking, combinations, start_dt, end_dt):
+        """Tell where a pending booking fits, according to precomputed bitmaps.
+
+        :return: Dict with ``{combination: bool}``. Combinations that cannot be
+            answered from bitmaps are missing, so they must be checked live.
+        """
+        booking_type = booking.type_id
+        if (
+            not combinations
+            or booking.meeting_id
+            or end_dt - start_dt != timedelta(hours=booking_type.duration)
+        ):
+            return {}
+        tz = timezone(booking_type.resource_calendar_id.tz)
+        start = start_dt.astimezone(tz)
+        day = start.date()
+        rows = self._get_fresh_rows(booking_type, combinations, day, day)
+        if rows is None:
+            return {}
+        result = {}
+        midnight = tz.localize(datetime.combine(day, datetime.min.time()))
+        for row in rows:
+            offset = (start - midnight).total_seconds() / 60 - row.anchor
+            if offset < 0 or offset % row.step:
+                continue
+            fitting = bool(int(row.bitmap, 16) >> int(offset // row.step) & 1)
+            if fitting and self._is_held(
+                booking, row.combination_id.resource_ids, start_dt, end_dt
+            ):
+                continue
+            result[row.combination_id] = fitting
+        return result
+
+    @api.model
+    def _mark_dirty(self, resources, first_day, last_day):
+        """Refresh precomputed availability of some resources and days.
+
+        Changes are gathered and refreshed once, right before committing.
+        """
+        if not resources:
+            return
+        dirty = self.env.cr.precommit.data.setdefault(
+            "resource_booking.availability_dirty", {}
+        )
+        if not dirty:
+            self.env.cr.precommit.add(self._refresh_dirty)
+        days = {
+            first_day + timedelta(days=num)
+            for num in range((last_day - first_day).days + 1)
+        }
+        for resource in resources:
+            dirty.setdefault(resource.id, set()).update(days)
+
+    @api.model
+    def _refresh_dirty(self):
+        """Recompute the precomputed cells whose resources changed.
+
+        Only existing rows are refreshed, and only for the changed days of
+        the changed resources, using a snapshot of those days.
+        """
+        dirty = self.env.cr.precommit.data.pop(
+            "resource_booking.availability_dirty", {}
+        )
+        if not dirty:
+            return
+        self = self.sudo()
+        # Widen by 1 day to cover any calendar timezone
+        widened = {
+            resource_id: {
+                day + timedelta(days=num) for day in days for num in (-1, 0, 1)
+            }
+            for resource_id, days in dirty.items()
+        }
+        first_day = min(min(days) for days in widened.values())
+        last_day = max(max(days) for days in widened.values())
+        rows = self.search_fetch(
+            [
+                ("combination_id.resource_ids", "in", list(dirty)),
+                ("day", ">=", first_day),
+                ("day", "<=", last_day),
+            ],
+            [
+                "anchor",
+                "bitmap",
+                "combination_id",
+                "day",
+                "step",
+                "type_id",
+            ],
+        )
+        cells = {
+            (row.type_id, row.day)
+            for row in rows
+            if any(
+                row.day in widened.get(resource_id, ())
+                for resource_id in row.combination_id.resource_ids.ids
+            )
+        }
+        if not cells:
+            return
+        started = time.perf_counter()
+        types = self.env["resource.booking.type"].union(
+            *(booking_type for booking_type, _day in cells)
+        )
+        # Widen by 1 day again, so edge days get all their leaves and meetings
+        # in any calendar timezone
+        snapshot = types._get_availability_snapshot(
+            UTC.localize(
+                datetime.combine(first_day - timedelta(days=1), datetime.min.time())
+            ),
+            UTC.localize(
+                datetime.combine(last_day + timedelta(days=1), datetime.max.time())
+            ),
+            holds=False,
+        )
+        engine = AvailabilityEngine(snapshot)
+        # All combinations of a day share a grid, so recompute all of them
+        rows = self.search_fetch(
+            [
+                ("type_id", "in", types.ids),
+                ("day", ">=", first_day),
+                ("day", "<=", last_day),
+            ],
+            [
+                "anchor",
+                "bitmap",
+                "combination_id",
+                "day",
+                "step",
+                "type_id",
+            ],
+        ).filtered(lambda row: (row.type_id, row.day) in cells)
+        changed = 0
+        for booking_type in types:
+            type_rows = rows.filtered(
+                lambda row, type_=booking_type: row.type_id == type_
+            )
+            type_first_day = min(type_rows.mapped("day"))
+            bitmaps = engine.day_bitmaps(
+                booking_type.id,
+                type_first_day,
+                (max(type_rows.mapped("day")) - type_first_day).days + 1,
+            )
+            for row in type_rows:
+                day_bitmap = bitmaps.get((row.combination_id.id, row.day))
+                if day_bitmap is None:
+                    # The combination is not in the type anymore
+                    continue
+                vals = self._prepare_vals(
+                    booking_type.id, row.combination_id.id, row.day, day_bitmap
+                )
+                if (row.anchor, row.bitmap, row.step) != (
+                    vals["anchor"],
+                    vals["bitmap"],
+                    vals["step"],
+                ):
+                    row.write(vals)
+                    changed += 1
+        # Precommit hooks run after the last flush
+        self.env.flush_all()
+        _logger.debug(
+            "Refreshed %d of %d precomputed availability cells in %.3fs",
+            changed,
+            len(rows),
+            time.perf_counter() - started,
+        )
+
+    @api.model
+    def _invalidate(self, types=None, first_day=None, last_day=None):
+        """Drop precomputed availability.
+
+        :param types: Only for these booking types; all if ``None``.
+        :param date first_day: Only from this day on.
+        :param date last_day: Only until this day.
+        """
+        domain = []
+        if types is not None:
+            if not types:
+                return
+            domain.append(("type_id", "in", types.ids))
+        # Widen by 1 day to cover any calendar timezone
+        if first_day:
+            domain.append(("day", ">=", first_day - timedelta(days=1)))
+        if last_day:
+            domain.append(("day", "<=", last_day + timedelta(days=1)))
+        self.sudo().search(domain).unlink()
+
+    @api.model
+    def _invalidate_resources(self, resources, first_day=None, last_day=None):
+        """Drop precomputed availability of types that book these resources."""
+        if not resources:
+            return
+        types = (
+            self.env["resource.booking.type"]
+            .sudo()
+            .with_context(active_test=False)
+            .search(
+                [
+                    (
+                        "combination_rel_ids.combination_id.resource_ids",
+                        "in",
+                        resources.ids,
+                    )
+                ]
+            )
+        )
+        self._invalidate(types, first_day, last_day)
@@ -5,6 +5,8 @@ from odoo import _, api, fields, models
 
 from odoo.addons.resource.models.utils import Intervals
 
+from ..tools.instrumentation import instrumented
+
 
 class ResourceBookingCombination(models.Model):
     _name = "resource.booking.combination"
@@ -25,6 +27,16 @@ class ResourceBookingCombination(models.Model):
         index=True,
         help="Force a specific calendar, instead of combining the resources'.",
     )
+    load_hours = fields.Float(
+        compute="_compute_load_hours",
+        string="Load",
+        help="Hours booked in the load window, used to balance assignments.",
+    )
+    load_ids = fields.One2many(
+        comodel_name="resource.booking.combination.load",
+        inverse_name="combination_id",
+        string="Load counters",
+    )
     name = fields.Char(compute="_compute_name", store=True)
     type_count = fields.Integer(compute="_compute_type_count", string="Booking types")
     type_rel_ids = fields.One2many(
@@ -49,6 +61,24 @@ class ResourceBookingCombination(models.Model):
         for one in self:
             one.booking_count = mapping.get(one.id, 0)
 
+    @api.depends("load_ids.day", "load_ids.hours")
+    def _compute_load_hours(self):
+        """Sum the daily counters of the load window."""
+        Load = self.env["resource.booking.combination.load"].sudo()
+        first_day, last_day = Load._get_window()
+        data = Load.read_group(
+            [
+                ("combination_id", "in", self.ids),
+                ("day", ">=", first_day),
+                ("day", "<=", last_day),
+            ],
+            ["hours:sum"],
+            ["combination_id"],
+        )
+        mapping = {x["combination_id"][0]: x["hours"] for x in data}
+        for one in self:
+            one.load_hours = mapping.get(one.id, 0)
+
     @api.depends("resource_ids.name", "forced_calendar_id.name")
     def _compute_name(self):
         for one in self:
@@ -76,6 +106,42 @@ class ResourceBookingCombination(models.Model):
         bookings = self.mapped("booking_ids")
         return bookings._check_scheduling()
 
+    def write(self, vals):
+        """Drop precomputed availability if it changes.
+
+        When resources change, auto-assigned bookings that do not fit anymore
+        are moved to other combinations. If some fit nowhere, the change is
+        refused.
+        """
+        changes = {"active", "forced_calendar_id", "resource_ids", "type_rel_ids"}
+        types = self.type_rel_ids.type_id if changes.intersection(vals) else None
+        reassign = "resource_ids" in vals and not self.env.context.get(
+            "defer_scheduling_check"
+        )
+        if reassign:
+            result = super(
+                ResourceBookingCombination,
+                self.with_context(defer_scheduling_check=True),
+            ).write(vals)
+        else:
+            result = super().write(vals)
+        if types is not None:
+            self.env["resource.booking.availability"]._invalidate(
+                types | self.type_rel_ids.type_id
+            )
+        if reassign:
+            Booking = self.env["resource.booking"]
+            Booking.search(
+                Booking._get_future_bookings_domain()
+                + [
+                    ("combination_id", "in", self.ids),
+                    ("combination_auto_assign", "=", True),
+                ]
+            )._reassign_unfitting()
+            self._check_bookings_scheduling()
+        return result
+
+    @instrumented("resource.booking.combination._get_intervals")
     def _get_intervals(self, start_dt, end_dt):
         """Get available intervals for this booking combination."""
         base = Intervals([(start_dt, end_dt, self)])
@@ -0,0 +1,173 @@
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+from datetime import timedelta
+
+from odoo import api, fields, models
+
+# Hours of bookings in each combination and day, split by day in the
+# timezone of each booking type
+_BOOKED_HOURS_QUERY = """
+    SELECT combination_id, day::date, SUM(
+        EXTRACT(
+            EPOCH FROM
+            LEAST(local_stop, day + INTERVAL '1 day') - GREATEST(local_start, day)
+        ) / 3600
+    )
+    FROM (
+        SELECT
+            rb.combination_id,
+            rb.start AT TIME ZONE 'UTC'
+                AT TIME ZONE COALESCE(cal.tz, 'UTC') AS local_start,
+            rb.stop AT TIME ZONE 'UTC'
+                AT TIME ZONE COALESCE(cal.tz, 'UTC') AS local_stop
+        FROM resource_booking AS rb
+        JOIN resource_booking_type AS rbt ON rbt.id = rb.type_id
+        LEFT JOIN resource_calendar AS cal ON cal.id = rbt.resource_calendar_id
+        WHERE
+            rb.active
+            AND rb.stop > rb.start
+            AND rb.combination_id = ANY(%(combination_ids)s)
+            -- Widened by 1 day to cover any timezone
+            AND rb.start < %(last_day)s::date + 2
+            AND rb.stop > %(first_day)s::date - 1
+    ) AS bookings
+    CROSS JOIN LATERAL generate_series(
+        date_trunc('day', local_start),
+        local_stop - INTERVAL '1 microsecond',
+        INTERVAL '1 day'
+    ) AS day
+    WHERE day::date BETWEEN %(first_day)s AND %(last_day)s
+    GROUP BY combination_id, day::date
+"""
+
+
+class ResourceBookingCombinationLoad(models.Model):
+    """Booked hours of each combination and day.
+
+    These counters are updated with the days touched by booking changes,
+    right before committing. Combinations sum the days in the load window
+    when balancing load, so concurrent bookings on different days never
+    update the same row.
+    """
+
+    _name = "resource.booking.combination.load"
+    _description = "Resource booking combination load"
+    _order = "day DESC, combination_id"
+    _rec_name = "combination_id"
+    _sql_constraints = [
+        (
+            "combination_day_unique",
+            "UNIQUE(combination_id, day)",
+            "Only one load counter per combination and day can exist.",
+        ),
+    ]
+
+    combination_id = fields.Many2one(
+        comodel_name="resource.booking.combination",
+        string="Resource combination",
+        index=True,
+        ondelete="cascade",
+        readonly=True,
+        required=True,
+    )
+    day = fields.Date(required=True, readonly=True)
+    hours = fields.Float(readonly=True)
+
+    @api.model
+    def _get_window(self):
+        """First and last day whose load is balanced.
+
+        The window spans the same amount of days before and after today.
+        """
+        days = int(
+            self.env["ir.config_parameter"]
+            .sudo()
+            .get_param("resource_booking.load_window_days", 30)
+        )
+        today = fields.Date.context_today(self)
+        return today - timedelta(days=days), today + timedelta(days=days)
+
+    @api.model
+    def _get_booked_hours(self, combinations, first_day, last_day):
+        """Get booked hours of combinations from bookings, per day.
+
+        :return: Dict with ``{(combination_id, day): hours}``.
+        """
+        self.env.flush_all()
+        self.env.cr.execute(
+            _BOOKED_HOURS_QUERY,
+            {
+                "combination_ids": combinations.ids,
+                "first_day": first_day,
+                "last_day": last_day,
+            },
+        )
+        return {
+            (combination_id, day): hours
+            for combination_id, day, hours in self.env.cr.fetchall()
+        }
+
+    @api.model
+    def _update(self, cells):
+        """Update counters of some days of some combinations.
+
+        Only those days are recounted, and only counters that differ are
+        written.
+
+        :param set cells: ``(combination_id, day)`` pairs to recount.
+        """
+        self = self.sudo()
+        if not cells:
+            return
+        combinations = self.env["resource.booking.combination"].browse(
+            list({combination_id for combination_id, _day in cells})
+        )
+        days = [day for _combination_id, day in cells]
+        first_day, last_day = min(days), max(days)
+        booked = self._get_booked_hours(combinations, first_day, last_day)
+        counters = {
+            (load.combination_id.id, load.day): load
+            for load in self.search_fetch(
+                [
+                    ("combination_id", "in", combinations.ids),
+                    ("day", ">=", first_day),
+                    ("day", "<=", last_day),
+                ],
+                ["combination_id", "day", "hours"],
+            )
+        }
+        to_create = []
+        for combination_id, day in cells:
+            hours = booked.get((combination_id, day), 0)
+            counter = counters.get((combination_id, day))
+            if hours == (counter.hours if counter else 0):
+                continue
+            if counter:
+                counter.hours = hours
+            else:
+                to_create.append(
+                    {"combination_id": combination_id, "day": day, "hours": hours}
+                )
+        self.create(to_create)
+        self.env.flush_all()
+
+    @api.model
+    def _cron_roll(self):
+        """Recount the load window, which moves every day.
+
+        Counters of the whole window are recounted, which also fixes any
+        drift, and counters without hours are dropped.
+        """
+        self = self.sudo()
+        first_day, last_day = self._get_window()
+        combinations = (
+            self.env["resource.booking.combination"]
+            .with_context(active_test=False)
+            .search([])
+        )
+        days = [
+            first_day + timedelta(days=num)
+            for num in range((last_day - first_day).days + 1)
+        ]
+        self._update({(rbc.id, day) for rbc in combinations for day in days})
+        self.search([("hours", "=", 0)]).unlink()
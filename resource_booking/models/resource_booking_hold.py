@@ -0,0 +1,86 @@
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+from datetime import timedelta
+
+from pytz import UTC
+
+from odoo import api, fields, models
+
+from odoo.addons.resource.models.utils import Intervals
+
+
+class ResourceBookingHold(models.Model):
+    _name = "resource.booking.hold"
+    _description = "Resource booking slot hold"
+    _order = "expiration"
+
+    booking_id = fields.Many2one(
+        comodel_name="resource.booking",
+        string="Booking",
+        index=True,
+        required=True,
+        ondelete="cascade",
+        help="Booking that is about to be scheduled in this slot.",
+    )
+    combination_id = fields.Many2one(
+        comodel_name="resource.booking.combination",
+        string="Resources combination",
+        index=True,
+        required=True,
+        ondelete="cascade",
+    )
+    start = fields.Datetime(required=True, index=True)
+    stop = fields.Datetime(required=True, index=True)
+    expiration = fields.Datetime(
+        required=True,
+        index=True,
+        help="The slot is free again for others after this moment.",
+    )
+
+    @api.model
+    def _get_hold_duration(self):
+        """How long a slot stays held for the user that picked it."""
+        minutes = (
+            self.env["ir.config_parameter"]
+            .sudo()
+            .get_param("resource_booking.hold_minutes", 5)
+        )
+        return timedelta(minutes=float(minutes))
+
+    @api.model
+    def _busy_intervals(self, start_dt, end_dt, resources, analyzed_booking_id):
+        """Get intervals held by other bookings, for each resource."""
+        assert start_dt.tzinfo
+        assert end_dt.tzinfo
+        start_dt, end_dt = (
+            fields.Datetime.to_string(dt.astimezone(UTC)) for dt in (start_dt, end_dt)
+        )
+        if not resources:
+            return {}
+        result = {resource.id: [] for resource in resources}
+        holds = self.sudo().search(
+            [
+                ("expiration", ">", fields.Datetime.now()),
+                ("start", "<=", end_dt),
+                ("stop", ">=", start_dt),
+                ("booking_id", "!=", analyzed_booking_id),
+                ("combination_id.resource_ids", "in", resources.ids),
+            ]
+        )
+        for hold in holds:
+            interval = (
+                fields.Datetime.context_timestamp(self, hold.start),
+                fields.Datetime.context_timestamp(self, hold.stop),
+                self.env["resource.calendar.leaves"],
+            )
+            for resource in hold.combination_id.resource_ids & resources:
+                result[resource.id].append(interval)
+        return {
+            resource_id: Intervals(intervals)
+            for resource_id, intervals in result.items()
+        }
+
+    @api.autovacuum
+    def _gc_expired_holds(self):
+        """Remove expired holds."""
+        self.search([("expiration", "<", fields.Datetime.now())]).unlink()
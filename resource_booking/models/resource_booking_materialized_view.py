@@ -0,0 +1,104 @@
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+import json
+import logging
+import time
+
+from odoo import api, models
+
+_logger = logging.getLogger(__name__)
+
+# Tables whose changes make booking analytics outdated
+SOURCE_TABLES = ("resource_booking", "calendar_event")
+MARKS_PARAM = "resource_booking.materialized_view_marks"
+
+
+class ResourceBookingMaterializedView(models.AbstractModel):
+    """Booking analytics stored in a PostgreSQL materialized view.
+
+    Inheriting models implement :meth:`_select`. A cron refreshes them all
+    concurrently, only when bookings or calendar events changed.
+    """
+
+    _name = "resource.booking.materialized.view"
+    _description = "Resource booking materialized view"
+
+    def _select(self):
+        """Query that fills the view. It must return a unique ``id``."""
+        raise NotImplementedError()
+
+    def _indexes(self):
+        """Extra indexes of the view, as ``{name: columns}``."""
+        return {}
+
+    def init(self):
+        if self._abstract:
+            return
+        self.env.cr.execute(f"DROP MATERIALIZED VIEW IF EXISTS {self._table}")
+        self.env.cr.execute(
+            f"CREATE MATERIALIZED VIEW {self._table} AS ({self._select()})"
+        )
+        # Unique indexes let the view be refreshed concurrently
+        self.env.cr.execute(
+            f"CREATE UNIQUE INDEX {self._table}_id_index ON {self._table} (id)"
+        )
+        for name, columns in self._indexes().items():
+            self.env.cr.execute(
+                f"CREATE INDEX {self._table}_{name}_index "
+                f"ON {self._table} ({columns})"
+            )
+
+    @api.model
+    def _refresh(self, concurrently=False):
+        """Recompute the materialized view.
+
+        :param bool concurrently:
+            Keep the view readable while refreshing. It is slower.
+        :return int: Amount of rows in the view.
+        """
+        self.env.flush_all()
+        started = time.perf_counter()
+        self.env.cr.execute(
+            f"REFRESH MATERIALIZED VIEW {'CONCURRENTLY' if concurrently else ''} "
+            f"{self._table}"
+        )
+        self.env.cr.execute(f"SELECT COUNT(*) FROM {self._table}")
+        rows = self.env.cr.fetchone()[0]
+        _logger.info(
+            "Refreshed %s in %.2fs: %d rows",
+            self._table,
+            time.perf_counter() - started,
+            rows,
+        )
+        self.invalidate_model()
+        return rows
+
+    @api.model
+    def _get_change_marks(self):
+        """Latest write date and amount of rows of each source table.
+
+        Counts reveal deletions, which leave no write date behind.
+        """
+        marks = {}
+        for table in SOURCE_TABLES:
+            self.env.cr.execute(f"SELECT MAX(write_date), COUNT(*) FROM {table}")
+            write_date, count = self.env.cr.fetchone()
+            marks[table] = [write_date and write_date.isoformat(), count]
+        return marks
+
+    @api.model
+    def _cron_refresh(self):
+        """Refresh all booking analytics, if their sources changed."""
+        self.env.flush_all()
+        params = self.env["ir.config_parameter"].sudo()
+        marks = self._get_change_marks()
+        if json.loads(params.get_param(MARKS_PARAM, "{}")) == marks:
+            _logger.debug("Booking analytics are up to date")
+            return
+        for model_name in self.env.registry.descendants(
+            ["resource.booking.materialized.view"], "_inherit"
+        ):
+            model = self.env[model_name]
+            if not model._abstract:
+                model.sudo()._refresh(concurrently=True)
+        params.set_param(MARKS_PARAM, json.dumps(marks))
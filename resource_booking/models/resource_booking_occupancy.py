@@ -0,0 +1,113 @@
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+from odoo import fields, models
+
+
+class ResourceBookingOccupancy(models.Model):
+    """Hours each resource is busy per day, with bookings or other meetings.
+
+    Meetings only occupy resources of type user, through the attendance of
+    their partner. Meetings of bookings are counted as bookings.
+    """
+
+    _name = "resource.booking.occupancy"
+    _inherit = "resource.booking.materialized.view"
+    _description = "Resource booking occupancy"
+    _auto = False
+    _order = "day DESC, resource_id"
+    _rec_name = "resource_id"
+
+    resource_id = fields.Many2one(
+        comodel_name="resource.resource", string="Resource", readonly=True
+    )
+    day = fields.Date(readonly=True, help="Day in the timezone of the resource.")
+    booking_count = fields.Integer(string="Bookings", readonly=True)
+    booked_hours = fields.Float(readonly=True)
+    meeting_hours = fields.Float(
+        readonly=True,
+        help="Hours of busy meetings not related to any booking.",
+    )
+    occupied_hours = fields.Float(readonly=True)
+
+    def _select(self):
+        return """
+            WITH busy AS (
+                SELECT
+                    rr.id AS resource_id,
+                    1 AS booking,
+                    rb.start AT TIME ZONE 'UTC'
+                        AT TIME ZONE COALESCE(rr.tz, 'UTC') AS local_start,
+                    rb.stop AT TIME ZONE 'UTC'
+                        AT TIME ZONE COALESCE(rr.tz, 'UTC') AS local_stop
+                FROM resource_booking AS rb
+                JOIN resource_booking_combination_resource_resource_rel AS rel
+                    ON rel.resource_booking_combination_id = rb.combination_id
+                JOIN resource_resource AS rr ON rr.id = rel.resource_resource_id
+                WHERE rb.active AND rb.meeting_id IS NOT NULL AND rr.active
+                UNION ALL
+                SELECT
+                    rr.id AS resource_id,
+                    0 AS booking,
+                    ce.start AT TIME ZONE 'UTC'
+                        AT TIME ZONE COALESCE(rr.tz, 'UTC') AS local_start,
+                    ce.stop AT TIME ZONE 'UTC'
+                        AT TIME ZONE COALESCE(rr.tz, 'UTC') AS local_stop
+                FROM calendar_event AS ce
+                JOIN calendar_attendee AS att
+                    ON att.event_id = ce.id AND att.state != 'declined'
+                JOIN res_users AS ru ON ru.partner_id = att.partner_id
+                JOIN resource_resource AS rr ON rr.user_id = ru.id
+                WHERE
+                    ce.active
+                    AND ce.show_as = 'busy'
+                    AND ce.stop > ce.start
+                    AND rr.active
+                    AND rr.resource_type = 'user'
+                    AND NOT EXISTS (
+                        SELECT 1 FROM resource_booking AS rb
+                        WHERE rb.meeting_id = ce.id
+                    )
+            ), busy_days AS (
+                SELECT
+                    resource_id,
+                    day::date AS day,
+                    -- Multi-day events count once, in their first day
+                    SUM(booking) FILTER (
+                        WHERE day = date_trunc('day', local_start)
+                    ) AS booking_count,
+                    SUM(
+                        EXTRACT(
+                            EPOCH FROM
+                            LEAST(local_stop, day + INTERVAL '1 day')
+                            - GREATEST(local_start, day)
+                        ) / 3600
+                    ) FILTER (WHERE booking = 1) AS booked_hours,
+                    SUM(
+                        EXTRACT(
+                            EPOCH FROM
+                            LEAST(local_stop, day + INTERVAL '1 day')
+                            - GREATEST(local_start, day)
+                        ) / 3600
+                    ) FILTER (WHERE booking = 0) AS meeting_hours
+                FROM busy
+                CROSS JOIN LATERAL generate_series(
+                    date_trunc('day', local_start),
+                    local_stop - INTERVAL '1 microsecond',
+                    INTERVAL '1 day'
+                ) AS day
+                GROUP BY resource_id, day
+            )
+            SELECT
+                row_number() OVER (ORDER BY resource_id, day) AS id,
+                resource_id,
+                day,
+                COALESCE(booking_count, 0) AS booking_count,
+                COALESCE(booked_hours, 0) AS booked_hours,
+                COALESCE(meeting_hours, 0) AS meeting_hours,
+                COALESCE(booked_hours, 0) + COALESCE(meeting_hours, 0)
+                    AS occupied_hours
+            FROM busy_days
+        """
+
+    def _indexes(self):
+        return {"resource_day": "resource_id, day"}
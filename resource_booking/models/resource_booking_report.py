@@ -1,9 +1,35 @@
-from odoo import models
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
 
-class FilaReport(models.AbstractModel):
-    _name = 'report.resource.resource_booking_report'
-    _description = 'Informe Cita'
+from odoo import api, models
 
+
+class ResourceBookingReport(models.AbstractModel):
+    _name = "report.resource_booking.report_resource_booking"
+    _description = "Resource booking report"
+
+    @api.model
     def _get_report_values(self, docids, data=None):
-        docs = self.env['resource.booking'].browse(docids)
-        return {'docs': docs}
+        """Prefetch everything the template prints, in a few queries."""
+        docs = self.env["resource.booking"].browse(docids)
+        docs.fetch(
+            [
+                "combination_id",
+                "description",
+                "duration",
+                "localitzacio",
+                "name",
+                "partner_ids",
+                "start",
+                "state",
+                "type_id",
+                "videocall_location",
+            ]
+        )
+        docs.partner_ids.fetch(["name"])
+        docs.combination_id.fetch(["name"])
+        docs.type_id.fetch(["name", "requester_advice"])
+        return {
+            "doc_ids": docids,
+            "doc_model": "resource.booking",
+            "docs": docs,
+        }
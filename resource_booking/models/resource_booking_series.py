@@ -0,0 +1,302 @@
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+import logging
+import time
+from bisect import insort
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from dateutil.rrule import DAILY, MONTHLY, WEEKLY, rrule
+from pytz import UTC, timezone
+
+from odoo import _, api, fields, models
+from odoo.tools import format_datetime
+
+from ..tools.availability import (
+    AvailabilityEngine,
+    is_fitting_sorted,
+    overlaps_sorted,
+)
+
+_logger = logging.getLogger(__name__)
+
+_FREQUENCIES = {"daily": DAILY, "weekly": WEEKLY, "monthly": MONTHLY}
+
+
+class ResourceBookingSeries(models.Model):
+    """Recurring bookings, generated in batch from a recurrence rule."""
+
+    _name = "resource.booking.series"
+    _description = "Resource booking series"
+    _order = "start DESC"
+    _sql_constraints = [
+        ("interval_positive", "CHECK(interval > 0)", "Interval must be positive."),
+        ("count_positive", "CHECK(count > 0)", "Occurrences must be positive."),
+    ]
+
+    active = fields.Boolean(default=True)
+    name = fields.Char(
+        index=True, help="Leave empty to autogenerate the names of its bookings."
+    )
+    type_id = fields.Many2one(
+        comodel_name="resource.booking.type",
+        string="Type",
+        index=True,
+        ondelete="cascade",
+        required=True,
+    )
+    partner_ids = fields.Many2many(
+        comodel_name="res.partner",
+        relation="res_partner_resource_booking_series_rel",
+        string="Attendees",
+        required=True,
+    )
+    user_id = fields.Many2one(
+        comodel_name="res.users",
+        default=lambda self: self.env.user,
+        string="Organizer",
+    )
+    combination_auto_assign = fields.Boolean(
+        string="Auto assigned",
+        default=True,
+        help=(
+            "When checked, each occurrence gets the first available "
+            "combination, preferring the one of the previous occurrence."
+        ),
+    )
+    combination_id = fields.Many2one(
+        comodel_name="resource.booking.combination",
+        string="Resources combination",
+        domain="[('type_rel_ids.type_id', 'in', [type_id])]",
+    )
+    start = fields.Datetime(required=True, help="Start of the 1st occurrence.")
+    duration = fields.Float(
+        compute="_compute_duration",
+        readonly=False,
+        store=True,
+        help="Duration of each occurrence.",
+    )
+    rrule_type = fields.Selection(
+        [("daily", "Days"), ("weekly", "Weeks"), ("monthly", "Months")],
+        string="Recurrence",
+        default="weekly",
+        required=True,
+    )
+    interval = fields.Integer(string="Repeat every", default=1, required=True)
+    count = fields.Integer(string="Occurrences", default=10, required=True)
+    until = fields.Date(help="Stop repeating after this day, if earlier.")
+    booking_ids = fields.One2many(
+        comodel_name="resource.booking",
+        inverse_name="series_id",
+        string="Bookings",
+    )
+    booking_count = fields.Integer(compute="_compute_booking_count")
+    conflicts = fields.Text(
+        readonly=True,
+        help="Occurrences that could not be booked the last time.",
+    )
+
+    @api.depends("type_id")
+    def _compute_duration(self):
+        """Get default duration from the type."""
+        for record in self:
+            record.duration = record.type_id.duration
+
+    @api.depends("booking_ids")
+    def _compute_booking_count(self):
+        for record in self:
+            record.booking_count = len(record.booking_ids)
+
+    def _get_occurrences(self):
+        """Get starts of all occurrences of this series, in naive UTC.
+
+        Recurrence happens in the timezone of the type calendar, so
+        occurrences keep their local time when daylight saving time changes.
+        """
+        self.ensure_one()
+        tz = timezone(self.type_id.resource_calendar_id.tz or "UTC")
+        rule = rrule(
+            _FREQUENCIES[self.rrule_type],
+            dtstart=UTC.localize(self.start).astimezone(tz).replace(tzinfo=None),
+            interval=self.interval,
+            count=self.count,
+        )
+        until = self.until and datetime.combine(self.until, datetime.max.time())
+        return [
+            tz.localize(occurrence).astimezone(UTC).replace(tzinfo=None)
+            for occurrence in rule
+            if not until or occurrence <= until
+        ]
+
+    def _get_missing_occurrences(self):
+        """Get occurrences of these series that have no booking yet.
+
+        :return: Tuple with a dict of ``{series: [starts]}`` to book, and
+            conflicts of the occurrences that are in the past.
+        """
+        now = fields.Datetime.now()
+        occurrences, conflicts = {}, []
+        for series in self:
+            booked = set(
+                series.with_context(active_test=False).booking_ids.mapped("start")
+            )
+            occurrences[series] = []
+            for start in series._get_occurrences():
+                if start in booked:
+                    continue
+                if start < now:
+                    conflicts.append(
+                        {
+                            "series": series,
+                            "start": start,
+                            "reason": _("It is in the past."),
+                        }
+                    )
+                else:
+                    occurrences[series].append(start)
+        return occurrences, conflicts
+
+    def _generate_bookings(self):
+        """Book all missing occurrences of these series at once.
+
+        Availability of each candidate combination is computed once for the
+        whole horizon, and each occurrence is checked against it with a
+        binary search. Occurrences booked in this batch are tracked apart, so
+        availability never needs to be recomputed. Bookings are created with
+        all their meetings in one batch, and scheduling is checked once.
+
+        Occurrences that do not fit are reported, and the rest are booked.
+
+        :return: Dict with created ``bookings`` and ``conflicts``, a list of
+            dicts with ``series``, ``start`` and ``reason``.
+        """
+        started = time.perf_counter()
+        occurrences, conflicts = self._get_missing_occurrences()
+        starts = [start for values in occurrences.values() for start in values]
+        vals_list = []
+        if starts:
+            horizon_start = UTC.localize(min(starts) - timedelta(days=1))
+            horizon_end = UTC.localize(
+                max(starts) + timedelta(days=1, hours=max(self.mapped("duration")))
+            )
+            snapshot = self.type_id.sudo()._get_availability_snapshot(
+                horizon_start, horizon_end
+            )
+            engine = AvailabilityEngine(snapshot)
+            availability = {}
+            # Ranges booked in this batch, per resource
+            taken = defaultdict(list)
+
+            def is_free(type_id, combination_id, start_dt, end_dt):
+                if (type_id, combination_id) not in availability:
+                    availability[type_id, combination_id] = engine.booking_intervals(
+                        type_id, horizon_start, horizon_end, [combination_id]
+                    )
+                return is_fitting_sorted(
+                    availability[type_id, combination_id], start_dt, end_dt
+                ) and not any(
+                    overlaps_sorted(taken[resource_id], start_dt, end_dt)
+                    for resource_id in snapshot.combinations[
+                        combination_id
+                    ].resource_ids
+                )
+
+            for series, series_starts in occurrences.items():
+                if series.combination_auto_assign:
+                    candidates = series.type_id._get_combinations_priorized().ids
+                else:
+                    candidates = series.combination_id.ids
+                candidates = [cid for cid in candidates if cid in snapshot.combinations]
+                for start in series_starts:
+                    start_dt = UTC.localize(start)
+                    end_dt = start_dt + timedelta(hours=series.duration)
+                    combination_id = next(
+                        (
+                            cid
+                            for cid in candidates
+                            if is_free(series.type_id.id, cid, start_dt, end_dt)
+                        ),
+                        None,
+                    )
+                    if not combination_id:
+                        conflicts.append(
+                            {
+                                "series": series,
+                                "start": start,
+                                "reason": _("No combination is available."),
+                            }
+                        )
+                        continue
+                    combination = snapshot.combinations[combination_id]
+                    for resource_id in combination.resource_ids:
+                        insort(taken[resource_id], (start_dt, end_dt))
+                    # Keep the same resources for the next occurrences
+                    candidates.remove(combination_id)
+                    candidates.insert(0, combination_id)
+                    vals_list.append(
+                        series._prepare_booking_vals(start, combination_id)
+                    )
+        bookings = (
+            self.env["resource.booking"]
+            .with_context(defer_scheduling_check=True)
+            .create(vals_list)
+        )
+        bookings._check_scheduling()
+        for series in self:
+            series.conflicts = "\n".join(
+                f"{format_datetime(self.env, conflict['start'])}: {conflict['reason']}"
+                for conflict in conflicts
+                if conflict["series"] == series
+            )
+        _logger.info(
+            "Generated %d bookings for %d series in %.2fs, with %d conflicts",
+            len(bookings),
+            len(self),
+            time.perf_counter() - started,
+            len(conflicts),
+        )
+        return {"bookings": bookings, "conflicts": conflicts}
+
+    def _prepare_booking_vals(self, start, combination_id):
+        """Values to create the booking of an occurrence."""
+        return {
+            "combination_auto_assign": self.combination_auto_assign,
+            "combination_id": combination_id,
+            "duration": self.duration,
+            "name": self.name,
+            "partner_ids": [(6, 0, self.partner_ids.ids)],
+            "series_id": self.id,
+            "start": start,
+            "type_id": self.type_id.id,
+            "user_id": self.user_id.id,
+        }
+
+    def action_generate_bookings(self):
+        """Book missing occurrences, and tell how many conflict."""
+        result = self._generate_bookings()
+        return {
+            "type": "ir.actions.client",
+            "tag": "display_notification",
+            "params": {
+                "type": "warning" if result["conflicts"] else "success",
+                "message": _(
+                    "%(bookings)d bookings were created. %(conflicts)d "
+                    "occurrences could not be booked."
+                )
+                % {
+                    "bookings": len(result["bookings"]),
+                    "conflicts": len(result["conflicts"]),
+                },
+                # Show created bookings and conflicts
+                "next": {"type": "ir.actions.client", "tag": "soft_reload"},
+            },
+        }
+
+    def action_open_bookings(self):
+        return {
+            "domain": [("series_id", "in", self.ids)],
+            "name": _("Bookings"),
+            "res_model": "resource.booking",
+            "type": "ir.actions.act_window",
+            "view_mode": "calendar,tree,form",
+        }
@@ -3,8 +3,12 @@
 
 from random import random
 
+from pytz import UTC
+
 from odoo import _, api, fields, models
 
+from ..tools import availability
+
 
 class ResourceBookingType(models.Model):
     _name = "resource.booking.type"
@@ -30,12 +34,16 @@ class ResourceBookingType(models.Model):
         [
             ("sorted", "Sorted: pick the first one that is free"),
             ("random", "Randomly: order is not important"),
+            ("best_fit", "Best fit: keep the largest free blocks"),
+            ("balanced", "Balanced: pick the least booked one recently"),
         ],
         required=True,
         default="random",
         help=(
             "Choose how to auto-assign resource combinations. "
-            "It has no effect if assigned manually."
+            "It has no effect if assigned manually. With best fit, bookings "
+            "scheduled together get the combinations where they leave less "
+            "free time unusable; ties are broken by sequence."
         ),
     )
     combination_rel_ids = fields.One2many(
@@ -119,17 +127,234 @@ class ResourceBookingType(models.Model):
         bookings = self.mapped("booking_ids")
         return bookings._check_scheduling()
 
+    def write(self, vals):
+        """Drop precomputed availability if it changes."""
+        result = super().write(vals)
+        if {
+            "active",
+            "combination_rel_ids",
+            "duration",
+            "resource_calendar_id",
+            "slot_duration",
+        }.intersection(vals):
+            self.env["resource.booking.availability"]._invalidate(self)
+        return result
+
     def _get_combinations_priorized(self):
         """Gets all combinations sorted by the chosen assignment method."""
         if not self.combination_assignment:
             return self.combination_rel_ids.mapped("combination_id")
-        keys = {"sorted": "sequence", "random": lambda *a: random()}
+        keys = {
+            "sorted": "sequence",
+            "random": lambda *a: random(),
+            "best_fit": "sequence",
+            "balanced": lambda rel: (rel.combination_id.load_hours, rel.sequence),
+        }
         rels = self.combination_rel_ids.sorted(keys[self.combination_assignment])
         combinations = rels.mapped("combination_id")
         return combinations
 
+    def _get_availability_snapshot(self, start_dt, end_dt, holds=True):
+        """Load what the offline availability engine needs for these types.
+
+        :param datetime start_dt: Timezone-aware start of the analyzed range.
+        :param datetime end_dt: Timezone-aware end of the analyzed range.
+        :param bool holds: Include slots held in the portal as busy ranges.
+            They expire soon, so leave them out for long-lived results.
+        :return: A :class:`~..tools.availability.Snapshot`.
+        """
+        start, end = (
+            fields.Datetime.to_string(dt.astimezone(UTC)) for dt in (start_dt, end_dt)
+        )
+        self.fetch(
+            [
+                "combination_rel_ids",
+                "duration",
+                "modifications_deadline",
+                "resource_calendar_id",
+                "slot_duration",
+            ]
+        )
+        combinations = self.combination_rel_ids.combination_id
+        combinations.fetch(["forced_calendar_id", "resource_ids"])
+        resources = combinations.resource_ids
+        resources.fetch(["calendar_id", "resource_type", "tz", "user_id"])
+        calendars = (
+            self.resource_calendar_id
+            | combinations.forced_calendar_id
+            | resources.calendar_id
+        )
+        calendars.fetch(["tz", "two_weeks_calendar"])
+        attendances = self.env["resource.calendar.attendance"].search_fetch(
+            [
+                ("calendar_id", "in", calendars.ids),
+                ("display_type", "=", False),
+                ("day_period", "!=", "lunch"),
+            ],
+            [
+                "calendar_id",
+                "date_from",
+                "date_to",
+                "dayofweek",
+                "hour_from",
+                "hour_to",
+                "resource_id",
+                "week_type",
+            ],
+        )
+        leaves = self.env["resource.calendar.leaves"].search_fetch(
+            [
+                ("time_type", "=", "leave"),
+                ("calendar_id", "in", [False] + calendars.ids),
+                ("resource_id", "in", [False] + resources.ids),
+                ("date_from", "<=", end),
+                ("date_to", ">=", start),
+            ],
+            ["calendar_id", "date_from", "date_to", "resource_id"],
+        )
+        return availability.Snapshot(
+            calendars=[
+                availability.Calendar(
+                    calendar.id, calendar.tz, calendar.two_weeks_calendar
+                )
+                for calendar in calendars
+            ],
+            attendances=[
+                availability.Attendance(
+                    attendance.calendar_id.id,
+                    int(attendance.dayofweek),
+                    attendance.hour_from,
+                    attendance.hour_to,
+                    attendance.week_type and int(attendance.week_type),
+                    attendance.date_from or None,
+                    attendance.date_to or None,
+                    attendance.resource_id.id or None,
+                )
+                for attendance in attendances
+            ],
+            leaves=[
+                availability.Leave(
+                    leave.calendar_id.id or None,
+                    leave.resource_id.id or None,
+                    leave.date_from,
+                    leave.date_to,
+                )
+                for leave in leaves
+            ],
+            resources=[
+                availability.Resource(
+                    resource.id, resource.calendar_id.id or None, resource.tz
+                )
+                for resource in resources
+            ],
+            combinations=[
+                availability.Combination(
+                    combination.id,
+                    tuple(combination.resource_ids.ids),
+                    combination.forced_calendar_id.id or None,
+                )
+                for combination in combinations
+            ],
+            types=[
+                availability.BookingType(
+                    type_.id,
+                    type_.resource_calendar_id.id,
+                    tuple(type_.combination_rel_ids.combination_id.ids),
+                    type_.duration,
+                    type_.slot_duration,
+                    type_.modifications_deadline,
+                )
+                for type_ in self
+            ],
+            busy=self._get_availability_snapshot_busy(resources, start, end, holds),
+        )
+
+    @api.model
+    def _get_availability_snapshot_busy(self, resources, start, end, holds=True):
+        """Get busy ranges of resources from meetings and slot holds.
+
+        Same rules as ``resource.calendar._calendar_event_busy_intervals``.
+        """
+        result = []
+        users = resources.filtered(
+            lambda res: res.resource_type == "user" and res.user_id.active
+        )
+        by_partner = {}
+        for resource in users:
+            by_partner.setdefault(resource.user_id.partner_id, []).append(resource)
+        domain = [("start", "<=", end), ("stop", ">=", start)]
+        # Only events of their users matter if all resources are users
+        if users == resources:
+            domain += [("partner_ids", "in", users.user_id.partner_id.ids)]
+        events = (
+            self.env["calendar.event"]
+            .with_context(active_test=True)
+            .search_fetch(
+                domain,
+                [
+                    "attendee_ids",
+                    "partner_ids",
+                    "resource_booking_ids",
+                    "show_as",
+                    "start",
+                    "stop",
+                    "user_id",
+                ],
+            )
+        )
+        events.attendee_ids.fetch(["partner_id", "state"])
+        events.resource_booking_ids.combination_id.fetch(["resource_ids"])
+        for event in events:
+            booking = event.resource_booking_ids[:1]
+            booked = booking.combination_id.resource_ids & resources
+            # Meetings of user resources are only found if they attend
+            busy = set(booked - users)
+            for partner in event.partner_ids:
+                for resource in by_partner.get(partner, ()):
+                    if (
+                        resource in booked
+                        or (
+                            event.user_id == resource.user_id
+                            and event.show_as == "busy"
+                        )
+                        or any(
+                            attendee.partner_id == partner
+                            and attendee.state != "declined"
+                            for attendee in event.attendee_ids
+                        )
+                    ):
+                        busy.add(resource)
+            result += [
+                availability.Busy(
+                    resource.id, event.start, event.stop, booking.id or None
+                )
+                for resource in busy
+            ]
+        if not holds:
+            return result
+        holds = (
+            self.env["resource.booking.hold"]
+            .sudo()
+            .search_fetch(
+                [
+                    ("expiration", ">", fields.Datetime.now()),
+                    ("start", "<=", end),
+                    ("stop", ">=", start),
+                    ("combination_id.resource_ids", "in", resources.ids),
+                ],
+                ["booking_id", "combination_id", "start", "stop"],
+            )
+        )
+        for hold in holds:
+            result += [
+                availability.Busy(
+                    resource.id, hold.start, hold.stop, hold.booking_id.id
+                )
+                for resource in hold.combination_id.resource_ids & resources
+            ]
+        return result
+
     def action_open_bookings(self):
-        DurationParser = self.env["ir.qweb.field.duration"]
         return {
             "context": dict(
                 self.env.context,
@@ -138,13 +363,7 @@ class ResourceBookingType(models.Model):
                 default_duration=self.duration,
                 default_type_id=self.id,
                 # Context used by web_calendar_slot_duration module
-                calendar_slot_duration=DurationParser.value_to_html(
-                    self.slot_duration,
-                    {
-                        "unit": "hour",
-                        "digital": True,
-                    },
-                ),
+                calendar_slot_duration=self.slot_duration * 60,
             ),
             "domain": [("type_id", "=", self.id)],
             "name": _("Bookings"),
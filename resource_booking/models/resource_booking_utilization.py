@@ -0,0 +1,191 @@
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+from odoo import api, fields, models
+
+
+class ResourceBookingUtilization(models.Model):
+    """Booked versus available hours of each resource and day.
+
+    Rows come from a materialized view, so reading a year of data is cheap.
+    Each row holds either the working hours of a resource in a day, without
+    combination nor type, or the hours booked for it in a combination and
+    type that day. That way, sums are right with any grouping.
+    """
+
+    _name = "resource.booking.utilization"
+    _inherit = "resource.booking.materialized.view"
+    _description = "Resource booking utilization"
+    _auto = False
+    _order = "day DESC, resource_id"
+    _rec_name = "resource_id"
+
+    resource_id = fields.Many2one(
+        comodel_name="resource.resource", string="Resource", readonly=True
+    )
+    combination_id = fields.Many2one(
+        comodel_name="resource.booking.combination",
+        string="Resource combination",
+        readonly=True,
+    )
+    type_id = fields.Many2one(
+        comodel_name="resource.booking.type", string="Type", readonly=True
+    )
+    day = fields.Date(readonly=True, help="Day in the timezone of the resource.")
+    booked_hours = fields.Float(readonly=True)
+    available_hours = fields.Float(
+        readonly=True,
+        help="Hours the resource works that day, according to its calendar.",
+    )
+    utilization = fields.Float(
+        string="Utilization (%)",
+        readonly=True,
+        group_operator="avg",
+        help="Booked hours over available hours, computed for each group.",
+    )
+
+    def _select(self):
+        return """
+            WITH combination_resource AS (
+                SELECT
+                    rel.resource_booking_combination_id AS combination_id,
+                    rel.resource_resource_id AS resource_id,
+                    rr.calendar_id,
+                    COALESCE(rr.tz, 'UTC') AS tz
+                FROM resource_booking_combination_resource_resource_rel AS rel
+                JOIN resource_resource AS rr ON rr.id = rel.resource_resource_id
+                WHERE rr.active
+            ), bookings AS (
+                SELECT
+                    cr.resource_id,
+                    rb.combination_id,
+                    rb.type_id,
+                    rb.start AT TIME ZONE 'UTC' AT TIME ZONE cr.tz AS local_start,
+                    rb.stop AT TIME ZONE 'UTC' AT TIME ZONE cr.tz AS local_stop
+                FROM resource_booking AS rb
+                JOIN combination_resource AS cr
+                    ON cr.combination_id = rb.combination_id
+                WHERE rb.active AND rb.meeting_id IS NOT NULL
+            ), booked AS (
+                SELECT
+                    resource_id,
+                    combination_id,
+                    type_id,
+                    day::date AS day,
+                    SUM(
+                        EXTRACT(
+                            EPOCH FROM
+                            LEAST(local_stop, day + INTERVAL '1 day')
+                            - GREATEST(local_start, day)
+                        ) / 3600
+                    ) AS booked_hours
+                FROM bookings
+                CROSS JOIN LATERAL generate_series(
+                    date_trunc('day', local_start),
+                    local_stop - INTERVAL '1 microsecond',
+                    INTERVAL '1 day'
+                ) AS day
+                GROUP BY resource_id, combination_id, type_id, day
+            ), days AS (
+                SELECT generate_series(
+                    first_day, last_day, INTERVAL '1 day'
+                )::date AS day
+                FROM (
+                    SELECT
+                        MIN(local_start)::date AS first_day,
+                        MAX(local_stop)::date AS last_day
+                    FROM bookings
+                ) AS bounds
+            ), available AS (
+                SELECT
+                    cr.resource_id,
+                    days.day,
+                    SUM(att.hour_to - att.hour_from) AS available_hours
+                FROM (
+                    SELECT DISTINCT resource_id, calendar_id
+                    FROM combination_resource
+                ) AS cr
+                CROSS JOIN days
+                JOIN resource_calendar AS cal ON cal.id = cr.calendar_id
+                JOIN resource_calendar_attendance AS att
+                    ON att.calendar_id = cal.id
+                    AND att.dayofweek::int = EXTRACT(ISODOW FROM days.day) - 1
+                    AND att.display_type IS NULL
+                    AND att.day_period != 'lunch'
+                    AND (att.date_from IS NULL OR att.date_from <= days.day)
+                    AND (att.date_to IS NULL OR att.date_to >= days.day)
+                    AND (
+                        att.resource_id IS NULL
+                        OR att.resource_id = cr.resource_id
+                    )
+                    AND (
+                        NOT cal.two_weeks_calendar
+                        OR att.week_type
+                        = ((days.day - DATE '0001-01-01') / 7 % 2)::varchar
+                    )
+                GROUP BY cr.resource_id, days.day
+            )
+            SELECT
+                row_number() OVER (
+                    ORDER BY
+                        resource_id,
+                        day,
+                        combination_id NULLS FIRST,
+                        type_id NULLS FIRST
+                ) AS id,
+                resource_id,
+                combination_id,
+                type_id,
+                day,
+                booked_hours,
+                available_hours,
+                CASE
+                    WHEN available_hours > 0
+                    THEN 100 * booked_hours / available_hours
+                    ELSE 0
+                END AS utilization
+            FROM (
+                SELECT
+                    resource_id,
+                    NULL::integer AS combination_id,
+                    NULL::integer AS type_id,
+                    day,
+                    0.0 AS booked_hours,
+                    available_hours
+                FROM available
+                UNION ALL
+                SELECT
+                    resource_id,
+                    combination_id,
+                    type_id,
+                    day,
+                    booked_hours,
+                    0.0 AS available_hours
+                FROM booked
+            ) AS utilization_rows
+        """
+
+    def _indexes(self):
+        return {"resource_day": "resource_id, day"}
+
+    @api.model
+    def read_group(
+        self, domain, fields, groupby, offset=0, limit=None, orderby=False, lazy=True
+    ):
+        """Compute utilization of each group from its sums."""
+        names = {spec.split(":")[0] for spec in fields}
+        utilization = "utilization" in names
+        if utilization:
+            fields = list(fields) + [
+                f"{name}:sum"
+                for name in ("available_hours", "booked_hours")
+                if name not in names
+            ]
+        result = super().read_group(
+            domain, fields, groupby, offset, limit, orderby, lazy
+        )
+        if utilization:
+            for group in result:
+                booked = group.get("booked_hours") or 0
+                available = group.get("available_hours") or 0
+                group["utilization"] = available and 100 * booked / available
+        return result
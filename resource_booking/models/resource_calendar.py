@@ -8,6 +8,14 @@ from odoo import api, fields, models
 
 from odoo.addons.resource.models.utils import Intervals
 
+from ..tools.instrumentation import instrumented
+from ..tools.lru import LRUCache
+
+# Work intervals of this worker, without busy meetings nor holds
+_work_intervals_cache = LRUCache("work_intervals")
+# Single row with the generation of cached work intervals
+GENERATION_TABLE = "resource_booking_work_intervals_generation"
+
 
 class Busy(Exception):
     pass  # This is not a real exception, just a helper
@@ -30,7 +38,91 @@ class ResourceCalendar(models.Model):
         )
         return bookings._check_scheduling()
 
+    def get_booking_impact(self, vals):
+        """Tell which future bookings would break by writing these calendars.
+
+        :return: See ``resource.booking._get_impact``.
+        """
+        return self.env["resource.booking"]._get_impact(
+            [
+                "|",
+                "|",
+                ("type_id.resource_calendar_id", "in", self.ids),
+                ("combination_id.forced_calendar_id", "in", self.ids),
+                ("combination_id.resource_ids.calendar_id", "in", self.ids),
+            ],
+            self,
+            "write",
+            vals,
+        )
+
+    def init(self):
+        self.env.cr.execute(
+            f"""
+                CREATE SEQUENCE IF NOT EXISTS {GENERATION_TABLE}_seq;
+                CREATE TABLE IF NOT EXISTS {GENERATION_TABLE}
+                    (generation BIGINT NOT NULL);
+                INSERT INTO {GENERATION_TABLE}
+                SELECT nextval('{GENERATION_TABLE}_seq')
+                WHERE NOT EXISTS (SELECT 1 FROM {GENERATION_TABLE});
+            """
+        )
+
+    def write(self, vals):
+        """Drop precomputed availability if it changes.
+
+        Cached work intervals are outdated before writing, so that scheduling
+        constraints use the new ones.
+        """
+        changes = {
+            "attendance_ids",
+            "global_leave_ids",
+            "leave_ids",
+            "two_weeks_calendar",
+            "tz",
+        }.intersection(vals)
+        if changes:
+            self._invalidate_work_intervals_cache()
+        result = super().write(vals)
+        if changes:
+            self.env["resource.booking.availability"]._invalidate()
+        return result
+
     @api.model
+    def _get_work_intervals_cache_bytes(self):
+        """Memory budget of the work intervals cache of each worker."""
+        return int(
+            self.env["ir.config_parameter"]
+            .sudo()
+            .get_param("resource_booking.work_intervals_cache_bytes", 16 * 1024**2)
+        )
+
+    @api.model
+    def _get_work_intervals_generation(self):
+        """Token that changes when cached work intervals become outdated.
+
+        It is read within the transaction, so other workers get a new token
+        when the changes that outdate their intervals are committed, and
+        rolled back savepoints restore the previous token.
+        """
+        self.env.cr.execute(f"SELECT generation FROM {GENERATION_TABLE}")
+        return self.env.cr.fetchone()[0]
+
+    @api.model
+    def _invalidate_work_intervals_cache(self):
+        """Outdate cached work intervals of all workers.
+
+        Tokens come from a sequence, so they are never reused even if this
+        transaction is rolled back. Concurrent invalidations wait for each
+        other to commit.
+        """
+        self.env.cr.execute(
+            f"UPDATE {GENERATION_TABLE} "
+            f"SET generation = nextval('{GENERATION_TABLE}_seq')"
+        )
+
+    @api.model
+    @instrumented("resource.calendar._calendar_event_busy_intervals")
     def _calendar_event_busy_intervals(
         self, start_dt, end_dt, resource, analyzed_booking_id
     ):
@@ -99,6 +191,109 @@ class ResourceCalendar(models.Model):
                 )
         return Intervals(intervals)
 
+    @instrumented("resource.calendar._work_intervals_batch")
+    def _work_intervals_batch(
+        self,
+        start_dt,
+        end_dt,
+        resources=None,
+        domain=None,
+        tz=None,
+        compute_leaves=True,
+    ):
+        """Cache work intervals in memory.
+
+        Busy meetings and holds change too often, so they are always removed
+        afterwards from cached intervals, if required by context.
+        """
+        max_bytes = self._get_work_intervals_cache_bytes()
+        if not max_bytes:
+            return super()._work_intervals_batch(
+                start_dt, end_dt, resources, domain, tz, compute_leaves
+            )
+        _work_intervals_cache.max_bytes = max_bytes
+        key = (
+            self.env.cr.dbname,
+            self._get_work_intervals_generation(),
+            tuple(self.ids),
+            start_dt,
+            end_dt,
+            tuple(resource.id for resource in resources or []),
+            repr(domain),
+            str(tz),
+            compute_leaves,
+            self.env.su,
+            tuple(self.env.companies.ids),
+            bool(self.env.context.get("exclude_public_holidays")),
+        )
+        cached = _work_intervals_cache.get(key)
+        if cached is None:
+            result = super(
+                ResourceCalendar, self.with_context(analyzing_booking=False)
+            )._work_intervals_batch(
+                start_dt, end_dt, resources, domain, tz, compute_leaves
+            )
+            # Store plain values, which outlive this environment
+            _work_intervals_cache.put(
+                key,
+                {
+                    resource_id: tuple(
+                        (start, stop, records._name, tuple(records.ids))
+                        for start, stop, records in intervals
+                    )
+                    for resource_id, intervals in result.items()
+                },
+            )
+        else:
+            result = {
+                resource_id: Intervals(
+                    [
+                        (start, stop, self.env[model].browse(ids))
+                        for start, stop, model, ids in intervals
+                    ]
+                )
+                for resource_id, intervals in cached.items()
+            }
+        if compute_leaves and self.env.context.get("analyzing_booking"):
+            busy = self._get_booking_busy_intervals(
+                start_dt,
+                end_dt,
+                list(result),
+                self.env.context["analyzing_booking"],
+            )
+            for resource_id, intervals in busy.items():
+                result[resource_id] -= intervals
+        return result
+
+    def _get_booking_busy_intervals(
+        self, start_dt, end_dt, resource_ids, analyzed_booking_id
+    ):
+        """Get intervals where resources are busy for the analyzed booking.
+
+        They come from meetings and from slots held by other bookings.
+
+        :param list resource_ids: IDs of resources; ``False`` is ignored.
+        :return: Dict with ``{resource_id: Intervals}``.
+        """
+        held = self.env["resource.booking.hold"]._busy_intervals(
+            start_dt,
+            end_dt,
+            self.env["resource.resource"].browse(filter(None, resource_ids)),
+            analyzed_booking_id,
+        )
+        result = {}
+        for resource_id in resource_ids:
+            # TODO Make this work in batch too
+            result[resource_id] = self._calendar_event_busy_intervals(
+                start_dt,
+                end_dt,
+                self.env["resource.resource"].browse(resource_id),
+                analyzed_booking_id,
+            )
+            if resource_id in held:
+                result[resource_id] |= held[resource_id]
+        return result
+
     def _leave_intervals_batch(
         self, start_dt, end_dt, resources=None, domain=None, tz=None, any_calendar=False
     ):
@@ -107,12 +302,12 @@ class ResourceCalendar(models.Model):
             start_dt, end_dt, resources, domain, tz, any_calendar
         )
         if self.env.context.get("analyzing_booking"):
-            for resource_id in result:
-                # TODO Make this work in batch too
-                result[resource_id] |= self._calendar_event_busy_intervals(
-                    start_dt,
-                    end_dt,
-                    self.env["resource.resource"].browse(resource_id),
-                    self.env.context["analyzing_booking"],
-                )
+            busy = self._get_booking_busy_intervals(
+                start_dt,
+                end_dt,
+                list(result),
+                self.env.context["analyzing_booking"],
+            )
+            for resource_id, intervals in busy.items():
+                result[resource_id] |= intervals
         return result
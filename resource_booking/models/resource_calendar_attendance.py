@@ -0,0 +1,29 @@
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+from odoo import api, models
+
+
+class ResourceCalendarAttendance(models.Model):
+    _inherit = "resource.calendar.attendance"
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        """Drop precomputed availability and cached work intervals."""
+        self.env["resource.calendar"]._invalidate_work_intervals_cache()
+        result = super().create(vals_list)
+        self.env["resource.booking.availability"]._invalidate()
+        return result
+
+    def write(self, vals):
+        """Drop precomputed availability and cached work intervals."""
+        self.env["resource.calendar"]._invalidate_work_intervals_cache()
+        result = super().write(vals)
+        self.env["resource.booking.availability"]._invalidate()
+        return result
+
+    def unlink(self):
+        """Drop precomputed availability and cached work intervals."""
+        self.env["resource.calendar"]._invalidate_work_intervals_cache()
+        result = super().unlink()
+        self.env["resource.booking.availability"]._invalidate()
+        return result
@@ -0,0 +1,122 @@
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+from odoo import api, models
+from odoo.osv import expression
+
+
+class ResourceCalendarLeaves(models.Model):
+    _inherit = "resource.calendar.leaves"
+
+    def _invalidate_booking_availability(self):
+        """Drop precomputed availability during these leaves."""
+        if not self:
+            return
+        Availability = self.env["resource.booking.availability"]
+        first_day = min(self.mapped("date_from")).date()
+        last_day = max(self.mapped("date_to")).date()
+        if all(self.mapped("resource_id")):
+            Availability._invalidate_resources(self.resource_id, first_day, last_day)
+        else:
+            Availability._invalidate(None, first_day, last_day)
+
+    def _get_booking_values(self):
+        """Values of these leaves that matter to bookings."""
+        return [
+            {
+                "calendar_id": leave.calendar_id.id,
+                "date_from": leave.date_from,
+                "date_to": leave.date_to,
+                "resource_id": leave.resource_id.id,
+            }
+            for leave in self
+        ]
+
+    @api.model
+    def _get_bookings_domain(self, leaves):
+        """Domain of bookings that overlap some leaves.
+
+        :param list leaves: Dicts with leave values.
+        """
+        domains = []
+        for leave in leaves:
+            domain = [
+                ("start", "<", leave["date_to"]),
+                ("stop", ">", leave["date_from"]),
+            ]
+            if leave.get("resource_id"):
+                domain += [("combination_id.resource_ids", "in", leave["resource_id"])]
+            elif leave.get("calendar_id"):
+                domain += [
+                    "|",
+                    "|",
+                    ("type_id.resource_calendar_id", "=", leave["calendar_id"]),
+                    ("combination_id.forced_calendar_id", "=", leave["calendar_id"]),
+                    (
+                        "combination_id.resource_ids.calendar_id",
+                        "=",
+                        leave["calendar_id"],
+                    ),
+                ]
+            domains.append(domain)
+        return expression.OR(domains)
+
+    def _reassign_bookings(self):
+        """Move auto-assigned bookings that these leaves break elsewhere.
+
+        Leaves are saved even if some bookings fit nowhere, because they
+        usually come from time off that already happens anyway.
+
+        :return: Bookings that fit in no combination.
+        """
+        Booking = self.env["resource.booking"].sudo()
+        if not self or self.env.context.get("defer_scheduling_check"):
+            return Booking
+        return Booking.search(
+            expression.AND(
+                [
+                    Booking._get_future_bookings_domain(),
+                    [("combination_auto_assign", "=", True)],
+                    self._get_bookings_domain(self._get_booking_values()),
+                ]
+            )
+        )._reassign_unfitting()
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        """Drop precomputed availability, and move bookings that break."""
+        self.env["resource.calendar"]._invalidate_work_intervals_cache()
+        result = super().create(vals_list)
+        result._invalidate_booking_availability()
+        result._reassign_bookings()
+        return result
+
+    def write(self, vals):
+        """Drop precomputed availability, and move bookings that break."""
+        self.env["resource.calendar"]._invalidate_work_intervals_cache()
+        self._invalidate_booking_availability()
+        result = super().write(vals)
+        self._invalidate_booking_availability()
+        self._reassign_bookings()
+        return result
+
+    def unlink(self):
+        """Drop precomputed availability and cached work intervals."""
+        self.env["resource.calendar"]._invalidate_work_intervals_cache()
+        self._invalidate_booking_availability()
+        return super().unlink()
+
+    def get_booking_impact(self, vals):
+        """Tell which future bookings would break by writing these leaves.
+
+        Without records, creating a leave with ``vals`` is analyzed. Only
+        bookings that overlap the resulting leaves are checked.
+
+        :return: See ``resource.booking._get_impact``.
+        """
+        proposed = [vals]
+        if self:
+            proposed = [dict(values, **vals) for values in self._get_booking_values()]
+        method, args = ("write", (vals,)) if self else ("create", ([vals],))
+        return self.env["resource.booking"]._get_impact(
+            self._get_bookings_domain(proposed), self, method, *args
+        )
@@ -3,7 +3,7 @@
 
 from odoo import api, models
 
-from .resource_booking import _availability_is_fitting
+from .resource_booking import _availability_is_fitting, _merge_intervals
 
 
 class ResourceResource(models.Model):
@@ -17,6 +17,35 @@ class ResourceResource(models.Model):
         )
         return bookings._check_scheduling()
 
+    def get_booking_impact(self, vals):
+        """Tell which future bookings would break by writing these resources.
+
+        :return: See ``resource.booking._get_impact``.
+        """
+        return self.env["resource.booking"]._get_impact(
+            [("combination_id.resource_ids", "in", self.ids)], self, "write", vals
+        )
+
+    def write(self, vals):
+        """Drop precomputed availability and cached work intervals if they change.
+
+        Cached work intervals are outdated before writing, so that scheduling
+        constraints use the new ones.
+        """
+        changes = {
+            "active",
+            "calendar_id",
+            "resource_type",
+            "tz",
+            "user_id",
+        }.intersection(vals)
+        if changes:
+            self.env["resource.calendar"]._invalidate_work_intervals_cache()
+        result = super().write(vals)
+        if changes:
+            self.env["resource.booking.availability"]._invalidate_resources(self)
+        return result
+
     def is_available(self, start_dt, end_dt, domain=None, tz=None):
         """Convenience method to check whether a resource is available within a
         time span.
@@ -30,4 +59,4 @@ class ResourceResource(models.Model):
         )._work_intervals_batch(
             start_dt, end_dt, resources=[self], domain=domain, tz=tz
         )[self.id]
-        return _availability_is_fitting(result, start_dt, end_dt)
+        return _availability_is_fitting(_merge_intervals(result), start_dt, end_dt)
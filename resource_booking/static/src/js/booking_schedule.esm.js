@@ -0,0 +1,79 @@
+/** @odoo-module */
+
+import {jsonrpc} from "@web/core/network/rpc_service";
+import publicWidget from "@web/legacy/js/public/public_widget";
+
+publicWidget.registry.ResourceBookingSchedule = publicWidget.Widget.extend({
+    selector: ".o_booking_calendar",
+    events: {
+        "show.bs.modal form.modal": "_onShowConfirmModal",
+    },
+
+    /**
+     * @override
+     */
+    start() {
+        const channels = this.el.dataset.busChannels;
+        if (channels) {
+            this.busService = this.bindService("bus_service");
+            for (const channel of channels.split(",")) {
+                this.busService.addChannel(channel);
+            }
+            this.busService.subscribe("resource_booking/slots_changed", (payload) =>
+                this._onSlotsChanged(payload)
+            );
+        }
+        return this._super(...arguments);
+    },
+
+    /**
+     * Hold the chosen slot while the requester confirms it.
+     *
+     * @param {Event} ev
+     */
+    async _onShowConfirmModal(ev) {
+        const form = ev.currentTarget;
+        const submit = form.querySelector("button[type='submit']");
+        const alert = form.querySelector(".o_booking_hold_error");
+        submit.disabled = true;
+        alert.classList.add("d-none");
+        const result = await jsonrpc(this.el.dataset.holdUrl, {
+            access_token: form.querySelector("input[name='access_token']").value,
+            when: form.querySelector("input[name='when']").value,
+        });
+        if (result.error) {
+            alert.textContent = result.error;
+            alert.classList.remove("d-none");
+            return;
+        }
+        submit.disabled = false;
+    },
+
+    /**
+     * Render again the displayed days whose slots changed.
+     *
+     * @param {Object} payload
+     * @param {String[]} payload.days ISO dates with changes
+     */
+    async _onSlotsChanged({days}) {
+        days = days.filter((day) => this.el.querySelector(`td[data-day='${day}']`));
+        if (!days.length) {
+            return;
+        }
+        const result = await jsonrpc(this.el.dataset.daysUrl, {
+            access_token: this.el.dataset.accessToken,
+            days,
+        });
+        for (const [day, {cell, modals}] of Object.entries(result)) {
+            const modalsEl = this.el.querySelector(
+                `.o_booking_day_modals[data-day='${day}']`
+            );
+            // Do not remove a confirmation dialog while the user reads it
+            if (modalsEl.querySelector(".modal.show")) {
+                continue;
+            }
+            this.el.querySelector(`td[data-day='${day}']`).innerHTML = cell;
+            modalsEl.innerHTML = modals;
+        }
+    },
+});
@@ -1,2 +1,4 @@
 from . import test_backend
+from . import test_benchmark
 from . import test_portal
+from . import test_query_count
@@ -1,6 +1,8 @@
 # Copyright 2021 Tecnativa - Jairo Llopis
 # License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
 
+from datetime import datetime, timedelta
+
 
 def create_test_data(obj):
     """Create test data for a case."""
@@ -135,3 +137,145 @@ def create_test_data(obj):
     )
     # Create some partner
     obj.partner = obj.env["res.partner"].create({"name": "some customer"})
+
+
+def create_benchmark_data(obj, resources=40, combinations=20, bookings=200, weeks=8):
+    """Create synthetic load for benchmarks.
+
+    Half of the ``resources`` are users and half are materials. Each one of
+    the ``combinations`` pairs one user and one material, and all of them are
+    available in a single booking type. The ``bookings`` are scheduled on
+    30-minute slots from Monday 2021-03-01, never overlapping each other, and
+    every user resource has a weekly recurring meeting that lasts ``weeks``.
+    """
+    obj.env = obj.env(
+        context=dict(
+            obj.env.context, tracking_disable=True, no_reset_password=True, tz="UTC"
+        )
+    )
+    obj.bench_calendar = obj.env["resource.calendar"].create(
+        {
+            "name": "Weekdays",
+            "tz": "UTC",
+            "attendance_ids": [
+                (
+                    0,
+                    0,
+                    {
+                        "name": "Weekday %d" % day,
+                        "dayofweek": str(day),
+                        "hour_from": 8,
+                        "hour_to": 19,
+                        "day_period": "morning",
+                    },
+                )
+                for day in range(5)
+            ],
+        }
+    )
+    users_count = max(resources // 2, 1)
+    obj.bench_users = obj.env["res.users"].create(
+        [
+            {
+                "email": "bench_%d@example.com" % num,
+                "login": "bench_%d" % num,
+                "name": "Bench user %d" % num,
+            }
+            for num in range(users_count)
+        ]
+    )
+    obj.bench_r_users = obj.env["resource.resource"].create(
+        [
+            {
+                "calendar_id": obj.bench_calendar.id,
+                "name": user.name,
+                "resource_type": "user",
+                "tz": "UTC",
+                "user_id": user.id,
+            }
+            for user in obj.bench_users
+        ]
+    )
+    obj.bench_r_materials = obj.env["resource.resource"].create(
+        [
+            {
+                "calendar_id": obj.bench_calendar.id,
+                "name": "Bench material %d" % num,
+                "resource_type": "material",
+                "tz": "UTC",
+            }
+            for num in range(max(resources - users_count, 1))
+        ]
+    )
+    obj.bench_rbcs = obj.env["resource.booking.combination"].create(
+        [
+            {
+                "resource_ids": [
+                    (
+                        6,
+                        0,
+                        [
+                            obj.bench_r_users[num % len(obj.bench_r_users)].id,
+                            obj.bench_r_materials[
+                                num % len(obj.bench_r_materials)
+                            ].id,
+                        ],
+                    )
+                ]
+            }
+            for num in range(combinations)
+        ]
+    )
+    obj.bench_rbt = obj.env["resource.booking.type"].create(
+        {
+            "name": "Benchmark booking type",
+            "combination_rel_ids": [
+                (0, 0, {"sequence": num, "combination_id": rbc.id})
+                for num, rbc in enumerate(obj.bench_rbcs)
+            ],
+            "resource_calendar_id": obj.bench_calendar.id,
+        }
+    )
+    obj.bench_partner = obj.env["res.partner"].create({"name": "Bench customer"})
+    # Recurring meetings happen after the last booking slot of each day
+    first_monday = datetime(2021, 3, 1)
+    weekdays = ("mon", "tue", "wed", "thu", "fri")
+    obj.bench_events = obj.env["calendar.event"].create(
+        [
+            {
+                "name": "Weekly meeting of %s" % user.name,
+                "start": first_monday + timedelta(days=num % 5, hours=18),
+                "stop": first_monday + timedelta(days=num % 5, hours=19),
+                "user_id": user.id,
+                "partner_ids": [(6, 0, user.partner_id.ids)],
+                "recurrency": True,
+                "rrule_type": "weekly",
+                "interval": 1,
+                "end_type": "count",
+                "count": weeks,
+                weekdays[num % 5]: True,
+            }
+            for num, user in enumerate(obj.bench_users)
+        ]
+    )
+    # There are 20 slots of 30 minutes from 08:00 to 18:00 each weekday
+    span = max(5, -(-bookings // 20))
+    starts = []
+    for num in range(bookings):
+        day, slot = num % span, num // span
+        starts.append(
+            first_monday
+            + timedelta(days=day // 5 * 7 + day % 5, hours=8, minutes=30 * slot)
+        )
+    obj.bench_bookings = obj.env["resource.booking"].create(
+        [
+            {
+                "combination_auto_assign": False,
+                "combination_id": obj.bench_rbcs[num % combinations].id,
+                "partner_ids": [(4, obj.bench_partner.id)],
+                "start": start,
+                "type_id": obj.bench_rbt.id,
+            }
+            for num, start in enumerate(starts)
+        ]
+    )
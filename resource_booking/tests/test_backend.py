@@ -2,22 +2,29 @@
 # Copyright 2022 Tecnativa - Pedro M. Baeza
 # Copyright 2024 Tecnativa - Carolina Fernandez
 # License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+import io
+import json
 from datetime import date, datetime
 from unittest.mock import patch
 
 from dateutil.relativedelta import relativedelta
 from freezegun import freeze_time
-from pytz import utc
+from pytz import timezone, utc
 
 from odoo import fields
 from odoo.exceptions import ValidationError
 from odoo.tests.common import Form, TransactionCase, new_test_user, users
 from odoo.tools import mute_logger
+from odoo.tools.pdf import PdfFileReader
 
 from odoo.addons.resource.models.utils import Intervals
 from odoo.addons.resource_booking.models.resource_booking import (
     _availability_is_fitting,
+    _merge_intervals,
 )
+from odoo.addons.resource_booking.tools import metrics
+from odoo.addons.resource_booking.tools.availability import AvailabilityEngine
+from odoo.addons.resource_booking.tools.lru import LRUCache
 
 from .common import create_test_data
 
@@ -219,7 +226,8 @@ class BackendCaseMisc(BackendCaseBase):
             ),
             (datetime(2021, 3, 3, 0, 0), datetime(2021, 3, 3, 18, 0), recset),
         ]
-        available_intervals = Intervals(tuples)
+        available_intervals = _merge_intervals(Intervals(tuples))
+        self.assertEqual(len(available_intervals), 1)
         self.assertTrue(
             _availability_is_fitting(
                 available_intervals,
@@ -229,7 +237,7 @@ class BackendCaseMisc(BackendCaseBase):
         )
         # Skip a day by removing it.
         tuples.pop(1)
-        available_intervals = Intervals(tuples)
+        available_intervals = _merge_intervals(Intervals(tuples))
         self.assertFalse(
             _availability_is_fitting(
                 available_intervals,
@@ -274,8 +282,14 @@ class BackendCaseMisc(BackendCaseBase):
         self.rbt.duration = 0.75
         # Bookings smart button configures calendar with slots from slot duration field
         button_context = self.rbt.action_open_bookings()["context"]
-        self.assertEqual(button_context["calendar_slot_duration"], "00:30:00")
+        self.assertEqual(button_context["calendar_slot_duration"], 30)
         self.assertEqual(button_context["default_duration"], 0.75)
+        # Minutes are not rounded
+        self.rbt.slot_duration = 0.125
+        self.assertEqual(
+            self.rbt.action_open_bookings()["context"]["calendar_slot_duration"], 7.5
+        )
+        self.rbt.slot_duration = 0.5
         # When you click & drag on calendar to create an event, it adds the
         # start and duration as default; we imitate that here to book a meeting
         # with 2 slots next monday
@@ -924,6 +938,965 @@ class BackendCaseMisc(BackendCaseBase):
             )
         )
 
+    def test_slot_hold(self):
+        """A held slot is busy for other bookings until it expires."""
+        rbc_mon = self.rbcs[0]
+        self.rbt.combination_rel_ids.filtered(
+            lambda rel: rel.combination_id != rbc_mon
+        ).unlink()
+        rb1, rb2 = self.env["resource.booking"].create(
+            [
+                {"partner_ids": [(4, self.partner.id)], "type_id": self.rbt.id}
+                for _ in range(2)
+            ]
+        )
+        hold = rb1._hold_slot(datetime(2021, 3, 1, 10))
+        self.assertEqual(hold.combination_id, rbc_mon)
+        self.assertEqual(hold.stop, datetime(2021, 3, 1, 10, 30))
+        # Only the holder sees the slot as free
+        search_args = (
+            utc.localize(datetime(2021, 3, 1)),
+            utc.localize(datetime(2021, 3, 2)),
+        )
+        slot = utc.localize(datetime(2021, 3, 1, 10))
+        self.assertIn(slot, rb1._get_available_slots(*search_args)[date(2021, 3, 1)])
+        self.assertNotIn(
+            slot, rb2._get_available_slots(*search_args)[date(2021, 3, 1)]
+        )
+        with self.assertRaises(ValidationError):
+            rb2._hold_slot(datetime(2021, 3, 1, 10))
+        # Holder can book it, and other bookings cannot
+        with self.assertRaises(ValidationError), self.env.cr.savepoint():
+            rb2.with_context(using_portal=True).start = datetime(2021, 3, 1, 10)
+        rb1.with_context(using_portal=True).start = datetime(2021, 3, 1, 10)
+        self.assertEqual(rb1.combination_id, rbc_mon)
+        rb1._release_slot_holds()
+        self.assertFalse(hold.exists())
+        # Expired holds don't block slots, and get removed
+        hold = rb2._hold_slot(datetime(2021, 3, 1, 11))
+        hold.expiration = datetime(2021, 2, 26, 8)
+        self.assertIn(
+            utc.localize(datetime(2021, 3, 1, 11)),
+            rb1._get_available_slots(*search_args)[date(2021, 3, 1)],
+        )
+        self.env["resource.booking.hold"]._gc_expired_holds()
+        self.assertFalse(hold.exists())
+
+    def test_slots_changed_notifications(self):
+        """Portal calendars are told which days changed."""
+        BusBus = type(self.env["bus.bus"])
+        rbc_mon = self.rbcs[0]
+        with patch.object(BusBus, "_sendmany", autospec=True) as sendmany:
+            booking = self.env["resource.booking"].create(
+                {
+                    "partner_ids": [(4, self.partner.id)],
+                    "start": "2021-03-01 08:00:00",
+                    "type_id": self.rbt.id,
+                    "combination_id": rbc_mon.id,
+                    "combination_auto_assign": False,
+                }
+            )
+            self.env.cr.precommit.run()
+        sendmany.assert_called_once_with(
+            self.env["bus.bus"],
+            [
+                (
+                    "resource_booking.slots.%d" % rbc_mon.id,
+                    "resource_booking/slots_changed",
+                    {
+                        "type_id": self.rbt.id,
+                        "combination_id": rbc_mon.id,
+                        "days": ["2021-02-28", "2021-03-01", "2021-03-02"],
+                    },
+                )
+            ],
+        )
+        # Rescheduling refreshes both the old and the new day, and their
+        # neighbours, which are the same days in other timezones
+        with patch.object(BusBus, "_sendmany", autospec=True) as sendmany:
+            booking.start = "2021-03-08 08:00:00"
+            self.env.cr.precommit.run()
+        notifications = sendmany.call_args[0][1]
+        self.assertEqual(
+            notifications[0][2]["days"],
+            [
+                "2021-02-28",
+                "2021-03-01",
+                "2021-03-02",
+                "2021-03-07",
+                "2021-03-08",
+                "2021-03-09",
+            ],
+        )
+        # Cancelling refreshes the freed day
+        with patch.object(BusBus, "_sendmany", autospec=True) as sendmany:
+            booking.action_cancel()
+            self.env.cr.precommit.run()
+        notifications = sendmany.call_args[0][1]
+        self.assertEqual(
+            notifications[0][2]["days"], ["2021-03-07", "2021-03-08", "2021-03-09"]
+        )
+        # Unrelated changes notify nothing
+        with patch.object(BusBus, "_sendmany", autospec=True) as sendmany:
+            booking.name = "Renamed"
+            self.env.cr.precommit.run()
+        sendmany.assert_not_called()
+        # Pages of combinations that share resources are told too
+        rbc_user = self.env["resource.booking.combination"].create(
+            {"resource_ids": [(6, 0, self.r_users[0].ids)]}
+        )
+        with patch.object(BusBus, "_sendmany", autospec=True) as sendmany:
+            self.env["resource.booking"].create(
+                {
+                    "partner_ids": [(4, self.partner.id)],
+                    "start": "2021-03-15 08:00:00",
+                    "type_id": self.rbt.id,
+                    "combination_id": rbc_mon.id,
+                    "combination_auto_assign": False,
+                }
+            )
+            self.env.cr.precommit.run()
+        self.assertEqual(
+            {notification[0] for notification in sendmany.call_args[0][1]},
+            {
+                "resource_booking.slots.%d" % rbc_mon.id,
+                "resource_booking.slots.%d" % rbc_user.id,
+            },
+        )
+
+    def test_calendar_availability(self):
+        """Calendar view gets merged free intervals for the booking."""
+        rbc_mon = self.rbcs[0]
+        self.rbt.combination_rel_ids.filtered(
+            lambda rel: rel.combination_id != rbc_mon
+        ).unlink()
+        self.env["resource.booking"].create(
+            {
+                "partner_ids": [(4, self.partner.id)],
+                "start": "2021-03-01 08:00:00",
+                "type_id": self.rbt.id,
+            }
+        )
+        booking = self.env["resource.booking"].create(
+            {"partner_ids": [(4, self.partner.id)], "type_id": self.rbt.id}
+        )
+        context = booking.action_schedule()["context"]
+        self.assertEqual(context["calendar_availability_model"], "resource.booking")
+        self.assertEqual(context["calendar_availability_ids"], booking.ids)
+        self.assertEqual(
+            booking.get_calendar_availability(
+                "2021-02-28 00:00:00", "2021-03-07 00:00:00"
+            ),
+            [["2021-03-01 08:30:00", "2021-03-01 17:00:00"]],
+        )
+
+    def test_instrumentation(self):
+        """The context key logs timings of availability hot paths."""
+        booking = self.env["resource.booking"].create(
+            {"partner_ids": [(4, self.partner.id)], "type_id": self.rbt.id}
+        )
+        logger = "odoo.addons.resource_booking.tools.instrumentation"
+        with self.assertLogs(logger, "INFO") as logs:
+            booking.with_context(
+                resource_booking_instrumentation=True
+            )._get_available_slots(
+                utc.localize(datetime(2021, 3, 1)), utc.localize(datetime(2021, 3, 3))
+            )
+        self.assertEqual(len(logs.records), 1)
+        data = json.loads(logs.records[0].args[0])
+        self.assertEqual(data["label"], "resource.booking._get_available_slots")
+        self.assertEqual(data["resource.booking._get_available_slots"]["calls"], 1)
+        self.assertEqual(data["resource.booking._get_intervals"]["calls"], 1)
+        self.assertEqual(
+            data["resource.booking.combination._get_intervals"]["calls"], 1
+        )
+        self.assertIn("resource.calendar._work_intervals_batch", data)
+        self.assertIn("resource.calendar._calendar_event_busy_intervals", data)
+        # Nothing is logged without the context key
+        with self.assertNoLogs(logger, "INFO"):
+            booking._get_available_slots(
+                utc.localize(datetime(2021, 3, 1)), utc.localize(datetime(2021, 3, 3))
+            )
+
+    def test_metrics(self):
+        """Scheduling conflicts are counted."""
+        checks = metrics.CHECK_SCHEDULING.get()
+        failures = metrics.CHECK_SCHEDULING_FAILURES.get()
+        with self.assertRaises(ValidationError), self.env.cr.savepoint():
+            # Wednesdays are not in the type calendar
+            self.env["resource.booking"].create(
+                {
+                    "partner_ids": [(4, self.partner.id)],
+                    "start": "2021-03-03 08:00:00",
+                    "type_id": self.rbt.id,
+                    "combination_auto_assign": False,
+                    "combination_id": self.rbcs[2].id,
+                }
+            )
+        self.assertGreater(metrics.CHECK_SCHEDULING.get(), checks)
+        self.assertEqual(metrics.CHECK_SCHEDULING_FAILURES.get(), failures + 1)
+        self.assertIn(
+            "resource_booking_check_scheduling_failures_total{pid=",
+            metrics.render(),
+        )
+
+    def test_report_batch(self):
+        """Booking reports print all bookings, in chunks if needed."""
+        bookings = self.env["resource.booking"].create(
+            [
+                {"partner_ids": [(4, self.partner.id)], "type_id": self.rbt.id}
+                for _ in range(3)
+            ]
+        )
+        Report = self.env["ir.actions.report"]
+        report_ref = "resource_booking.action_report_resource_booking"
+        html, _content_type = Report._render_qweb_html(report_ref, bookings.ids)
+        self.assertEqual(html.count(b"Cita:"), 3)
+        if Report.get_wkhtmltopdf_state() != "ok":
+            self.skipTest("wkhtmltopdf is not available")
+        self.env["ir.config_parameter"].set_param(
+            "resource_booking.report_chunk_size", 2
+        )
+        pdf, _content_type = Report.with_context(
+            force_report_rendering=True
+        )._render_qweb_pdf(report_ref, bookings.ids)
+        self.assertEqual(PdfFileReader(io.BytesIO(pdf)).getNumPages(), 3)
+
+    def test_utilization(self):
+        """Utilization compares booked and working hours per resource."""
+        self.env["resource.booking"].create(
+            [
+                {
+                    "partner_ids": [(4, self.partner.id)],
+                    "start": start,
+                    "duration": 1.5,
+                    "type_id": self.rbt.id,
+                    "combination_auto_assign": False,
+                    "combination_id": self.rbcs[0].id,
+                }
+                for start in ("2021-03-01 08:00:00", "2021-03-01 10:00:00")
+            ]
+        )
+        Utilization = self.env["resource.booking.utilization"]
+        Utilization._refresh()
+        groups = Utilization.read_group(
+            [("resource_id", "=", self.r_users[0].id), ("day", "=", "2021-03-01")],
+            ["utilization"],
+            ["resource_id"],
+        )
+        # Mondays 8:00-17:00, 3 hours booked
+        self.assertEqual(groups[0]["available_hours"], 9)
+        self.assertEqual(groups[0]["booked_hours"], 3)
+        self.assertAlmostEqual(groups[0]["utilization"], 100 / 3)
+        by_type = Utilization.read_group(
+            [("resource_id", "=", self.r_materials[0].id), ("type_id", "!=", False)],
+            ["booked_hours"],
+            ["combination_id", "type_id"],
+            lazy=False,
+        )
+        self.assertEqual(len(by_type), 1)
+        self.assertEqual(by_type[0]["combination_id"][0], self.rbcs[0].id)
+        self.assertEqual(by_type[0]["booked_hours"], 3)
+
+    def test_auto_schedule(self):
+        """Pending bookings get the earliest slots, priority ones first."""
+        self.rbt.combination_assignment = "sorted"
+        bookings = self.env["resource.booking"].create(
+            [
+                {
+                    "partner_ids": [(4, self.partner.id)],
+                    "type_id": self.rbt.id,
+                    "prioritari": prioritari,
+                }
+                for prioritari in (False, False, True)
+            ]
+            + [
+                {
+                    "partner_ids": [(4, self.partner.id)],
+                    "type_id": self.rbt.id,
+                    "combination_auto_assign": False,
+                    "combination_id": self.rbcs[1].id,
+                }
+            ]
+        )
+        self.assertEqual(set(bookings.mapped("state")), {"pending"})
+        result = bookings.action_auto_schedule()
+        self.assertEqual(result["params"]["type"], "success")
+        self.assertEqual(set(bookings.mapped("state")), {"scheduled"})
+        self.assertEqual(len(bookings.meeting_id), 4)
+        # Mondays from 8:00, with 24 hours of modifications deadline
+        expected = [
+            ("2021-03-01 08:00:00", self.rbcs[2]),
+            ("2021-03-01 08:30:00", self.rbcs[0]),
+            ("2021-03-01 08:00:00", self.rbcs[0]),
+            ("2021-03-02 08:00:00", self.rbcs[1]),
+        ]
+        for booking, (start, combination) in zip(bookings, expected, strict=True):
+            self.assertEqual(booking.start, _2dt(start))
+            self.assertEqual(booking.combination_id, combination)
+        # Scheduled bookings are ignored
+        result = bookings.action_auto_schedule()
+        self.assertIn("0 of 0", result["params"]["message"])
+
+    def test_best_fit_assignment(self):
+        """Best fit keeps the largest free blocks of combinations."""
+        self.rbt.combination_assignment = "best_fit"
+        self.env["resource.booking"].create(
+            {
+                "partner_ids": [(4, self.partner.id)],
+                "start": "2021-03-01 10:00:00",
+                "duration": 7,
+                "type_id": self.rbt.id,
+                "combination_auto_assign": False,
+                "combination_id": self.rbcs[2].id,
+            }
+        )
+        # Sorted assignment would split the free day of the 1st combination
+        booking = self.env["resource.booking"].create(
+            {
+                "partner_ids": [(4, self.partner.id)],
+                "start": "2021-03-01 08:00:00",
+                "duration": 1,
+                "type_id": self.rbt.id,
+            }
+        )
+        self.assertEqual(booking.combination_id, self.rbcs[2])
+        # Bookings created together are assigned together
+        bookings = self.env["resource.booking"].create(
+            [
+                {
+                    "partner_ids": [(4, self.partner.id)],
+                    "start": start,
+                    "duration": 1,
+                    "type_id": self.rbt.id,
+                }
+                for start in ("2021-03-01 09:00:00", "2021-03-01 11:00:00")
+            ]
+        )
+        self.assertEqual(bookings[0].combination_id, self.rbcs[2])
+        self.assertEqual(bookings[1].combination_id, self.rbcs[0])
+
+    def test_balanced_assignment(self):
+        """Balanced assignment picks combinations with less booked hours."""
+        Load = self.env["resource.booking.combination.load"]
+        self.rbt.combination_assignment = "balanced"
+        booking = self.env["resource.booking"].create(
+            {
+                "partner_ids": [(4, self.partner.id)],
+                "start": "2021-03-01 08:00:00",
+                "duration": 2,
+                "type_id": self.rbt.id,
+                "combination_auto_assign": False,
+                "combination_id": self.rbcs[0].id,
+            }
+        )
+        self.env.cr.precommit.run()
+        self.assertEqual(self.rbcs[0].load_hours, 2)
+        self.assertEqual(
+            self.rbt._get_combinations_priorized(),
+            self.rbcs[1] + self.rbcs[2] + self.rbcs[3] + self.rbcs[0],
+        )
+        other = self.env["resource.booking"].create(
+            {
+                "partner_ids": [(4, self.partner.id)],
+                "start": "2021-03-08 08:00:00",
+                "duration": 1,
+                "type_id": self.rbt.id,
+            }
+        )
+        self.assertEqual(other.combination_id, self.rbcs[2])
+        self.env.cr.precommit.run()
+        self.assertEqual(self.rbcs[2].load_hours, 1)
+        # Days out of the load window are counted, but not balanced
+        booking.start = "2021-04-05 08:00:00"
+        self.env.cr.precommit.run()
+        self.assertEqual(self.rbcs[0].load_hours, 0)
+        counters = Load.search([("combination_id", "=", self.rbcs[0].id)])
+        self.assertEqual(counters.mapped("hours"), [2, 0])
+        # Rolling the window recounts it and drops empty counters
+        Load.search([("combination_id", "=", self.rbcs[2].id)]).hours = 5
+        self.assertEqual(self.rbcs[2].load_hours, 5)
+        Load._cron_roll()
+        self.assertEqual(self.rbcs[2].load_hours, 1)
+        counters = Load.search([("combination_id", "=", self.rbcs[0].id)])
+        self.assertEqual(counters.day, date(2021, 4, 5))
+
+    def test_reschedule_bulk(self):
+        """Many bookings are rescheduled together, or none of them."""
+        bookings = self.env["resource.booking"].create(
+            [
+                {
+                    "partner_ids": [(4, self.partner.id)],
+                    "start": start,
+                    "duration": 1,
+                    "type_id": self.rbt.id,
+                    "combination_auto_assign": False,
+                    "combination_id": self.rbcs[0].id,
+                }
+                for start in ("2021-03-01 08:00:00", "2021-03-01 09:00:00")
+            ]
+        )
+        # Each booking can take the slot that the other one leaves
+        result = bookings.reschedule_bulk(offset=1)
+        self.assertFalse(result["failures"])
+        self.assertEqual(len(result["rescheduled"]), 2)
+        self.assertEqual(
+            bookings.mapped("start"),
+            [_2dt("2021-03-01 09:00:00"), _2dt("2021-03-01 10:00:00")],
+        )
+        self.assertEqual(bookings.meeting_id.mapped("start"), bookings.mapped("start"))
+        # Sundays are not available, so nothing is moved
+        pending = self.env["resource.booking"].create(
+            {"partner_ids": [(4, self.partner.id)], "type_id": self.rbt.id}
+        )
+        result = bookings.reschedule_bulk(
+            [
+                (bookings[0], "2021-03-08 08:00:00"),
+                (bookings[1].id, "2021-03-07 08:00:00"),
+            ]
+        )
+        self.assertEqual(
+            result["failures"],
+            [{"id": bookings[1].id, "reason": "No combination is available."}],
+        )
+        self.assertFalse(result["rescheduled"])
+        self.assertEqual(bookings[0].start, _2dt("2021-03-01 09:00:00"))
+        # Failed final check is reported, and nothing is written
+        with patch.object(
+            type(bookings),
+            "_check_scheduling",
+            autospec=True,
+            side_effect=ValidationError("Conflict"),
+        ):
+            result = bookings.reschedule_bulk(offset=24)
+        self.assertFalse(result["rescheduled"])
+        self.assertEqual(
+            result["failures"],
+            [
+                {"id": bookings[0].id, "reason": "Conflict"},
+                {"id": bookings[1].id, "reason": "Conflict"},
+            ],
+        )
+        self.assertEqual(
+            bookings.mapped("start"),
+            [_2dt("2021-03-01 09:00:00"), _2dt("2021-03-01 10:00:00")],
+        )
+        self.assertEqual(bookings.meeting_id.mapped("start"), bookings.mapped("start"))
+        result = (bookings + pending).reschedule_bulk(offset=24)
+        self.assertEqual(
+            result["failures"], [{"id": pending.id, "reason": "It is not scheduled."}]
+        )
+        self.assertEqual(bookings[1].start, _2dt("2021-03-01 10:00:00"))
+
+    def test_booking_impact(self):
+        """Dry-run changes to find bookings they break, and reassign them."""
+        handpicked, auto = self.env["resource.booking"].create(
+            [
+                {
+                    "partner_ids": [(4, self.partner.id)],
+                    "start": "2021-03-01 08:00:00",
+                    "type_id": self.rbt.id,
+                    "combination_auto_assign": False,
+                    "combination_id": self.rbcs[0].id,
+                },
+                {
+                    "partner_ids": [(4, self.partner.id)],
+                    "start": "2021-03-01 10:00:00",
+                    "type_id": self.rbt.id,
+                    "combination_auto_assign": False,
+                    "combination_id": self.rbcs[0].id,
+                },
+            ]
+        )
+        auto.combination_auto_assign = True
+        Leaves = self.env["resource.calendar.leaves"]
+        leave_vals = {
+            "name": "Maintenance",
+            "calendar_id": self.r_calendars[0].id,
+            "resource_id": self.r_materials[0].id,
+            "date_from": "2021-03-01 07:00:00",
+            "date_to": "2021-03-01 12:00:00",
+        }
+        impact = Leaves.get_booking_impact(leave_vals)
+        self.assertEqual(
+            sorted((item["id"], item["combination_id"]) for item in impact),
+            sorted([(handpicked.id, False), (auto.id, self.rbcs[2].id)]),
+        )
+        # Nothing changed, and nothing is queued for committing
+        self.assertFalse(Leaves.search([("name", "=", "Maintenance")]))
+        self.assertFalse((handpicked | auto)._get_unfitting_bookings())
+        self.assertFalse(
+            self.env.cr.precommit.data.get("resource_booking.slots_changed")
+        )
+        # Leaves elsewhere break nothing
+        impact = Leaves.get_booking_impact(
+            dict(leave_vals, resource_id=self.r_materials[1].id)
+        )
+        self.assertFalse(impact)
+        impact = self.r_materials[0].get_booking_impact(
+            {"calendar_id": self.r_calendars[1].id}
+        )
+        self.assertEqual({item["id"] for item in impact}, {handpicked.id, auto.id})
+        self.assertEqual(self.r_materials[0].calendar_id, self.r_calendars[0])
+        # Changes in the type calendar break bookings on any combination
+        type_calendar = self.rbt.resource_calendar_id
+        self.assertNotIn(type_calendar, self.rbcs[0].resource_ids.calendar_id)
+        impact = Leaves.get_booking_impact(
+            dict(leave_vals, calendar_id=type_calendar.id, resource_id=False)
+        )
+        self.assertEqual(
+            sorted((item["id"], item["combination_id"]) for item in impact),
+            sorted([(handpicked.id, False), (auto.id, False)]),
+        )
+        impact = type_calendar.get_booking_impact({"attendance_ids": [(5, 0, 0)]})
+        self.assertEqual({item["id"] for item in impact}, {handpicked.id, auto.id})
+        self.assertTrue(type_calendar.attendance_ids)
+        # Apply the change and move what can be moved
+        Leaves.with_context(defer_scheduling_check=True).create(leave_vals)
+        auto.action_reassign_combinations()
+        self.assertEqual(auto.combination_id, self.rbcs[2])
+        action = handpicked.action_reassign_combinations()
+        self.assertEqual(action["params"]["type"], "warning")
+        self.assertEqual(handpicked.combination_id, self.rbcs[0])
+
+    def test_auto_reassignment(self):
+        """Leaves and combination changes move auto-assigned bookings."""
+        self.rbt.combination_assignment = "sorted"
+        booking, later = self.env["resource.booking"].create(
+            [
+                {
+                    "partner_ids": [(4, self.partner.id)],
+                    "start": start,
+                    "type_id": self.rbt.id,
+                }
+                for start in ("2021-03-01 10:00:00", "2021-03-08 10:00:00")
+            ]
+        )
+        self.assertEqual((booking | later).combination_id, self.rbcs[0])
+        Leaves = self.env["resource.calendar.leaves"]
+        Leaves.create(
+            {
+                "name": "Maintenance",
+                "calendar_id": self.r_calendars[0].id,
+                "resource_id": self.r_materials[0].id,
+                "date_from": "2021-03-01 07:00:00",
+                "date_to": "2021-03-01 12:00:00",
+            }
+        )
+        self.assertEqual(booking.combination_id, self.rbcs[2])
+        self.assertEqual(later.combination_id, self.rbcs[0])
+        # No other combination is free, so the organizer must reschedule it
+        sick = Leaves.create(
+            {
+                "name": "Sick",
+                "calendar_id": self.r_calendars[2].id,
+                "resource_id": self.r_users[2].id,
+                "date_from": "2021-03-01 09:00:00",
+                "date_to": "2021-03-01 11:00:00",
+            }
+        )
+        self.assertTrue(sick.exists())
+        self.assertEqual(booking.combination_id, self.rbcs[2])
+        self.assertEqual(booking.activity_ids.summary, "Reschedule this booking")
+        # Only working on Tuesdays, the combination cannot keep Mondays
+        self.rbcs[0].resource_ids = [(4, self.r_materials[1].id)]
+        self.assertEqual(later.combination_id, self.rbcs[2])
+
+    def test_booking_series(self):
+        """Series book their occurrences at once, reporting conflicts."""
+        self.rbt.combination_assignment = "sorted"
+        self.env["resource.calendar.leaves"].create(
+            {
+                "name": "Holiday",
+                "calendar_id": self.r_calendars[2].id,
+                "date_from": "2021-03-15 00:00:00",
+                "date_to": "2021-03-15 23:59:59",
+            }
+        )
+        self.env["resource.booking"].create(
+            {
+                "partner_ids": [(4, self.partner.id)],
+                "start": "2021-03-22 10:00:00",
+                "type_id": self.rbt.id,
+                "combination_auto_assign": False,
+                "combination_id": self.rbcs[0].id,
+            }
+        )
+        series = self.env["resource.booking.series"].create(
+            {
+                "partner_ids": [(4, self.partner.id)],
+                "type_id": self.rbt.id,
+                "start": "2021-03-01 10:00:00",
+                "count": 4,
+            }
+        )
+        result = series._generate_bookings()
+        bookings = result["bookings"].sorted("start")
+        self.assertEqual(
+            bookings.mapped("start"),
+            [
+                _2dt("2021-03-01 10:00:00"),
+                _2dt("2021-03-08 10:00:00"),
+                _2dt("2021-03-22 10:00:00"),
+            ],
+        )
+        self.assertEqual(
+            bookings.mapped("combination_id"), self.rbcs[0] | self.rbcs[2]
+        )
+        self.assertEqual(bookings[2].combination_id, self.rbcs[2])
+        self.assertEqual(set(bookings.mapped("state")), {"scheduled"})
+        self.assertEqual(series.booking_ids, bookings)
+        self.assertEqual(
+            [(c["start"], c["reason"]) for c in result["conflicts"]],
+            [(_2dt("2021-03-15 10:00:00"), "No combination is available.")],
+        )
+        self.assertTrue(series.conflicts)
+        # Booked occurrences are not booked again
+        result = series._generate_bookings()
+        self.assertFalse(result["bookings"])
+        self.assertEqual(len(result["conflicts"]), 1)
+
+    def test_occupancy_cron_refresh(self):
+        """Analytics are refreshed only when bookings or meetings change."""
+        Occupancy = self.env["resource.booking.occupancy"]
+        self.env["resource.booking"].create(
+            {
+                "partner_ids": [(4, self.partner.id)],
+                "start": "2021-03-01 08:00:00",
+                "duration": 1.5,
+                "type_id": self.rbt.id,
+                "combination_auto_assign": False,
+                "combination_id": self.rbcs[0].id,
+            }
+        )
+        self.env["calendar.event"].create(
+            {
+                "name": "Some meeting",
+                "start": "2021-03-01 12:00:00",
+                "stop": "2021-03-01 13:00:00",
+                "partner_ids": [(6, 0, self.users[0].partner_id.ids)],
+            }
+        )
+        Occupancy._cron_refresh()
+        occupancy = Occupancy.search(
+            [("resource_id", "=", self.r_users[0].id), ("day", "=", "2021-03-01")]
+        )
+        self.assertEqual(occupancy.booking_count, 1)
+        self.assertEqual(occupancy.booked_hours, 1.5)
+        self.assertEqual(occupancy.meeting_hours, 1)
+        self.assertEqual(occupancy.occupied_hours, 2.5)
+        logger = "odoo.addons.resource_booking.models."
+        logger += "resource_booking_materialized_view"
+        with self.assertLogs(logger, "DEBUG") as logs:
+            Occupancy._cron_refresh()
+        self.assertEqual(
+            logs.output, [f"DEBUG:{logger}:Booking analytics are up to date"]
+        )
+        self.env["calendar.event"].search([("name", "=", "Some meeting")]).unlink()
+        with self.assertLogs(logger, "INFO") as logs:
+            Occupancy._cron_refresh()
+        # Utilization and occupancy
+        self.assertEqual(len(logs.output), 2)
+        occupancy = Occupancy.search(
+            [("resource_id", "=", self.r_users[0].id), ("day", "=", "2021-03-01")]
+        )
+        self.assertEqual(occupancy.occupied_hours, 1.5)
+
+    def test_work_intervals_cache(self):
+        """Work intervals are cached until attendances or leaves change."""
+        calendar = self.r_calendars[0]
+        start_dt = utc.localize(datetime(2021, 3, 1))
+        end_dt = utc.localize(datetime(2021, 3, 2))
+        calendar._invalidate_work_intervals_cache()
+        hits = metrics.CACHE_REQUESTS.get(cache="work_intervals", result="hit")
+        first = calendar._work_intervals_batch(start_dt, end_dt, self.r_materials[0])
+        second = calendar._work_intervals_batch(start_dt, end_dt, self.r_materials[0])
+        self.assertEqual(
+            metrics.CACHE_REQUESTS.get(cache="work_intervals", result="hit"), hits + 1
+        )
+        self.assertEqual(
+            list(first[self.r_materials[0].id]), list(second[self.r_materials[0].id])
+        )
+        self.assertGreater(metrics.CACHE_BYTES.get(cache="work_intervals"), 0)
+        self.env["resource.calendar.leaves"].create(
+            {
+                "name": "Maintenance",
+                "calendar_id": calendar.id,
+                "resource_id": self.r_materials[0].id,
+                "date_from": "2021-03-01 08:00:00",
+                "date_to": "2021-03-01 12:00:00",
+            }
+        )
+        third = calendar._work_intervals_batch(start_dt, end_dt, self.r_materials[0])
+        self.assertEqual(
+            [(item[0].hour, item[1].hour) for item in third[self.r_materials[0].id]],
+            [(12, 17)],
+        )
+        # Busy meetings are not cached
+        self.env["resource.booking"].create(
+            {
+                "partner_ids": [(4, self.partner.id)],
+                "start": "2021-03-01 12:00:00",
+                "type_id": self.rbt.id,
+                "combination_auto_assign": False,
+                "combination_id": self.rbcs[0].id,
+            }
+        )
+        self.assertFalse(
+            self.r_materials[0].is_available(
+                utc.localize(datetime(2021, 3, 1, 12)),
+                utc.localize(datetime(2021, 3, 1, 12, 30)),
+            )
+        )
+        # Constraints use fresh intervals when the resource timezone changes
+        booking = self.env["resource.booking"].create(
+            {
+                "partner_ids": [(4, self.partner.id)],
+                "start": "2021-03-08 10:00:00",
+                "type_id": self.rbt.id,
+                "combination_auto_assign": False,
+                "combination_id": self.rbcs[0].id,
+            }
+        )
+        self.assertFalse(booking._get_unfitting_bookings())
+        with self.assertRaises(ValidationError), self.env.cr.savepoint():
+            self.r_materials[0].tz = "Asia/Tokyo"
+        # Tiny budgets evict old entries
+        cache = LRUCache("test", max_bytes=1000)
+        cache.put("a", "x" * 400)
+        cache.put("b", "y" * 400)
+        cache.put("c", "z" * 400)
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.get("c"), "z" * 400)
+        stats = cache.stats()
+        self.assertLessEqual(stats["bytes"], 1000)
+        self.assertTrue(stats["evictions"])
+        self.assertEqual(stats["hit_rate"], 0.5)
+
+    def test_offline_availability_engine(self):
+        """The offline engine agrees with the ORM."""
+        self.rbt.combination_assignment = "sorted"
+        # Make resources busy with a booking, a leave and a meeting
+        self.env["resource.booking"].create(
+            {
+                "partner_ids": [(4, self.partner.id)],
+                "start": "2021-03-01 08:00:00",
+                "type_id": self.rbt.id,
+            }
+        )
+        self.env["resource.calendar.leaves"].create(
+            {
+                "name": "Dentist",
+                "calendar_id": self.r_calendars[2].id,
+                "resource_id": self.r_users[2].id,
+                "date_from": "2021-03-02 10:00:00",
+                "date_to": "2021-03-02 12:00:00",
+            }
+        )
+        self.env["calendar.event"].create(
+            {
+                "name": "Some meeting",
+                "start": "2021-03-08 14:00:00",
+                "stop": "2021-03-08 15:00:00",
+                "user_id": self.users[0].id,
+                "partner_ids": [(6, 0, self.users[0].partner_id.ids)],
+            }
+        )
+        booking = self.env["resource.booking"].create(
+            {"partner_ids": [(4, self.partner.id)], "type_id": self.rbt.id}
+        )
+        start_dt = utc.localize(datetime(2021, 2, 1))
+        end_dt = utc.localize(datetime(2021, 4, 1))
+        engine = AvailabilityEngine(
+            self.rbt._get_availability_snapshot(start_dt, end_dt)
+        )
+        self.assertEqual(
+            engine.available_slots(
+                self.rbt.id,
+                start_dt,
+                end_dt,
+                fields.Datetime.now(),
+                booking_id=booking.id,
+            ),
+            booking._get_available_slots(start_dt, end_dt),
+        )
+        for start in ("2021-03-01 08:00:00", "2021-03-02 10:00:00"):
+            candidate = booking.new({"start": start}, origin=booking)
+            slot_start = utc.localize(_2dt(start))
+            self.assertEqual(
+                engine.best_combination(
+                    self.rbt.id,
+                    slot_start,
+                    slot_start + relativedelta(minutes=30),
+                    booking_id=booking.id,
+                ),
+                candidate._get_best_combination().id or None,
+            )
+
+    def test_precomputed_availability(self):
+        """Precomputed slots match live ones until something changes."""
+        Availability = self.env["resource.booking.availability"]
+        booking = self.env["resource.booking"].create(
+            {"partner_ids": [(4, self.partner.id)], "type_id": self.rbt.id}
+        )
+        start_dt = utc.localize(datetime(2021, 3, 1))
+        end_dt = utc.localize(datetime(2021, 4, 1))
+        self.assertIsNone(Availability._get_slots(booking, start_dt, end_dt))
+        Availability._precompute(self.rbt)
+        self.assertEqual(
+            Availability.search_count([("type_id", "=", self.rbt.id)]),
+            90 * len(self.rbcs),
+        )
+        live = booking._get_available_slots(start_dt, end_dt)
+        candidate = booking.new({"start": "2021-03-02 08:00:00"}, origin=booking)
+        with patch.object(type(booking), "_get_intervals", side_effect=AssertionError):
+            self.assertEqual(booking._get_available_slots(start_dt, end_dt), live)
+            self.assertIn(
+                candidate._get_best_combination(), self.rbcs[1] | self.rbcs[2]
+            )
+        # Booking a slot refreshes its day before committing
+        other = self.env["resource.booking"].create(
+            {
+                "partner_ids": [(4, self.partner.id)],
+                "start": "2021-03-01 08:00:00",
+                "type_id": self.rbt.id,
+            }
+        )
+        self.assertIsNone(Availability._get_slots(booking, start_dt, end_dt))
+        self.env.cr.precommit.run()
+        # Refreshed cells reach the database, as there is no later flush
+        self.env.invalidate_all(flush=False)
+        self.assertEqual(
+            Availability.search_count([("type_id", "=", self.rbt.id)]),
+            90 * len(self.rbcs),
+        )
+        live = booking._get_available_slots(start_dt, end_dt)
+        self.assertEqual(Availability._get_slots(booking, start_dt, end_dt), live)
+        # Moving its meeting refreshes its day too
+        other.meeting_id.write(
+            {"start": "2021-03-01 09:00:00", "stop": "2021-03-01 09:30:00"}
+        )
+        self.env.cr.precommit.run()
+        live = booking._get_available_slots(start_dt, end_dt)
+        self.assertEqual(Availability._get_slots(booking, start_dt, end_dt), live)
+        # Cancelling it frees the slot again
+        other.action_cancel()
+        self.env.cr.precommit.run()
+        live = booking._get_available_slots(start_dt, end_dt)
+        self.assertEqual(Availability._get_slots(booking, start_dt, end_dt), live)
+
+    def test_precomputed_availability_bitmaps(self):
+        """Days whose slots do not fit in a grid are computed live."""
+        Availability = self.env["resource.booking.availability"]
+        self.env["resource.calendar.leaves"].create(
+            {
+                "name": "Late start",
+                "calendar_id": self.r_calendars[2].id,
+                "resource_id": self.r_users[2].id,
+                "date_from": "2021-03-01 08:00:00",
+                "date_to": "2021-03-01 08:10:00",
+            }
+        )
+        Availability._precompute(self.rbt)
+        rows = Availability.search(
+            [("type_id", "=", self.rbt.id), ("day", "=", "2021-03-02")]
+        )
+        self.assertEqual(set(rows.mapped("step")), {30})
+        self.assertEqual(set(rows.mapped("anchor")), {0})
+        # Tuesdays 8:00-17:00, 18 slots, in 2 combinations
+        self.assertEqual(sorted(rows.mapped("slot_count")), [0, 0, 18, 18])
+        self.assertEqual(
+            rows.filtered("slot_count").mapped("bitmap"), ["3ffff0000"] * 2
+        )
+        misaligned = Availability.search(
+            [("type_id", "=", self.rbt.id), ("day", "=", "2021-03-01")]
+        )
+        self.assertFalse(any(misaligned.mapped("bitmap")))
+        booking = self.env["resource.booking"].create(
+            {"partner_ids": [(4, self.partner.id)], "type_id": self.rbt.id}
+        )
+        tuesday = utc.localize(datetime(2021, 3, 2))
+        self.assertEqual(
+            Availability._get_slots(booking, tuesday, tuesday + relativedelta(days=1)),
+            booking._get_available_slots(tuesday, tuesday + relativedelta(days=1)),
+        )
+        self.assertIsNone(
+            Availability._get_slots(booking, tuesday - relativedelta(days=1), tuesday)
+        )
+        candidate = booking.new({"start": "2021-03-01 08:10:00"}, origin=booking)
+        self.assertIn(candidate._get_best_combination(), self.rbcs[0] | self.rbcs[2])
+
+    def test_precomputed_availability_edge_days(self):
+        """Refreshed edge days keep leaves outside their UTC days."""
+        Availability = self.env["resource.booking.availability"]
+        tz = "Etc/GMT-12"  # UTC+12, without daylight saving time
+        calendar = self.env["resource.calendar"].create(
+            {
+                "name": "Everyday UTC+12",
+                "tz": tz,
+                "attendance_ids": [
+                    (
+                        0,
+                        0,
+                        {
+                            "name": str(dayofweek),
+                            "dayofweek": str(dayofweek),
+                            "hour_from": 8,
+                            "hour_to": 17,
+                            "day_period": "morning",
+                        },
+                    )
+                    for dayofweek in range(7)
+                ],
+            }
+        )
+        resource = self.env["resource.resource"].create(
+            {
+                "name": "Material resource UTC+12",
+                "calendar_id": calendar.id,
+                "resource_type": "material",
+                "tz": tz,
+            }
+        )
+        combination = self.env["resource.booking.combination"].create(
+            {"resource_ids": [(6, 0, resource.ids)]}
+        )
+        booking_type = self.env["resource.booking.type"].create(
+            {
+                "name": "UTC+12 type",
+                "combination_rel_ids": [(0, 0, {"combination_id": combination.id})],
+                "resource_calendar_id": calendar.id,
+            }
+        )
+        # Tuesday 08:00-10:00 local time, which is Monday in UTC
+        self.env["resource.calendar.leaves"].create(
+            {
+                "name": "Maintenance",
+                "calendar_id": calendar.id,
+                "resource_id": resource.id,
+                "date_from": "2021-03-01 20:00:00",
+                "date_to": "2021-03-01 22:00:00",
+            }
+        )
+        Availability._precompute(booking_type)
+        pending = self.env["resource.booking"].create(
+            {"partner_ids": [(4, self.partner.id)], "type_id": booking_type.id}
+        )
+        start_dt = timezone(tz).localize(datetime(2021, 3, 2))
+        end_dt = start_dt + relativedelta(days=1)
+        live = pending._get_available_slots(start_dt, end_dt)
+        self.assertEqual(Availability._get_slots(pending, start_dt, end_dt), live)
+        # Thursday 10:00 local time, so Tuesday is refreshed as an edge day
+        self.env["resource.booking"].create(
+            {
+                "partner_ids": [(4, self.partner.id)],
+                "start": "2021-03-03 22:00:00",
+                "type_id": booking_type.id,
+            }
+        )
+        self.env.cr.precommit.run()
+        self.assertEqual(Availability._get_slots(pending, start_dt, end_dt), live)
+
 
 class TestMailActivity(TransactionCase):
     @classmethod
@@ -0,0 +1,240 @@
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+"""Availability engine benchmarks under synthetic load.
+
+These tests are not run by default. Run them with
+``--test-tags resource_booking_benchmark``, and tune them with these
+environment variables:
+
+- ``RESOURCE_BOOKING_BENCHMARK_RESOURCES``: amount of resources (40).
+- ``RESOURCE_BOOKING_BENCHMARK_COMBINATIONS``: combinations in the type (20).
+- ``RESOURCE_BOOKING_BENCHMARK_BOOKINGS``: existing bookings (200).
+- ``RESOURCE_BOOKING_BENCHMARK_WEEKS``: weeks of recurring meetings (8).
+- ``RESOURCE_BOOKING_BENCHMARK_REPEAT``: runs of each measurement (3).
+- ``RESOURCE_BOOKING_BENCHMARK_OUTPUT``: path to write JSON results to.
+  If missing, results are logged.
+"""
+
+import json
+import logging
+import os
+import statistics
+import time
+from datetime import datetime
+
+from freezegun import freeze_time
+from pytz import utc
+
+from odoo import release
+from odoo.tests import new_test_user, tagged
+from odoo.tests.common import HttpCase
+
+from .common import create_benchmark_data
+
+_logger = logging.getLogger(__name__)
+
+
+def _env_int(name, default):
+    return int(os.environ.get("RESOURCE_BOOKING_BENCHMARK_%s" % name, default))
+
+
+@freeze_time("2021-02-26 09:00:00", tick=True)
+@tagged("post_install", "-at_install", "-standard", "resource_booking_benchmark")
+class BenchmarkCase(HttpCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.sizes = {
+            "resources": _env_int("RESOURCES", 40),
+            "combinations": _env_int("COMBINATIONS", 20),
+            "bookings": _env_int("BOOKINGS", 200),
+            "weeks": _env_int("WEEKS", 8),
+        }
+        cls.repeat = _env_int("REPEAT", 3)
+        cls.results = []
+        started = time.perf_counter()
+        create_benchmark_data(cls, **cls.sizes)
+        cls.setup_ms = (time.perf_counter() - started) * 1000
+        cls.user_portal = new_test_user(
+            cls.env, login="bench_ptl", password="bench_ptl", groups="base.group_portal"
+        )
+        cls.pending = cls.env["resource.booking"].create(
+            {
+                "partner_ids": [(4, cls.user_portal.partner_id.id)],
+                "type_id": cls.bench_rbt.id,
+            }
+        )
+        cls.month_start = utc.localize(datetime(2021, 3, 1))
+        cls.month_end = utc.localize(datetime(2021, 4, 1))
+
+    @classmethod
+    def tearDownClass(cls):
+        report = {
+            "odoo": release.version,
+            "sizes": cls.sizes,
+            "repeat": cls.repeat,
+            "setup_ms": round(cls.setup_ms, 3),
+            "results": sorted(cls.results, key=lambda result: result["name"]),
+        }
+        output = os.environ.get("RESOURCE_BOOKING_BENCHMARK_OUTPUT")
+        if output:
+            with open(output, "w") as output_file:
+                json.dump(report, output_file, indent=2)
+        else:
+            _logger.info("Benchmark results: %s", json.dumps(report))
+        super().tearDownClass()
+
+    def _measure(self, name, function):
+        """Time some function with cold caches and store the results."""
+        timings = []
+        queries = 0
+        for _ in range(self.repeat):
+            self.env.invalidate_all()
+            sql_count = self.env.cr.sql_log_count
+            started = time.perf_counter()
+            result = function()
+            timings.append((time.perf_counter() - started) * 1000)
+            queries = self.env.cr.sql_log_count - sql_count
+        self.results.append(
+            {
+                "name": name,
+                "min_ms": round(min(timings), 3),
+                "median_ms": round(statistics.median(timings), 3),
+                "max_ms": round(max(timings), 3),
+                "queries": queries,
+            }
+        )
+        return result
+
+    def test_get_available_slots(self):
+        slots = self._measure(
+            "resource.booking._get_available_slots",
+            lambda: self.pending._get_available_slots(
+                self.month_start, self.month_end
+            ),
+        )
+        self.assertTrue(slots)
+
+    def test_get_best_combination(self):
+        # The 1st slot of the 1st day is taken in some combination
+        candidate = self.pending.new(
+            {"start": "2021-03-01 08:00:00"}, origin=self.pending
+        )
+        combination = self._measure(
+            "resource.booking._get_best_combination",
+            candidate._get_best_combination,
+        )
+        self.assertIn(combination, self.bench_rbcs)
+        self.assertNotIn(
+            combination,
+            self.bench_bookings.filtered(
+                lambda booking: booking.start == datetime(2021, 3, 1, 8)
+            ).combination_id,
+        )
+
+    def test_check_scheduling(self):
+        self._measure(
+            "resource.booking._check_scheduling",
+            self.bench_bookings._check_scheduling,
+        )
+
+    def test_is_available(self):
+        start_dt = utc.localize(datetime(2021, 3, 1, 18))
+        end_dt = utc.localize(datetime(2021, 3, 1, 19))
+        resources = self.bench_r_users + self.bench_r_materials
+        available = self._measure(
+            "resource.resource.is_available",
+            lambda: [
+                resource.is_available(start_dt, end_dt) for resource in resources
+            ],
+        )
+        # Users meeting on Mondays are busy
+        self.assertFalse(available[0])
+        self.assertTrue(available[len(self.bench_r_users)])
+
+    def test_portal_schedule(self):
+        url = self.pending.get_portal_url(suffix="/schedule/2021/3")
+        response = self._measure(
+            "portal /my/bookings/<id>/schedule", lambda: self.url_open(url, timeout=60)
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def _create_always_open(self):
+        """Create a type with 24/7 calendars and some multi-day bookings."""
+        calendar = self.env["resource.calendar"].create(
+            {
+                "name": "24/7",
+                "tz": "UTC",
+                "attendance_ids": [
+                    (
+                        0,
+                        0,
+                        {
+                            "name": "Day %d" % day,
+                            "dayofweek": str(day),
+                            "hour_from": 0,
+                            "hour_to": 24,
+                            "day_period": "morning",
+                        },
+                    )
+                    for day in range(7)
+                ],
+            }
+        )
+        materials = self.env["resource.resource"].create(
+            [
+                {
+                    "calendar_id": calendar.id,
+                    "name": "Always open %d" % num,
+                    "resource_type": "material",
+                    "tz": "UTC",
+                }
+                for num in range(self.sizes["combinations"])
+            ]
+        )
+        combinations = self.env["resource.booking.combination"].create(
+            [{"resource_ids": [(6, 0, material.ids)]} for material in materials]
+        )
+        booking_type = self.env["resource.booking.type"].create(
+            {
+                "name": "Always open",
+                "combination_assignment": "sorted",
+                "combination_rel_ids": [
+                    (0, 0, {"sequence": num, "combination_id": combination.id})
+                    for num, combination in enumerate(combinations)
+                ],
+                "duration": 24 * 3,
+                "resource_calendar_id": calendar.id,
+                "slot_duration": 24,
+            }
+        )
+        bookings = self.env["resource.booking"].create(
+            [
+                {
+                    "partner_ids": [(4, self.bench_partner.id)],
+                    "start": datetime(2021, 3, 1 + 3 * (num % 9)),
+                    "type_id": booking_type.id,
+                    "combination_auto_assign": False,
+                    "combination_id": combination.id,
+                }
+                for num, combination in enumerate(combinations)
+            ]
+        )
+        pending = self.env["resource.booking"].create(
+            {
+                "partner_ids": [(4, self.user_portal.partner_id.id)],
+                "type_id": booking_type.id,
+            }
+        )
+        return bookings, pending
+
+    def test_always_open(self):
+        """Multi-day bookings in 24/7 calendars."""
+        bookings, pending = self._create_always_open()
+        slots = self._measure(
+            "resource.booking._get_available_slots (24/7)",
+            lambda: pending._get_available_slots(self.month_start, self.month_end),
+        )
+        self.assertTrue(slots)
+        self._measure(
+            "resource.booking._check_scheduling (24/7)", bookings._check_scheduling
+        )
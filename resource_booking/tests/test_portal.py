@@ -3,6 +3,7 @@
 # License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
 
 from datetime import datetime
+from unittest.mock import patch
 
 from freezegun import freeze_time
 from lxml.html import fromstring
@@ -10,6 +11,8 @@ from lxml.html import fromstring
 from odoo.tests import new_test_user, tagged
 from odoo.tests.common import HttpCase
 
+from odoo.addons.resource_booking.controllers.portal import CustomerPortal
+
 from .common import create_test_data
 
 
@@ -49,6 +52,42 @@ class PortalCase(HttpCase):
         )
         self.start_tour("/", "resource_booking_ptl2_tour", login="ptl")
 
+    def test_portal_list_keyset_pagination(self):
+        """Deep pages list every booking once, in the expected order."""
+        Booking = self.env["resource.booking"]
+        pending = Booking.create(
+            [
+                {
+                    "partner_ids": [(4, self.user_portal.partner_id.id)],
+                    "type_id": self.rbt.id,
+                }
+                for _ in range(3)
+            ]
+        )
+        scheduled = Booking.create(
+            [
+                {
+                    "partner_ids": [(4, self.user_portal.partner_id.id)],
+                    "type_id": self.rbt.id,
+                    "start": start,
+                }
+                for start in ("2021-03-01 08:00:00", "2021-03-08 08:00:00")
+            ]
+        )
+        expected = pending.sorted("id", reverse=True) + scheduled.sorted(
+            "start", reverse=True
+        )
+        self.authenticate("ptl", "ptl")
+        listed = []
+        with patch.object(CustomerPortal, "_items_per_page", 2):
+            for page in range(1, 4):
+                page_xml = self._url_xml("/my/bookings/page/%d" % page)
+                listed += [
+                    int(link.get("href").split("?")[0].rsplit("/", 1)[1])
+                    for link in page_xml.cssselect(".tr_resource_booking_link")
+                ]
+        self.assertEqual(listed, expected.ids)
+
     def test_portal_scheduling_conflict(self):
         """Produce a scheduling conflict and see how UI behaves.
 
@@ -260,3 +299,42 @@ class PortalCase(HttpCase):
         portal_url = link.get("href")
         portal_page = self._url_xml(portal_url)
         self.assertTrue(portal_page.cssselect(".oe_login_form"))
+
+    def test_portal_instrumentation(self):
+        """The system parameter adds timings to responses."""
+        booking = self.env["resource.booking"].create(
+            {
+                "partner_ids": [(4, self.user_portal.partner_id.id)],
+                "type_id": self.rbt.id,
+            }
+        )
+        url = booking.get_portal_url(suffix="/schedule/2021/3")
+        response = self.url_open(url)
+        self.assertNotIn("Server-Timing", response.headers)
+        self.env["ir.config_parameter"].set_param(
+            "resource_booking.instrumentation", "1"
+        )
+        response = self.url_open(url)
+        self.assertIn(
+            "resource.booking._get_available_slots;dur=",
+            response.headers["Server-Timing"],
+        )
+
+    def test_portal_metrics(self):
+        """Metrics are exposed to managers and token bearers only."""
+        url = "/resource_booking/metrics"
+        self.assertEqual(self.url_open(url).status_code, 403)
+        self.env["ir.config_parameter"].set_param(
+            "resource_booking.metrics_token", "s3cr3t"
+        )
+        response = self.url_open(url, headers={"Authorization": "Bearer wrong"})
+        self.assertEqual(response.status_code, 403)
+        response = self.url_open(url, headers={"Authorization": "Bearer s3cr3t"})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(
+            "# TYPE resource_booking_slot_generation_seconds histogram", response.text
+        )
+        self.authenticate("mgr", "mgr")
+        response = self.url_open(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("resource_booking_check_scheduling_total", response.text)
@@ -0,0 +1,187 @@
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+from datetime import datetime, timedelta
+from itertools import count
+
+from freezegun import freeze_time
+
+from odoo.tests import new_test_user, tagged
+from odoo.tests.common import HttpCase, TransactionCase
+
+from .common import create_test_data
+
+BATCH_SIZES = (1, 10, 100)
+# Queries that bigger batches may add for reasons unrelated to their size,
+# such as prefetching in chunks
+MAX_GROWTH = 5
+# Queries each scheduled booking needs, without mail tracking: checking its
+# availability, and writing it and its meeting
+CREATE_SCHEDULED_QUERIES = 12
+AUTO_SCHEDULE_QUERIES = 4
+
+
+def _free_starts():
+    """Yield slot starts that fit the test type, one per slot."""
+    first_monday = datetime(2021, 3, 1, 8)
+    for week in count():
+        for day in (0, 1):
+            for slot in range(18):
+                yield first_monday + timedelta(days=week * 7 + day, minutes=30 * slot)
+
+
+class QueryCountMixin:
+    def _count_queries(self, function):
+        """Count queries done by some function, including pending flushes."""
+        self.env.flush_all()
+        sql_count = self.env.cr.sql_log_count
+        function()
+        self.env.flush_all()
+        return self.env.cr.sql_log_count - sql_count
+
+    def _assert_constant(self, counts):
+        """Set-based paths must not do more queries for bigger batches."""
+        one, ten, hundred = counts
+        self.assertLessEqual(hundred - one, MAX_GROWTH, counts)
+
+    def _assert_per_booking(self, counts, queries):
+        """Paths that work per booking must stay within their budget."""
+        one, ten, hundred = counts
+        self.assertLessEqual(hundred - ten, queries * 90 + MAX_GROWTH, counts)
+
+
+@freeze_time("2021-02-26 09:00:00", tick=True)
+class QueryCountCase(QueryCountMixin, TransactionCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        create_test_data(cls)
+
+    def setUp(self):
+        super().setUp()
+        self.starts = _free_starts()
+        # Deterministic assignment, and only queries of this addon
+        self.rbt.combination_assignment = "sorted"
+        self.env = self.env(
+            context=dict(self.env.context, tracking_disable=True, mail_notrack=True)
+        )
+
+    def _create(self, size, scheduled=False):
+        return self.env["resource.booking"].create(
+            [
+                {
+                    "partner_ids": [(4, self.partner.id)],
+                    "start": scheduled and next(self.starts),
+                    "type_id": self.rbt.id,
+                }
+                for _ in range(size)
+            ]
+        )
+
+    def test_create_pending(self):
+        self._assert_constant(
+            [self._count_queries(lambda: self._create(size)) for size in BATCH_SIZES]
+        )
+
+    def test_create_scheduled(self):
+        self._assert_per_booking(
+            [
+                self._count_queries(lambda: self._create(size, True))
+                for size in BATCH_SIZES
+            ],
+            CREATE_SCHEDULED_QUERIES,
+        )
+
+    def test_auto_schedule(self):
+        """Batch scheduling shares one snapshot and one meeting creation."""
+        batches = [self._create(size) for size in BATCH_SIZES]
+        self._assert_per_booking(
+            [self._count_queries(batch.action_auto_schedule) for batch in batches],
+            AUTO_SCHEDULE_QUERIES,
+        )
+        self.assertFalse(
+            sum(batches, self.env["resource.booking"]).filtered(
+                lambda booking: booking.state == "pending"
+            )
+        )
+
+    def test_confirm(self):
+        batches = [self._create(size, True) for size in BATCH_SIZES]
+        self._assert_constant(
+            [self._count_queries(batch.action_confirm) for batch in batches]
+        )
+
+    def test_cancel(self):
+        """Cancelling is set-based."""
+        batches = [self._create(size, True) for size in BATCH_SIZES]
+        baseline = self._count_queries(batches[0].action_cancel)
+        for batch in batches[1:]:
+            with self.assertQueryCount(baseline):
+                batch.action_cancel()
+        self.assertFalse(sum(batches, self.env["resource.booking"]).meeting_id)
+
+
+@freeze_time("2021-02-26 09:00:00", tick=True)
+@tagged("post_install", "-at_install")
+class PortalQueryCountCase(QueryCountMixin, HttpCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        create_test_data(cls)
+        cls.user_portal = new_test_user(
+            cls.env, login="ptl", password="ptl", groups="base.group_portal"
+        )
+
+    def _create(self, size, partner, scheduled=False):
+        starts = _free_starts()
+        return self.env["resource.booking"].create(
+            [
+                {
+                    "partner_ids": [(4, partner.id)],
+                    "start": scheduled and next(starts),
+                    "type_id": self.rbt.id,
+                }
+                for _ in range(size)
+            ]
+        )
+
+    def _create_listed(self, size):
+        """Create bookings with their own name, attendees and meeting each."""
+        bookings = self._create(size, self.user_portal.partner_id, True)
+        for index, booking in enumerate(bookings):
+            booking.write(
+                {"name": "Booking %d" % index, "partner_ids": [(4, self.partner.id)]}
+            )
+        self.assertTrue(all(bookings.mapped("meeting_id")))
+        return bookings
+
+    def test_my_bookings(self):
+        """The bookings list costs the same regardless of its length.
+
+        Rows have names, attendees and meetings, so reading or computing any
+        of them per row would add queries.
+        """
+        bookings = self._create_listed(1)
+        # Fresh sessions, so the cached count is never reused
+        self.authenticate("ptl", "ptl")
+        baseline = self._count_queries(lambda: self.url_open("/my/bookings"))
+        for size in BATCH_SIZES[1:]:
+            bookings.unlink()
+            bookings = self._create_listed(size)
+            self.authenticate("ptl", "ptl")
+            with self.assertQueryCount(baseline):
+                response = self.url_open("/my/bookings")
+            self.assertEqual(response.status_code, 200)
+            self.assertIn(bookings[-1].name.encode(), response.content)
+
+    def test_schedule_page(self):
+        """The schedule page costs the same regardless of busy bookings."""
+        pending = self._create(1, self.user_portal.partner_id)
+        url = pending.get_portal_url(suffix="/schedule/2021/3")
+        others = self._create(1, self.partner, True)
+        baseline = self._count_queries(lambda: self.url_open(url))
+        for size in BATCH_SIZES[1:]:
+            others.unlink()
+            others = self._create(size, self.partner, True)
+            with self.assertQueryCount(baseline):
+                response = self.url_open(url)
+            self.assertEqual(response.status_code, 200)
@@ -0,0 +1,3 @@
+from . import instrumentation
+from . import lru
+from . import metrics
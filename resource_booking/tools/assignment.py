@@ -0,0 +1,173 @@
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+"""Assign combinations to several bookings at once, avoiding fragmentation.
+
+Each booking goes to the combination whose free block around it is the
+smallest one that fits, so that large free blocks remain for bookings that
+need them. A branch and bound search looks for the assignment that leaves
+fewer bookings without combination and, among those, uses the smallest
+blocks overall. Its 1st solution is the greedy best fit, which is returned
+if the time budget runs out before finding a better one.
+"""
+
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from pytz import timezone
+
+# ``start`` and ``stop`` are timezone-aware; ``combination_ids`` are the
+# candidates, by priority, used to break ties
+Request = namedtuple("Request", "booking_id type_id start stop combination_ids")
+
+
+class _Timeout(Exception):
+    pass
+
+
+def _free_block(engine, request, combination_id):
+    """Length of the free block of a combination where a request fits.
+
+    Blocks are looked for within the days of the request, in the timezone of
+    the type calendar, so they are not cut at midnight in UTC.
+
+    :return: A ``timedelta``, or ``None`` if it does not fit.
+    """
+    snapshot = engine.snapshot
+    tz = timezone(snapshot.calendars[snapshot.types[request.type_id].calendar_id].tz)
+    window_start = tz.localize(
+        datetime.combine(request.start.astimezone(tz).date(), datetime.min.time())
+    )
+    window_end = tz.localize(
+        datetime.combine(
+            request.stop.astimezone(tz).date() + timedelta(days=1),
+            datetime.min.time(),
+        )
+    )
+    for start, stop in engine.booking_intervals(
+        request.type_id,
+        window_start,
+        window_end,
+        [combination_id],
+        request.booking_id,
+    ):
+        if start <= request.start and stop >= request.stop:
+            return stop - start
+        if start > request.start:
+            break
+    return None
+
+
+def _candidates(engine, request):
+    """Fitting combinations of a request, tightest block first."""
+    candidates = []
+    for priority, combination_id in enumerate(request.combination_ids):
+        block = _free_block(engine, request, combination_id)
+        if block is not None:
+            candidates.append((block, priority, combination_id))
+    return sorted(candidates)
+
+
+def _greedy(engine, requests):
+    """Give each request its tightest block, in order.
+
+    :return: Tuple with cost and list of combination ids, reserved.
+    """
+    missing, used, assignment = 0, timedelta(), []
+    for request in requests:
+        candidates = _candidates(engine, request)
+        if not candidates:
+            missing += 1
+            assignment.append(None)
+            continue
+        block, _priority, combination_id = candidates[0]
+        engine.reserve(combination_id, request.start, request.stop, request.booking_id)
+        used += block
+        assignment.append(combination_id)
+    return (missing, used), assignment
+
+
+def best_fit(engine, requests, budget=0.5, max_search=100):
+    """Assign combinations to requests, keeping the largest free blocks.
+
+    Busy ranges of the requested bookings are ignored, because they are
+    being assigned now. Assigned combinations are reserved in the engine.
+
+    :param list requests: :class:`Request` items.
+    :param float budget: Seconds to look for better solutions than greedy.
+    :param int max_search: Bigger batches are only assigned greedily.
+    :return: Dict with ``{booking_id: combination_id}``; ``None`` when no
+        combination fits.
+    """
+    booking_ids = {request.booking_id for request in requests}
+    for items in engine.snapshot.busy.values():
+        items[:] = [item for item in items if item.booking_id not in booking_ids]
+    # Earlier and longer bookings first, as in interval scheduling
+    requests = sorted(requests, key=lambda req: (req.start, req.start - req.stop))
+    cost, assignment = _greedy(engine, requests)
+    if budget > 0 and 1 < len(requests) <= max_search:
+        for request, combination_id in zip(requests, assignment, strict=True):
+            if combination_id:
+                engine.unreserve(
+                    combination_id, request.start, request.stop, request.booking_id
+                )
+        assignment = _branch_and_bound(engine, requests, cost, assignment, budget)
+        for request, combination_id in zip(requests, assignment, strict=True):
+            if combination_id:
+                engine.reserve(
+                    combination_id, request.start, request.stop, request.booking_id
+                )
+    return {
+        request.booking_id: combination_id
+        for request, combination_id in zip(requests, assignment, strict=True)
+    }
+
+
+def _branch_and_bound(engine, requests, cost, assignment, budget):
+    """Improve an assignment until the time budget runs out.
+
+    Costs are tuples with the amount of requests without combination and
+    the total length of the blocks used.
+    """
+    remaining = [timedelta()] * (len(requests) + 1)
+    for index in range(len(requests) - 1, -1, -1):
+        request = requests[index]
+        remaining[index] = remaining[index + 1] + request.stop - request.start
+    deadline = time.monotonic() + budget
+    best = {"cost": cost, "assignment": assignment}
+    current = []
+
+    def search(index, missing, used):
+        if time.monotonic() > deadline:
+            raise _Timeout()
+        # Each block is at least as long as its booking
+        if (missing, used + remaining[index]) >= best["cost"]:
+            return
+        if index == len(requests):
+            best["cost"] = (missing, used)
+            best["assignment"] = list(current)
+            return
+        request = requests[index]
+        candidates = _candidates(engine, request)
+        if not candidates:
+            current.append(None)
+            search(index + 1, missing + 1, used)
+            current.pop()
+            return
+        for block, _priority, combination_id in candidates:
+            engine.reserve(
+                combination_id, request.start, request.stop, request.booking_id
+            )
+            current.append(combination_id)
+            try:
+                search(index + 1, missing, used + block)
+            finally:
+                current.pop()
+                engine.unreserve(
+                    combination_id, request.start, request.stop, request.booking_id
+                )
+
+    try:
+        search(0, 0, timedelta())
+    except _Timeout:
+        pass
+    return best["assignment"]
@@ -0,0 +1,535 @@
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+"""Availability engine that works without the ORM.
+
+It computes the same availability as ``resource.booking._get_intervals``
+and ``resource.booking._get_available_slots``, but on a plain snapshot of
+calendars, leaves, resources, combinations, booking types and busy ranges.
+Build snapshots with ``resource.booking.type._get_availability_snapshot``.
+
+All naive datetimes in a snapshot are in UTC. Intervals are lists of sorted,
+disjoint ``(start, stop)`` tuples of timezone-aware datetimes, where touching
+intervals are already merged.
+"""
+
+import multiprocessing
+from bisect import bisect_left, bisect_right
+from collections import defaultdict, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from operator import itemgetter
+
+from pytz import UTC, timezone
+
+Attendance = namedtuple(
+    "Attendance",
+    "calendar_id dayofweek hour_from hour_to week_type date_from date_to resource_id",
+)
+Calendar = namedtuple("Calendar", "id tz two_weeks")
+Leave = namedtuple("Leave", "calendar_id resource_id start stop")
+Resource = namedtuple("Resource", "id calendar_id tz")
+Combination = namedtuple("Combination", "id resource_ids forced_calendar_id")
+BookingType = namedtuple(
+    "BookingType",
+    "id calendar_id combination_ids duration slot_duration modifications_deadline",
+)
+Busy = namedtuple("Busy", "resource_id start stop booking_id")
+
+
+class Snapshot:
+    """Everything needed to compute availability, indexed for lookups."""
+
+    def __init__(
+        self,
+        calendars=(),
+        attendances=(),
+        leaves=(),
+        resources=(),
+        combinations=(),
+        types=(),
+        busy=(),
+    ):
+        self.calendars = {calendar.id: calendar for calendar in calendars}
+        self.attendances = defaultdict(list)
+        for attendance in attendances:
+            self.attendances[attendance.calendar_id].append(attendance)
+        self.leaves = list(leaves)
+        self.resources = {resource.id: resource for resource in resources}
+        self.combinations = {
+            combination.id: combination for combination in combinations
+        }
+        self.types = {type_.id: type_ for type_ in types}
+        self.busy = defaultdict(list)
+        for item in busy:
+            self.busy[item.resource_id].append(item)
+
+
+def _merge(intervals):
+    """Sort intervals, drop empty ones and merge those overlapping or touching."""
+    result = []
+    for start, stop in sorted(intervals):
+        if start >= stop:
+            continue
+        if result and result[-1][1] >= start:
+            if stop > result[-1][1]:
+                result[-1] = (result[-1][0], stop)
+        else:
+            result.append((start, stop))
+    return result
+
+
+def _intersection(left, right):
+    """Intersect 2 merged interval lists."""
+    result = []
+    left_index = right_index = 0
+    while left_index < len(left) and right_index < len(right):
+        start = max(left[left_index][0], right[right_index][0])
+        stop = min(left[left_index][1], right[right_index][1])
+        if start < stop:
+            result.append((start, stop))
+        if left[left_index][1] < right[right_index][1]:
+            left_index += 1
+        else:
+            right_index += 1
+    return result
+
+
+def _difference(left, right):
+    """Remove merged interval list ``right`` from ``left``."""
+    result = []
+    right_index = 0
+    for start, stop in left:
+        while right_index < len(right) and right[right_index][1] <= start:
+            right_index += 1
+        index = right_index
+        while index < len(right) and right[index][0] < stop:
+            if right[index][0] > start:
+                result.append((start, right[index][0]))
+            start = max(start, right[index][1])
+            index += 1
+        if start < stop:
+            result.append((start, stop))
+    return result
+
+
+def is_fitting_sorted(intervals, start_dt, end_dt):
+    """Same as :meth:`AvailabilityEngine.is_fitting`, with a binary search.
+
+    :param list intervals: Merged intervals.
+    """
+    index = bisect_right(intervals, start_dt, key=itemgetter(0)) - 1
+    return index >= 0 and intervals[index][1] >= end_dt
+
+
+def overlaps_sorted(intervals, start_dt, end_dt):
+    """Tell if the stretch between both datetimes overlaps any interval.
+
+    :param list intervals: Sorted, disjoint intervals.
+    """
+    index = bisect_left(intervals, end_dt, key=itemgetter(0))
+    return index > 0 and intervals[index - 1][1] > start_dt
+
+
+def _localize(value, tz):
+    """Convert a naive UTC datetime to an aware one."""
+    return UTC.localize(value).astimezone(tz)
+
+
+def _week_type(day):
+    """Same as ``resource.calendar.attendance.get_week_type``."""
+    return int((day.toordinal() - 1) // 7 % 2)
+
+
+def _hour_delta(hours):
+    """Same rounding as Odoo's ``float_to_time``, but 24 means midnight."""
+    return timedelta(minutes=round(hours * 60))
+
+
+class AvailabilityEngine:
+    """Compute availability on a snapshot."""
+
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+        # Work intervals never change, but busy ranges may be reserved
+        self._work_intervals = {}
+
+    def work_intervals(self, calendar_id, start_dt, end_dt, resource_id=None):
+        """Attendances minus leaves of a calendar, optionally for a resource."""
+        key = (calendar_id, start_dt, end_dt, resource_id)
+        if key not in self._work_intervals:
+            self._work_intervals[key] = self._compute_work_intervals(*key)
+        return self._work_intervals[key]
+
+    def _compute_work_intervals(self, calendar_id, start_dt, end_dt, resource_id):
+        snapshot = self.snapshot
+        calendar = snapshot.calendars[calendar_id]
+        tz = timezone(
+            snapshot.resources[resource_id].tz if resource_id else calendar.tz
+        )
+        start, end = start_dt.astimezone(tz), end_dt.astimezone(tz)
+        attendances = [
+            attendance
+            for attendance in snapshot.attendances[calendar_id]
+            if attendance.resource_id in (None, resource_id)
+        ]
+        intervals = []
+        day = start.date()
+        while day <= end.date():
+            for attendance in attendances:
+                if (
+                    attendance.dayofweek != day.weekday()
+                    or (attendance.date_from and day < attendance.date_from)
+                    or (attendance.date_to and day > attendance.date_to)
+                    or (calendar.two_weeks and attendance.week_type != _week_type(day))
+                ):
+                    continue
+                midnight = datetime.combine(day, datetime.min.time())
+                dt0 = tz.localize(midnight + _hour_delta(attendance.hour_from))
+                dt1 = tz.localize(midnight + _hour_delta(attendance.hour_to))
+                intervals.append((max(start, dt0), min(end, dt1)))
+            day += timedelta(days=1)
+        leaves = [
+            (
+                max(start, _localize(leave.start, tz)),
+                min(end, _localize(leave.stop, tz)),
+            )
+            for leave in snapshot.leaves
+            if leave.calendar_id in (None, calendar_id)
+            and leave.resource_id in (None, resource_id)
+        ]
+        return _difference(_merge(intervals), _merge(leaves))
+
+    def combination_intervals(
+        self, combination_id, start_dt, end_dt, booking_id=None
+    ):
+        """Times when all resources of a combination are free.
+
+        Busy ranges of ``booking_id`` are ignored, because that is the booking
+        being analyzed.
+        """
+        snapshot = self.snapshot
+        combination = snapshot.combinations[combination_id]
+        result = [(start_dt, end_dt)]
+        for resource_id in combination.resource_ids:
+            if not result:
+                break
+            resource = snapshot.resources[resource_id]
+            calendar_id = combination.forced_calendar_id or resource.calendar_id
+            if not calendar_id:
+                return []
+            busy = _merge(
+                (_localize(item.start, UTC), _localize(item.stop, UTC))
+                for item in snapshot.busy[resource_id]
+                if not booking_id or item.booking_id != booking_id
+            )
+            result = _intersection(
+                result,
+                _difference(
+                    self.work_intervals(calendar_id, start_dt, end_dt, resource_id),
+                    busy,
+                ),
+            )
+        return result
+
+    def booking_intervals(
+        self, type_id, start_dt, end_dt, combination_ids=None, booking_id=None
+    ):
+        """Times when a booking of some type fits in any of the combinations.
+
+        By default, all combinations of the type are considered.
+        """
+        type_ = self.snapshot.types[type_id]
+        if combination_ids is None:
+            combination_ids = type_.combination_ids
+        combinations = _merge(
+            interval
+            for combination_id in combination_ids
+            for interval in self.combination_intervals(
+                combination_id, start_dt, end_dt, booking_id
+            )
+        )
+        result = _intersection(
+            self.work_intervals(type_.calendar_id, start_dt, end_dt), combinations
+        )
+        tz = start_dt.tzinfo
+        return [(start.astimezone(tz), stop.astimezone(tz)) for start, stop in result]
+
+    @staticmethod
+    def is_fitting(intervals, start_dt, end_dt):
+        """Tell if the stretch between both datetimes is fully available."""
+        return any(start <= start_dt and stop >= end_dt for start, stop in intervals)
+
+    def best_combination(
+        self, type_id, start_dt, end_dt, combination_ids=None, booking_id=None
+    ):
+        """Get the first combination where a booking fits, or ``None``."""
+        if combination_ids is None:
+            combination_ids = self.snapshot.types[type_id].combination_ids
+        for combination_id in combination_ids:
+            intervals = self.booking_intervals(
+                type_id, start_dt, end_dt, [combination_id], booking_id
+            )
+            if self.is_fitting(intervals, start_dt, end_dt):
+                return combination_id
+        return None
+
+    def available_slots(
+        self,
+        type_id,
+        start_dt,
+        end_dt,
+        now=None,
+        duration=None,
+        combination_ids=None,
+        booking_id=None,
+    ):
+        """Same as ``resource.booking._get_available_slots``.
+
+        :param datetime now: Naive UTC datetime used to apply the type deadline.
+            Without it, the deadline is ignored.
+        :param float duration: Booking hours; defaults to the type duration.
+        :return: Dict with dates as keys and lists of slot starts as values.
+        """
+        type_ = self.snapshot.types[type_id]
+        slot_duration = timedelta(hours=type_.slot_duration)
+        booking_duration = timedelta(hours=duration or type_.duration)
+        if now:
+            start_dt = max(
+                start_dt,
+                _localize(now, start_dt.tzinfo)
+                + timedelta(hours=type_.modifications_deadline),
+            )
+        workday_min = start_dt.replace(hour=0, minute=0, second=0, microsecond=0)
+        result = {}
+        for available_start, available_stop in self.booking_intervals(
+            type_id, workday_min, end_dt, combination_ids, booking_id
+        ):
+            test_start = available_start
+            while test_start < available_stop:
+                test_stop = test_start + booking_duration
+                if test_start >= start_dt and test_stop <= available_stop:
+                    result.setdefault(test_start.date(), []).append(test_start)
+                test_start += slot_duration
+        return result
+
+    def earliest_slot(
+        self,
+        type_id,
+        start_dt,
+        end_dt,
+        now=None,
+        duration=None,
+        combination_ids=None,
+        window_days=7,
+    ):
+        """Get the 1st slot where a booking fits, and the combination for it.
+
+        Slots are searched by windows of some days, because the earliest one
+        is usually soon.
+
+        :param combination_ids: Candidate combinations, by priority.
+        :return: Tuple with slot start and combination id, or ``None``.
+        """
+        type_ = self.snapshot.types[type_id]
+        if combination_ids is None:
+            combination_ids = type_.combination_ids
+        booking_duration = timedelta(hours=duration or type_.duration)
+        window_start = start_dt
+        while window_start < end_dt:
+            window_end = min(
+                end_dt,
+                window_start.replace(hour=0, minute=0, second=0, microsecond=0)
+                + timedelta(days=window_days),
+            )
+            # Extended to find slots that start in the window and end after it
+            slots = self.available_slots(
+                type_id,
+                window_start,
+                window_end + booking_duration,
+                now,
+                duration,
+                combination_ids,
+            )
+            for slot in sorted(slot for day in slots.values() for slot in day):
+                if slot >= window_end:
+                    break
+                combination_id = self.best_combination(
+                    type_id, slot, slot + booking_duration, combination_ids
+                )
+                if combination_id:
+                    return slot, combination_id
+            window_start = window_end
+        return None
+
+    def reserve(self, combination_id, start_dt, end_dt, booking_id=None):
+        """Mark all resources of a combination busy, as if it were booked."""
+        start = start_dt.astimezone(UTC).replace(tzinfo=None)
+        stop = end_dt.astimezone(UTC).replace(tzinfo=None)
+        for resource_id in self.snapshot.combinations[combination_id].resource_ids:
+            self.snapshot.busy[resource_id].append(
+                Busy(resource_id, start, stop, booking_id)
+            )
+
+    def unreserve(self, combination_id, start_dt, end_dt, booking_id=None):
+        """Undo :meth:`reserve`."""
+        start = start_dt.astimezone(UTC).replace(tzinfo=None)
+        stop = end_dt.astimezone(UTC).replace(tzinfo=None)
+        for resource_id in self.snapshot.combinations[combination_id].resource_ids:
+            self.snapshot.busy[resource_id].remove(
+                Busy(resource_id, start, stop, booking_id)
+            )
+
+    def day_bitmaps(self, type_id, first_day, days, combination_ids=None):
+        """Get slot bitmaps of a type, ignoring its modification deadline.
+
+        Days are in the type calendar timezone. Every combination and day gets
+        a bitmap, even if it has no slots.
+
+        :param date first_day: 1st day to compute.
+        :param int days: Amount of days to compute.
+        :param combination_ids: Only for these combinations of the type.
+        :return: Dict with ``{(combination_id, day): DayBitmap}``.
+        """
+        snapshot = self.snapshot
+        type_ = snapshot.types[type_id]
+        if combination_ids is None:
+            combination_ids = type_.combination_ids
+        tz = timezone(snapshot.calendars[type_.calendar_id].tz)
+        start_dt = tz.localize(datetime.combine(first_day, datetime.min.time()))
+        end_dt = tz.localize(
+            datetime.combine(first_day + timedelta(days=days), datetime.min.time())
+        )
+        step = type_.slot_duration * 60
+        step = int(step) if step == int(step) else 0
+        slots = {
+            combination_id: self.available_slots(
+                type_id, start_dt, end_dt, combination_ids=[combination_id]
+            )
+            for combination_id in combination_ids
+        }
+        result = {}
+        for day in (first_day + timedelta(days=num) for num in range(days)):
+            day_bitmaps = encode_day(
+                day,
+                tz,
+                step,
+                {
+                    combination_id: combination_slots.get(day, [])
+                    for combination_id, combination_slots in slots.items()
+                },
+            )
+            for combination_id, day_bitmap in day_bitmaps.items():
+                result[combination_id, day] = day_bitmap
+        return result
+
+
+# Bit ``i`` of ``bitmap`` means that a slot starts ``anchor + i * step``
+# minutes after midnight. ``bitmap`` is ``None`` when slots do not fit in
+# that grid, and then they must be computed live.
+DayBitmap = namedtuple("DayBitmap", "anchor step bitmap")
+
+
+def encode_day(day, tz, step, combination_slots):
+    """Encode slots of several combinations in a day as bitmaps.
+
+    All bitmaps share the same grid, so they can be joined with bitwise OR.
+    Days with a DST change are never aligned.
+
+    :param date day: Day to encode, in ``tz``.
+    :param int step: Minutes between slots; ``0`` if not a whole minute.
+    :param dict combination_slots: ``{combination_id: [slot starts]}``.
+    :return: Dict with ``{combination_id: DayBitmap}``.
+    """
+    midnight = tz.localize(datetime.combine(day, datetime.min.time()))
+    next_midnight = tz.localize(
+        datetime.combine(day + timedelta(days=1), datetime.min.time())
+    )
+    offsets = {
+        combination_id: [(slot - midnight).total_seconds() / 60 for slot in slots]
+        for combination_id, slots in combination_slots.items()
+    }
+    every = [offset for day_offsets in offsets.values() for offset in day_offsets]
+    anchor = int(min(every) % step) if every and step else 0
+    aligned = (
+        step
+        and midnight.utcoffset() == next_midnight.utcoffset()
+        and all(offset % 1 == 0 and (offset - anchor) % step == 0 for offset in every)
+    )
+    result = {}
+    for combination_id, day_offsets in offsets.items():
+        bitmap = None
+        if aligned:
+            bitmap = 0
+            for offset in day_offsets:
+                bitmap |= 1 << int((offset - anchor) // step)
+        result[combination_id] = DayBitmap(anchor, step, bitmap)
+    return result
+
+
+def decode_day(day, tz, day_bitmap):
+    """Get slot starts of an aligned day bitmap, in ``tz``."""
+    midnight = tz.localize(datetime.combine(day, datetime.min.time()))
+    bitmap, bit = day_bitmap.bitmap, 0
+    result = []
+    while bitmap:
+        if bitmap & 1:
+            result.append(
+                midnight
+                + timedelta(minutes=day_bitmap.anchor + bit * day_bitmap.step)
+            )
+        bitmap >>= 1
+        bit += 1
+    return result
+
+
+# Engine of each process in the pool
+_pool_engine = None
+
+
+def _init_pool(snapshot):
+    global _pool_engine
+    _pool_engine = AvailabilityEngine(snapshot)
+
+
+def _pool_type_bitmaps(args):
+    type_id, now, days = args
+    return type_id, _type_bitmaps(_pool_engine, type_id, now, days)
+
+
+def _type_bitmaps(engine, type_id, now, days):
+    """Get slot bitmaps of a type for some days from today."""
+    snapshot = engine.snapshot
+    tz = timezone(snapshot.calendars[snapshot.types[type_id].calendar_id].tz)
+    return engine.day_bitmaps(type_id, now.astimezone(tz).date(), days)
+
+
+def compute_bitmaps(snapshot, type_ids, now, days, workers=1):
+    """Get slot bitmaps of several types, ignoring their modification deadlines.
+
+    With more than one worker, types are distributed among a pool of forked
+    processes, which inherit the snapshot instead of receiving it pickled.
+    Only fork from single-threaded processes: a child forked while another
+    thread holds a lock, such as the logging one, never gets it released.
+
+    :param datetime now: Timezone-aware moment when today starts for each type.
+    :param int days: Amount of days to compute, starting today.
+    :return: Dict with ``{type_id: {(combination_id, day): DayBitmap}}``.
+    """
+    if workers <= 1 or len(type_ids) <= 1:
+        engine = AvailabilityEngine(snapshot)
+        return {
+            type_id: _type_bitmaps(engine, type_id, now, days)
+            for type_id in type_ids
+        }
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("fork"),
+        initializer=_init_pool,
+        initargs=(snapshot,),
+    ) as executor:
+        return dict(
+            executor.map(
+                _pool_type_bitmaps,
+                [(type_id, now, days) for type_id in type_ids],
+                chunksize=max(1, len(type_ids) // (workers * 4)),
+            )
+        )
@@ -0,0 +1,132 @@
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+"""Opt-in timing of availability hot paths.
+
+Instrumented functions record their calls, wall time and SQL queries while
+a collection is active in the current thread. Collections are started for
+each HTTP request when the ``resource_booking.instrumentation`` system
+parameter is enabled, or around the outermost instrumented call when the
+``resource_booking_instrumentation`` context key is set.
+
+Times and queries are inclusive: they include those of nested instrumented
+calls.
+"""
+
+import functools
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from odoo.tools import str2bool
+
+_logger = logging.getLogger(__name__)
+_local = threading.local()
+
+CONTEXT_KEY = "resource_booking_instrumentation"
+PARAM = "resource_booking.instrumentation"
+
+
+class Stats:
+    """Measurements collected in one thread."""
+
+    def __init__(self, cr):
+        self.cr = cr
+        self.entries = {}
+        self.running = set()
+
+    def as_dict(self):
+        return {
+            name: {
+                "calls": calls,
+                "ms": round(seconds * 1000, 3),
+                "queries": queries,
+            }
+            for name, (calls, seconds, queries) in sorted(self.entries.items())
+        }
+
+
+def is_enabled(env):
+    """Tell if the system parameter enables instrumentation."""
+    return str2bool(env["ir.config_parameter"].sudo().get_param(PARAM) or "0", False)
+
+
+def start(cr):
+    """Start collecting in the current thread."""
+    _local.stats = Stats(cr)
+    return _local.stats
+
+
+def stop():
+    """Stop collecting in the current thread and return what was collected."""
+    stats, _local.stats = getattr(_local, "stats", None), None
+    return stats
+
+
+@contextmanager
+def collect(cr):
+    """Collect measurements within the block."""
+    stats = start(cr)
+    try:
+        yield stats
+    finally:
+        stop()
+
+
+def log(stats, label):
+    """Emit measurements as a structured log line."""
+    _logger.info(
+        "Instrumentation: %s", json.dumps({"label": label, **stats.as_dict()})
+    )
+
+
+def server_timing(stats):
+    """Format measurements as a ``Server-Timing`` header value."""
+    return ", ".join(
+        '{};dur={};desc="calls={} queries={}"'.format(
+            name, values["ms"], values["calls"], values["queries"]
+        )
+        for name, values in stats.as_dict().items()
+    )
+
+
+def instrumented(name):
+    """Measure the decorated function while instrumentation is active.
+
+    Place it below Odoo API decorators.
+    """
+
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            stats = getattr(_local, "stats", None)
+            if stats is None:
+                env = getattr(args[0], "env", None) if args else None
+                if env is None or not env.context.get(CONTEXT_KEY):
+                    return function(*args, **kwargs)
+                with collect(env.cr) as stats:
+                    result = wrapper(*args, **kwargs)
+                log(stats, name)
+                return result
+            if name in stats.running:
+                # Recursive calls are already being timed by the outer one
+                calls, seconds, queries = stats.entries.get(name, (0, 0.0, 0))
+                stats.entries[name] = (calls + 1, seconds, queries)
+                return function(*args, **kwargs)
+            stats.running.add(name)
+            sql_count = stats.cr.sql_log_count
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                calls, seconds, queries = stats.entries.get(name, (0, 0.0, 0))
+                stats.entries[name] = (
+                    calls + 1,
+                    seconds + time.perf_counter() - started,
+                    queries + stats.cr.sql_log_count - sql_count,
+                )
+                stats.running.discard(name)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,99 @@
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+"""Least recently used caches bounded by memory.
+
+Each worker process keeps its own caches. Sizes are estimates of the memory
+used by cached values, good enough to keep caches within a budget.
+"""
+
+import sys
+import threading
+from collections import OrderedDict
+
+from . import metrics
+
+
+def sizeof(value):
+    """Estimate the memory used by a value and everything it contains."""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(sizeof(key) + sizeof(item) for key, item in value.items())
+    elif isinstance(value, list | tuple | set | frozenset):
+        size += sum(sizeof(item) for item in value)
+    return size
+
+
+class LRUCache:
+    """Thread-safe cache that evicts least recently used entries.
+
+    :param str name: Label of the cache in metrics.
+    :param int max_bytes: Memory budget. With ``0``, nothing is cached.
+    """
+
+    def __init__(self, name, max_bytes=0):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = self.misses = self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        """Get a cached value, and mark it as the most recently used."""
+        with self._lock:
+            try:
+                value, _size = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                metrics.CACHE_REQUESTS.inc(cache=self.name, result="miss")
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+        metrics.CACHE_REQUESTS.inc(cache=self.name, result="hit")
+        return value
+
+    def put(self, key, value):
+        """Cache a value, evicting old ones to stay within budget.
+
+        Values larger than the whole budget are not cached.
+        """
+        size = sizeof(key) + sizeof(value)
+        evicted = 0
+        with self._lock:
+            if key in self._entries:
+                self.bytes -= self._entries.pop(key)[1]
+            if size <= self.max_bytes:
+                self._entries[key] = (value, size)
+                self.bytes += size
+            while self.bytes > self.max_bytes:
+                _key, (_value, old_size) = self._entries.popitem(last=False)
+                self.bytes -= old_size
+                evicted += 1
+            self.evictions += evicted
+            used = self.bytes
+        if evicted:
+            metrics.CACHE_EVICTIONS.inc(evicted, cache=self.name)
+        metrics.CACHE_BYTES.set(used, cache=self.name)
+
+    def clear(self):
+        """Drop all entries."""
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+        metrics.CACHE_BYTES.set(0, cache=self.name)
+
+    def stats(self):
+        """Get usage figures of the cache."""
+        with self._lock:
+            requests = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": requests and self.hits / requests,
+                "evictions": self.evictions,
+            }
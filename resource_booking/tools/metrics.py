@@ -0,0 +1,146 @@
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+"""In-process counters of the booking engine.
+
+Each worker process keeps its own values, which are exposed in Prometheus
+text format with a ``pid`` label so that series from several workers never
+get mixed up.
+"""
+
+import os
+import threading
+from bisect import bisect_left
+
+_lock = threading.Lock()
+_metrics = []
+
+
+def _format_labels(labels):
+    labels = dict(labels, pid=os.getpid())
+    return "{%s}" % ",".join(
+        '{}="{}"'.format(key, str(value).replace("\\", "\\\\").replace('"', '\\"'))
+        for key, value in sorted(labels.items())
+    )
+
+
+class Counter:
+    """Monotonic counter, optionally split by labels."""
+
+    kind = "counter"
+
+    def __init__(self, name, documentation):
+        self.name = name
+        self.documentation = documentation
+        self.values = {}
+        _metrics.append(self)
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with _lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def get(self, **labels):
+        return self.values.get(tuple(sorted(labels.items())), 0)
+
+    def samples(self):
+        for key, value in sorted(self.values.items()):
+            yield self.name, dict(key), value
+
+
+class Gauge:
+    """Value that can go up and down, optionally split by labels."""
+
+    kind = "gauge"
+
+    def __init__(self, name, documentation):
+        self.name = name
+        self.documentation = documentation
+        self.values = {}
+        _metrics.append(self)
+
+    def set(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with _lock:
+            self.values[key] = value
+
+    def get(self, **labels):
+        return self.values.get(tuple(sorted(labels.items())), 0)
+
+    def samples(self):
+        for key, value in sorted(self.values.items()):
+            yield self.name, dict(key), value
+
+
+class Histogram:
+    """Distribution of observed values in cumulative buckets."""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        _metrics.append(self)
+
+    def observe(self, value):
+        with _lock:
+            self.counts[bisect_left(self.buckets, value)] += 1
+            self.sum += value
+
+    def samples(self):
+        total = 0
+        for bound, count in zip(self.buckets, self.counts, strict=False):
+            total += count
+            yield self.name + "_bucket", {"le": repr(float(bound))}, total
+        total += self.counts[-1]
+        yield self.name + "_bucket", {"le": "+Inf"}, total
+        yield self.name + "_sum", {}, self.sum
+        yield self.name + "_count", {}, total
+
+
+def render():
+    """Export all metrics in Prometheus text format."""
+    lines = []
+    with _lock:
+        for metric in _metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+    return "\n".join(lines) + "\n"
+
+
+AVAILABILITY_COMPUTATIONS = Counter(
+    "resource_booking_availability_computations_total",
+    "Computations of available intervals for bookings.",
+)
+CACHE_BYTES = Gauge(
+    "resource_booking_cache_bytes",
+    "Estimated memory used by booking engine caches, by cache.",
+)
+CACHE_EVICTIONS = Counter(
+    "resource_booking_cache_evictions_total",
+    "Entries evicted from booking engine caches to stay within budget.",
+)
+CACHE_REQUESTS = Counter(
+    "resource_booking_cache_requests_total",
+    "Lookups in booking engine caches, by cache and result (hit or miss).",
+)
+CHECK_SCHEDULING = Counter(
+    "resource_booking_check_scheduling_total",
+    "Validations of scheduled bookings.",
+)
+CHECK_SCHEDULING_FAILURES = Counter(
+    "resource_booking_check_scheduling_failures_total",
+    "Validations of scheduled bookings that found conflicts.",
+)
+CONFIRM_CONFLICTS = Counter(
+    "resource_booking_confirm_conflicts_total",
+    "Portal confirmations rejected because the slot was not available.",
+)
+SLOT_GENERATION_SECONDS = Histogram(
+    "resource_booking_slot_generation_seconds",
+    "Time spent generating available slots for a booking.",
+    (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
@@ -14,9 +14,14 @@
     "installable": True,
     "assets": {
         "web.assets_backend": [
+            "web_calendar_slot_duration/static/src/js/slot_duration.esm.js",
             "web_calendar_slot_duration/static/src/js/calendar_common_renderer.esm.js",
             "web_calendar_slot_duration/static/src/js/calendar_model.esm.js",
-        ]
+            "web_calendar_slot_duration/static/src/scss/calendar.scss",
+        ],
+        "web.qunit_suite_tests": [
+            "web_calendar_slot_duration/static/tests/**/*",
+        ],
     },
     "data": ["demo/scheduled_actions.xml"],
     "depends": ["web"],
@@ -3,14 +3,51 @@
  * License LGPL-3.0 or later (https://www.gnu.org/licenses/lgpl). */
 
 import {CalendarCommonRenderer} from "@web/views/calendar/calendar_common/calendar_common_renderer";
+import {deserializeDateTime} from "@web/core/l10n/dates";
 import {patch} from "@web/core/utils/patch";
 
 patch(CalendarCommonRenderer.prototype, {
     get options() {
         const options = super.options;
-        if (this.env.searchModel.context.calendar_slot_duration) {
-            options.slotDuration = this.env.searchModel.context.calendar_slot_duration;
+        const {slotDuration} = this.props.model;
+        if (slotDuration) {
+            options.slotDuration = slotDuration.toFormat("hh:mm:ss");
         }
         return options;
     },
+
+    /**
+     * Shade the time outside the free intervals, if the model has them.
+     *
+     * @override
+     */
+    mapRecordsToEvents() {
+        const events = super.mapRecordsToEvents();
+        const {availability, range} = this.props.model.data;
+        if (!availability) {
+            return events;
+        }
+        const shading = {
+            groupId: "o_calendar_availability",
+            classNames: ["o_calendar_unavailable"],
+        };
+        if (!availability.length) {
+            // Nothing is free
+            events.push({
+                ...shading,
+                start: range.start.toISO(),
+                end: range.end.toISO(),
+                rendering: "background",
+            });
+        }
+        for (const [start, end] of availability) {
+            events.push({
+                ...shading,
+                start: deserializeDateTime(start).toISO(),
+                end: deserializeDateTime(end).toISO(),
+                rendering: "inverse-background",
+            });
+        }
+        return events;
+    },
 });
@@ -4,22 +4,48 @@
  * License LGPL-3.0 or later (https://www.gnu.org/licenses/lgpl). */
 
 import {CalendarModel} from "@web/views/calendar/calendar_model";
+import {parseSlotDuration} from "./slot_duration.esm";
 import {patch} from "@web/core/utils/patch";
+import {serializeDateTime} from "@web/core/l10n/dates";
 
 patch(CalendarModel.prototype, {
+    setup() {
+        super.setup(...arguments);
+        this.slotDuration = parseSlotDuration(
+            this.env.searchModel.context.calendar_slot_duration
+        );
+    },
+
     buildRawRecord(partialRecord, options = {}) {
-        if (
-            !partialRecord.end &&
-            this.env.searchModel.context.calendar_slot_duration &&
-            !partialRecord.isAllDay
-        ) {
-            const slot_duration = this.env.searchModel.context.calendar_slot_duration;
-            const [hours, minutes, seconds] = slot_duration
-                .match(/(\d+):(\d+):(\d+)/)
-                .slice(1, 4);
-            const durationFloat = hours + minutes / 60 + seconds / 3600;
-            partialRecord.end = partialRecord.start.plus({hours: durationFloat});
+        if (!partialRecord.end && this.slotDuration && !partialRecord.isAllDay) {
+            partialRecord.end = partialRecord.start.plus(this.slotDuration);
         }
         return super.buildRawRecord(partialRecord, options);
     },
+
+    /**
+     * Fetch free intervals when the displayed range changes.
+     *
+     * @override
+     */
+    async updateData(data) {
+        await super.updateData(data);
+        const {calendar_availability_model: model, calendar_availability_ids: ids} =
+            this.env.searchModel.context;
+        if (!model) {
+            return;
+        }
+        const start = serializeDateTime(data.range.start);
+        const end = serializeDateTime(data.range.end);
+        const key = `${start}/${end}`;
+        if (this.availabilityKey !== key) {
+            this.availabilityKey = key;
+            this.availability = await this.orm.call(
+                model,
+                "get_calendar_availability",
+                [ids, start, end]
+            );
+        }
+        data.availability = this.availability;
+    },
 });
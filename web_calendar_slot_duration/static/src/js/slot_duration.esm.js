@@ -0,0 +1,26 @@
+/** @odoo-module **/
+/* License LGPL-3.0 or later (https://www.gnu.org/licenses/lgpl). */
+
+const {Duration} = luxon;
+
+/**
+ * Parse the `calendar_slot_duration` context value.
+ *
+ * @param {Number|String} value Minutes, or a legacy "HH:MM:SS" string.
+ * @returns {Duration|null} Null if the value is missing or not usable.
+ */
+export function parseSlotDuration(value) {
+    let minutes = value;
+    if (typeof value === "string") {
+        const match = value.match(/^(\d+):(\d+)(?::(\d+))?$/);
+        if (!match) {
+            return null;
+        }
+        const [hours, mins, seconds] = match.slice(1, 4).map((part) => Number(part) || 0);
+        minutes = hours * 60 + mins + seconds / 60;
+    }
+    if (typeof minutes !== "number" || !(minutes > 0)) {
+        return null;
+    }
+    return Duration.fromObject({minutes});
+}
@@ -0,0 +1,76 @@
+/** @odoo-module **/
+/* License LGPL-3.0 or later (https://www.gnu.org/licenses/lgpl). */
+
+import {CalendarModel} from "@web/views/calendar/calendar_model";
+import {parseSlotDuration} from "@web_calendar_slot_duration/js/slot_duration.esm";
+import {serializeDateTime} from "@web/core/l10n/dates";
+
+const {DateTime} = luxon;
+
+/**
+ * Get a calendar model with just what `buildRawRecord` needs.
+ *
+ * @param {Number|String} slotDuration Context value of the slot duration.
+ * @returns {CalendarModel}
+ */
+function makeModel(slotDuration) {
+    const model = Object.create(CalendarModel.prototype);
+    model.meta = {
+        fieldMapping: {date_start: "start", date_stop: "stop"},
+        fields: {start: {type: "datetime"}, stop: {type: "datetime"}},
+    };
+    model.slotDuration = parseSlotDuration(slotDuration);
+    return model;
+}
+
+QUnit.module("web_calendar_slot_duration", {}, function () {
+    QUnit.test("parse structured and legacy durations", function (assert) {
+        assert.strictEqual(parseSlotDuration(30).as("minutes"), 30);
+        assert.strictEqual(parseSlotDuration(7.5).as("seconds"), 450);
+        // Sub-minute precision is kept
+        assert.strictEqual(parseSlotDuration(0.25).as("seconds"), 15);
+        assert.strictEqual(parseSlotDuration("00:10:00").as("minutes"), 10);
+        // Hours used to be concatenated as a string ("01" + 0.5)
+        assert.strictEqual(parseSlotDuration("01:30:00").as("minutes"), 90);
+        assert.strictEqual(parseSlotDuration("02:00").as("minutes"), 120);
+        assert.strictEqual(parseSlotDuration(undefined), null);
+        assert.strictEqual(parseSlotDuration(0), null);
+        assert.strictEqual(parseSlotDuration("<span>00:30</span>"), null);
+    });
+
+    QUnit.test("benchmark: slot ends over a large event set", function (assert) {
+        const count = 20000;
+        const base = DateTime.fromISO("2021-03-01T08:00:00");
+        const starts = Array.from({length: count}, (_, index) =>
+            base.plus({minutes: 15 * index})
+        );
+        const model = makeModel(90);
+        // Former behavior: parse the context string for every record
+        let begin = performance.now();
+        const expected = starts.map((start) => {
+            const [hours, minutes, seconds] = "01:30:00"
+                .match(/(\d+):(\d+):(\d+)/)
+                .slice(1, 4)
+                .map(Number);
+            const end = start.plus({hours: hours + minutes / 60 + seconds / 3600});
+            return model.buildRawRecord({start, end, isAllDay: false});
+        });
+        const perRecord = performance.now() - begin;
+        // Current behavior: use the duration parsed when the model was set up
+        begin = performance.now();
+        const records = starts.map((start) =>
+            model.buildRawRecord({start, isAllDay: false})
+        );
+        const once = performance.now() - begin;
+        assert.strictEqual(
+            records[0].stop,
+            serializeDateTime(base.plus({minutes: 90}))
+        );
+        assert.deepEqual(
+            records.map((record) => record.stop),
+            expected.map((record) => record.stop),
+            `${count} events: ${perRecord.toFixed(1)}ms parsing per record, ` +
+                `${once.toFixed(1)}ms building records parsed once`
+        );
+    });
+});